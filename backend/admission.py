@@ -0,0 +1,287 @@
+"""Admission control: concurrency budgets per route class and per-client rate limits.
+
+Without a limit, a spike queues every request on the Motor pool and latency
+grows for all of them, including reads that the snapshot cache could answer
+at once. `AdmissionMiddleware` sorts each request into a class before it
+reaches the router:
+
+    cached    GET of a cached list or /portfolio (no paging options)
+    db_read   every other GET: pages, streams, search, status lists
+    write     POST/PUT/DELETE, batches included
+    ingest    POST /api/status
+
+Each class has its own budget: at most `limit` requests run at once, at most
+`queue` more wait for a slot, in arrival order, and none waits longer than
+`max_wait`. A request is turned away with 503 and Retry-After at once when
+the queue is full or when the expected wait (queue length x mean service time
+/ limit) is already past `max_wait`. A saturated write path then sheds its
+own excess instead of slowing the cached reads down. Health probes and
+/metrics are never limited.
+
+On top of that, writes and status posts can be rate limited per client with
+a token bucket (`rate` requests per second, bursts of `burst`); an empty bucket
+is a 429 with Retry-After. The limits are off unless configured: clients are
+told apart by their address, and behind a load balancer or reverse proxy every
+request comes from the proxy's, so one bucket would throttle all clients
+together. Enable them there only with RATE_LIMIT_TRUST_FORWARDED, and only
+when the proxy overwrites X-Forwarded-For (otherwise clients pick their key).
+
+    ADMISSION_CONTROL                      "off" disables budgets and rate limits (default on)
+    ADMISSION_<CLASS>_LIMIT                concurrent requests (cached 256, db_read 32,
+                                           write 16, ingest 64)
+    ADMISSION_<CLASS>_QUEUE                waiting requests (cached 512, db_read 64,
+                                           write 32, ingest 256)
+    ADMISSION_<CLASS>_MAX_WAIT_MS          (cached 1000, db_read 2000, write 2000, ingest 500)
+    RATE_LIMIT_WRITES_PER_SECOND / _BURST  per client (default 0, off; burst 20)
+    RATE_LIMIT_STATUS_PER_SECOND / _BURST  per client (default 0, off; burst 50)
+    RATE_LIMIT_TRUST_FORWARDED             key clients on X-Forwarded-For (behind a proxy
+                                           that sets it; default off)
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_CONTROL = os.environ.get('ADMISSION_CONTROL', 'on').lower() not in ('0', 'off', 'false', 'no')
+RATE_LIMIT_TRUST_FORWARDED = os.environ.get('RATE_LIMIT_TRUST_FORWARDED', '').lower() in ('1', 'true', 'yes')
+
+# GET paths answered from the snapshot cache unless a paging option is given
+CACHED_PATHS = {
+    "/api/portfolio", "/api/personal-info", "/api/skills", "/api/education",
+    "/api/projects", "/api/projects/featured", "/api/goals", "/api/current-learning",
+}
+PAGING_PARAMS = {"limit", "after", "fields", "format"}
+EXEMPT_PATHS = ("/api/health", "/metrics")
+STATUS_PATH = "/api/status"
+
+
+def classify(method: str, path: str, query_string: bytes) -> Optional[str]:
+    """Route class of a request, or None when it is never limited"""
+    if path.startswith(EXEMPT_PATHS) or method == "OPTIONS":
+        return None
+    if method in ("GET", "HEAD"):
+        if path in CACHED_PATHS and not PAGING_PARAMS & parse_qs(query_string.decode("latin-1")).keys():
+            return "cached"
+        return "db_read"
+    if path == STATUS_PATH:
+        return "ingest"
+    return "write"
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Budget:
+    """A FIFO concurrency limit with a bounded, deadline-aware wait queue"""
+
+    def __init__(self, name: str, limit: int, queue: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Exponentially weighted mean seconds per request, for the wait estimate
+        self.service_time = 0.0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_full = 0
+        self.rejected_wait = 0
+        self.timed_out = 0
+
+    def expected_wait(self) -> float:
+        return (len(self._waiters) + 1) * self.service_time / self.limit
+
+    def _reject(self, reason: str) -> Rejected:
+        return Rejected(503, reason, max(self.expected_wait(), 1.0))
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in line if needed; raises Rejected instead of waiting in vain"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.queue:
+            self.rejected_full += 1
+            raise self._reject("queue full")
+        if self.expected_wait() > self.max_wait:
+            self.rejected_wait += 1
+            raise self._reject("expected wait too long")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended
+                if isinstance(e, asyncio.CancelledError):
+                    self.release(0.0)
+                    raise
+                self.admitted += 1
+                return
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.timed_out += 1
+            raise self._reject("wait timed out")
+        self.admitted += 1
+
+    def release(self, elapsed: float) -> None:
+        if elapsed:
+            self.service_time = elapsed if not self.service_time else 0.9 * self.service_time + 0.1 * elapsed
+        # Hand the slot straight to the next waiter, so it cannot be taken out of turn
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_full": self.rejected_full,
+            "rejected_wait": self.rejected_wait,
+            "timed_out": self.timed_out,
+            "service_ms": round(self.service_time * 1000, 3),
+        }
+
+
+class TokenBucket:
+    """Per-client token buckets; idle clients beyond `max_clients` are forgotten oldest first"""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.limited = 0
+
+    def take(self, client: str) -> None:
+        """Spend one token for client; raises Rejected (429) when none is left"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1.0:
+            self._buckets[client] = (tokens, now)
+            self.limited += 1
+            raise Rejected(429, "rate limited", (1.0 - tokens) / self.rate)
+        self._buckets[client] = (tokens - 1.0, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"rate": self.rate, "burst": self.burst, "clients": len(self._buckets), "limited": self.limited}
+
+
+def _budget(name: str, limit: int, queue: int, max_wait_ms: int) -> Budget:
+    prefix = f"ADMISSION_{name.upper()}"
+    return Budget(
+        name,
+        limit=int(os.environ.get(f"{prefix}_LIMIT", limit)),
+        queue=int(os.environ.get(f"{prefix}_QUEUE", queue)),
+        max_wait=float(os.environ.get(f"{prefix}_MAX_WAIT_MS", max_wait_ms)) / 1000,
+    )
+
+
+def _rate_limit(name: str, rate: float, burst: float) -> Optional[TokenBucket]:
+    rate = float(os.environ.get(f"RATE_LIMIT_{name}_PER_SECOND", rate))
+    return TokenBucket(rate, float(os.environ.get(f"RATE_LIMIT_{name}_BURST", burst))) if rate > 0 else None
+
+
+class AdmissionController:
+    def __init__(self, budgets: Dict[str, Budget], rate_limits: Dict[str, TokenBucket]):
+        self.budgets = budgets
+        self.rate_limits = rate_limits
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        budgets = [
+            _budget("cached", 256, 512, 1000),
+            _budget("db_read", 32, 64, 2000),
+            _budget("write", 16, 32, 2000),
+            _budget("ingest", 64, 256, 500),
+        ]
+        rate_limits = {"write": _rate_limit("WRITES", 0, 20), "ingest": _rate_limit("STATUS", 0, 50)}
+        rate_limits = {name: bucket for name, bucket in rate_limits.items() if bucket is not None}
+        if rate_limits and not RATE_LIMIT_TRUST_FORWARDED:
+            logger.warning(
+                "Rate limits are keyed on the peer address: behind a proxy all clients share one bucket "
+                "(set RATE_LIMIT_TRUST_FORWARDED if the proxy sets X-Forwarded-For)"
+            )
+        return cls({budget.name: budget for budget in budgets}, rate_limits)
+
+    def stats(self) -> dict:
+        return {
+            "budgets": {name: budget.stats() for name, budget in self.budgets.items()},
+            "rate_limits": {name: bucket.stats() for name, bucket in self.rate_limits.items()},
+        }
+
+
+def client_key(scope) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = Headers(scope=scope).get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # The path as routed: without a root_path such as a tenant prefix (tenancy.py)
+        path, root_path = scope["path"], scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        route_class = classify(scope["method"], path, scope.get("query_string", b""))
+        budget = self.controller.budgets.get(route_class)
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            bucket = self.controller.rate_limits.get(route_class)
+            if bucket is not None:
+                bucket.take(client_key(scope))
+            await budget.acquire()
+        except Rejected as e:
+            response = JSONResponse(
+                {"detail": "Too many requests" if e.status_code == 429 else "Server busy", "reason": e.reason},
+                status_code=e.status_code,
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            budget.release(time.perf_counter() - started)
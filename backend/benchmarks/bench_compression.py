@@ -0,0 +1,70 @@
+"""Bytes on the wire and CPU per request for the /portfolio payload.
+
+Builds the /api/portfolio body from seed_data.py with 10, 100 and 1000
+projects and compares identity, per-request (dynamic level) gzip and brotli,
+and the precompressed snapshot variants, which cost one compression per
+snapshot and a dict lookup per request afterwards.
+
+    cd backend && python benchmarks/bench_compression.py [--repeat 20]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orjson  # noqa: E402
+
+from compression import ENCODINGS, compress  # noqa: E402
+from routes.portfolio import _orjson_default  # noqa: E402
+from seed_data import build_seed_documents  # noqa: E402
+
+SIZES = [10, 100, 1_000]
+
+
+def portfolio_body(projects: int) -> bytes:
+    documents = build_seed_documents()
+    template = documents["projects"][0]
+    data = {name: docs for name, docs in documents.items() if name != "personal_info"}
+    data["personal_info"] = documents["personal_info"][0]
+    data["projects"] = [
+        {**template, "title": {"pt": f"Projeto {i}", "en": f"Project {i}"}, "order": i}
+        for i in range(projects)
+    ]
+    return orjson.dumps({"success": True, "data": data}, default=_orjson_default)
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    """Best-of-`repeat` CPU milliseconds for one call"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'projects':>8} {'variant':>14} {'bytes':>10} {'ratio':>7} {'cpu ms/req':>11} {'cpu ms once':>12}")
+    for n in SIZES:
+        body = portfolio_body(n)
+        repeat = max(3, args.repeat if n < 1_000 else args.repeat // 4)
+        print(f"{n:>8} {'identity':>14} {len(body):>10} {1:>7.2f} {0:>11.3f} {'':>12}")
+        for encoding in ENCODINGS:
+            dynamic = compress(body, encoding)
+            print(f"{'':>8} {encoding + ' dynamic':>14} {len(dynamic):>10} {len(body) / len(dynamic):>7.2f} "
+                  f"{cpu_ms(lambda: compress(body, encoding), repeat):>11.3f} {'':>12}")
+            static = compress(body, encoding, static=True)
+            once = cpu_ms(lambda: compress(body, encoding, static=True), max(3, repeat // 4))
+            cached = {encoding: static}
+            print(f"{'':>8} {encoding + ' cached':>14} {len(static):>10} {len(body) / len(static):>7.2f} "
+                  f"{cpu_ms(lambda: cached.get(encoding), repeat):>11.3f} {once:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Per-request CPU cost of serializing a list endpoint response.
+
+Compares the default path (ObjectId walk, one Pydantic model per document,
+FastAPI's response_model re-validation, json.dumps) with the FAST_JSON path
+(raw Motor documents straight into orjson) for 10, 1k and 10k projects.
+
+    cd backend && python benchmarks/bench_serialization.py [--repeat 20]
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.portfolio import Project  # noqa: E402
+from routes.portfolio import _orjson_default, object_id_str  # noqa: E402
+
+import orjson  # noqa: E402
+
+SIZES = [10, 1_000, 10_000]
+project_list = TypeAdapter(List[Project])
+
+
+def make_documents(n: int) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "title": {"pt": f"Projeto {i}", "en": f"Project {i}"},
+            "description": {
+                "pt": "Aplicação fullstack com Java, Spring Boot e React " * 3,
+                "en": "Fullstack application with Java, Spring Boot and React " * 3,
+            },
+            "technologies": ["Java", "Spring Boot", "MongoDB", "React"],
+            "github_url": f"https://github.com/gomesdev1/project-{i}",
+            "status": "active",
+            "featured": i % 5 == 0,
+            "order": i,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+def default_path(documents: List[dict]) -> bytes:
+    models = [Project(**object_id_str(document)) for document in documents]
+    # What FastAPI does with the returned models for response_model=List[Project]
+    content = [model.model_dump(by_alias=True) for model in models]
+    validated = project_list.validate_python(content)
+    data = project_list.dump_python(validated, mode="json", by_alias=True)
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(documents: List[dict]) -> bytes:
+    return orjson.dumps(documents, default=_orjson_default)
+
+
+def measure(fn, n: int, repeat: int) -> float:
+    """Best-of-`repeat` CPU seconds for one request of n documents"""
+    best = float("inf")
+    for _ in range(repeat):
+        documents = make_documents(n)
+        start = time.process_time()
+        fn(documents)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'docs':>8} {'default ms':>12} {'fast ms':>10} {'speedup':>8}")
+    for n in SIZES:
+        repeat = max(3, args.repeat if n < 10_000 else args.repeat // 4)
+        default_s = measure(default_path, n, repeat)
+        fast_s = measure(fast_path, n, repeat)
+        print(f"{n:>8} {default_s * 1000:>12.3f} {fast_s * 1000:>10.3f} {default_s / fast_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Worker startup time: imports, lifespan warm-up and the first responses.
+
+Every run is a fresh interpreter, as a new worker would be. Each run times:
+
+    import_ms          `import server`
+    startup_ms         the lifespan startup (connect, indexes, cache warm-up)
+    first_ms           the first GET /api/portfolio after startup
+    second_ms          the same request again
+    to_first_ms        import + startup + first response
+
+with CACHE_PREWARM on and off, and reports the median of --runs runs. The
+data is seeded between the import and the startup and is not timed.
+
+    cd backend
+    python benchmarks/bench_startup.py --backend mongomock --runs 5
+    python benchmarks/bench_startup.py --backend mongomock --importtime   # slowest imports too
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TIMINGS = ["import_ms", "startup_ms", "first_ms", "second_ms", "to_first_ms"]
+
+
+async def child(backend: str, scale: int) -> dict:
+    started = time.perf_counter()
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server  # noqa: F401
+    imported = time.perf_counter()
+
+    import httpx
+    from run_load import connect, seed
+
+    from database import mongo
+
+    connect(backend)
+    await seed(mongo.db, scale)
+
+    app = server.app
+    timings = {"import_ms": (imported - started) * 1000}
+    lifespan_started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        timings["startup_ms"] = (time.perf_counter() - lifespan_started) * 1000
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in ("first_ms", "second_ms"):
+                request_started = time.perf_counter()
+                response = await client.get("/api/portfolio")
+                response.raise_for_status()
+                timings[name] = (time.perf_counter() - request_started) * 1000
+    timings["to_first_ms"] = timings["import_ms"] + timings["startup_ms"] + timings["first_ms"]
+    return timings
+
+
+def run(args, prewarm: str) -> dict:
+    env = {**os.environ, "CACHE_PREWARM": prewarm}
+    command = [sys.executable, __file__, "--child", "--backend", args.backend, "--scale", str(args.scale)]
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(command, env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return {name: round(statistics.median(r[name] for r in runs), 3) for name in TIMINGS}
+
+
+def slowest_imports(limit: int) -> None:
+    """The modules with the largest cumulative import time, from -X importtime"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative), int(own), name.strip()))
+    print(f"\n{'cumulative ms':>14} {'self ms':>8}  module")
+    for cumulative, own, name in sorted(rows, reverse=True)[:limit]:
+        print(f"{cumulative / 1000:>14.1f} {own / 1000:>8.1f}  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["mongod", "mongomock"], default="mongod")
+    parser.add_argument("--scale", type=int, default=100, help="skills, projects and status checks to seed")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true", help="also list the slowest imports of `import server`")
+    parser.add_argument("--output", "-o", type=Path, help="write the results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend == "mongomock":
+        # Change streams need a replica set; mongomock has neither
+        os.environ.setdefault("CACHE_SYNC_MODE", "poll")
+        os.environ.setdefault("MONGO_URL", "mongodb://mongomock")
+        os.environ.setdefault("DB_NAME", "portfolio_bench")
+
+    if args.child:
+        print(json.dumps(asyncio.run(child(args.backend, args.scale))))
+        return
+
+    results = {}
+    print(f"{'prewarm':>8} " + " ".join(f"{name:>12}" for name in TIMINGS))
+    for prewarm in ("on", "off"):
+        results[prewarm] = run(args, prewarm)
+        print(f"{prewarm:>8} " + " ".join(f"{results[prewarm][name]:>12.1f}" for name in TIMINGS))
+    if args.importtime:
+        slowest_imports(15)
+    if args.output:
+        args.output.write_text(json.dumps({"backend": args.backend, "scale": args.scale, "results": results}, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Multi-tenant scaling: memory and latency from 1 to 10,000 tenants on one worker.
+
+Every tenant count runs in a fresh interpreter with TENANCY=host. Each tenant
+gets its own copy of the seed data, then --requests GET /api/portfolio are
+spread over the tenants by a Zipf distribution (a few busy portfolios, a long
+tail of rarely visited ones), selected with the Host header. Each run reports:
+
+    p50_ms / p99_ms      latency over all requests
+    rss_mb               resident memory after the run
+    serve_rss_mb         growth of resident memory while serving (the seeded
+                         data is excluded: with mongomock it lives in-process)
+    cache_tenants        tenants with snapshots in the cache (TENANT_CACHE_MAX_TENANTS)
+    cache_mb             cached response bodies (TENANT_CACHE_MAX_MB)
+    evictions            cold tenants whose snapshots were dropped
+    hit_ratio            snapshot cache hits / lookups
+
+With the cache bounded, cache_mb, serve_rss_mb and p99 level off once the
+tenant count passes TENANT_CACHE_MAX_TENANTS instead of growing with it.
+
+    cd backend
+    python benchmarks/bench_tenants.py --backend mongomock --tenants 1 10 100 1000
+    TENANT_CACHE_MAX_TENANTS=100 python benchmarks/bench_tenants.py --backend mongod
+
+--backend mongod reseeds the DB_NAME database from MONGO_URL: point it at a
+scratch database. It is the one to trust for latency; mongomock keeps every
+tenant's documents in the benchmark process and scans them on each query.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+HOST_SUFFIX = ".bench.local"
+COLUMNS = ["p50_ms", "p99_ms", "rss_mb", "serve_rss_mb", "cache_tenants", "cache_mb", "evictions", "hit_ratio"]
+
+
+def rss_mb() -> float:
+    """Resident set size of this process (Linux)"""
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+async def seed_tenants(db, tenants: int) -> None:
+    from seed_data import COLLECTIONS, build_seed_documents
+    from tenancy import TENANT_FIELD
+
+    template = build_seed_documents()
+    await asyncio.gather(*(db[name].delete_many({}) for name in COLLECTIONS))
+    for name in COLLECTIONS:
+        documents = [
+            {**document, TENANT_FIELD: f"t{tenant}"}
+            for tenant in range(tenants) for document in template[name]
+        ]
+        for start in range(0, len(documents), 5_000):
+            await db[name].insert_many(documents[start:start + 5_000], ordered=False)
+
+
+async def child(args) -> dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    import httpx
+
+    from database import mongo
+    from run_load import connect, percentiles
+    from server import app, portfolio_cache
+
+    connect(args.backend)
+    await seed_tenants(mongo.db, args.tenant_count)
+
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) ** args.zipf for rank in range(args.tenant_count)]
+    picks = rng.choices(range(args.tenant_count), weights, k=args.warmup + args.requests)
+    latencies = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def call(tenant: int):
+                response = await client.get("/api/portfolio", headers={"host": f"t{tenant}{HOST_SUFFIX}"})
+                response.raise_for_status()
+
+            for tenant in picks[:args.warmup]:
+                await call(tenant)
+            before = rss_mb()
+            queue = iter(picks[args.warmup:])
+
+            async def worker():
+                for tenant in queue:
+                    started = time.perf_counter()
+                    await call(tenant)
+                    latencies.append(time.perf_counter() - started)
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            after = rss_mb()
+            stats = portfolio_cache.stats()
+    timings = percentiles(latencies)
+    return {
+        "p50_ms": timings["p50_ms"],
+        "p99_ms": timings["p99_ms"],
+        "rss_mb": round(after, 1),
+        "serve_rss_mb": round(after - before, 1),
+        "cache_tenants": stats["tenants"],
+        "cache_mb": round(stats["bytes"] / (1024 * 1024), 2),
+        "evictions": stats["evictions"],
+        "hit_ratio": stats["hit_ratio"],
+    }
+
+
+def run(args, tenants: int) -> dict:
+    command = [
+        sys.executable, __file__, "--child", "--backend", args.backend, "--tenant-count", str(tenants),
+        "--requests", str(args.requests), "--warmup", str(args.warmup),
+        "--concurrency", str(args.concurrency), "--zipf", str(args.zipf),
+    ]
+    output = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["mongod", "mongomock"], default="mongod")
+    parser.add_argument("--tenants", type=int, nargs="+", default=[1, 10, 100, 1_000, 10_000])
+    parser.add_argument("--requests", "-n", type=int, default=5_000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--concurrency", "-c", type=int, default=16)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of tenant popularity")
+    parser.add_argument("--output", "-o", type=Path, help="write the results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--tenant-count", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Read by the child at import; inherited through the environment
+    os.environ["TENANCY"] = "host"
+    os.environ["TENANT_HOST_SUFFIX"] = HOST_SUFFIX
+    # Every request comes from one client: per-client limits would measure nothing else
+    os.environ.setdefault("RATE_LIMIT_WRITES_PER_SECOND", "0")
+    os.environ.setdefault("RATE_LIMIT_STATUS_PER_SECOND", "0")
+    if args.backend == "mongomock":
+        # Change streams need a replica set; mongomock has neither
+        os.environ.setdefault("CACHE_SYNC_MODE", "poll")
+        os.environ.setdefault("MONGO_URL", "mongodb://mongomock")
+        os.environ.setdefault("DB_NAME", "portfolio_bench")
+
+    if args.child:
+        print(json.dumps(asyncio.run(child(args))))
+        return
+
+    results = {}
+    print(f"{'tenants':>8} " + " ".join(f"{name:>13}" for name in COLUMNS))
+    for tenants in args.tenants:
+        results[tenants] = run(args, tenants)
+        print(f"{tenants:>8} " + " ".join(f"{results[tenants][name]:>13}" for name in COLUMNS))
+    if args.output:
+        settings = {name: os.environ[name] for name in sorted(os.environ) if name.startswith("TENANT")}
+        args.output.write_text(json.dumps({"backend": args.backend, "env": settings, "results": results}, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
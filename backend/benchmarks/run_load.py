@@ -0,0 +1,428 @@
+"""Load test for the API at fixed concurrency.
+
+Starts the FastAPI app (lifespan included) against a local mongod or an
+in-memory mongomock-motor database, seeds it from seed_data.py scaled up to
+--scale skills, projects and status checks, then drives every scenario through
+httpx's ASGI transport and reports RPS and latency percentiles. Results are
+written as JSON so runs can be compared across commits:
+
+    cd backend
+    python benchmarks/run_load.py --backend mongomock --scale 1000 -o before.json
+    python benchmarks/run_load.py --backend mongomock --scale 1000 -o after.json --baseline before.json
+
+The *_under_* scenarios measure reads while other clients saturate a write
+path; run them with ADMISSION_CONTROL=off and on to see what shedding buys:
+
+    ADMISSION_CONTROL=off python benchmarks/run_load.py --backend mongomock -s skills_under_writes
+
+In process, the load generator would share the app's event loop and the
+reads would queue behind its own writer coroutines. So these scenarios serve
+the app with uvicorn in a child process, over real HTTP, and run the writers
+in a second child process: only the measured reads share this one. Each
+reports the same reads without the write load first ("unloaded").
+
+--backend mongod uses MONGO_URL from the environment or .env; the DB_NAME
+database is reseeded, so point it at a scratch database. --backend mongomock
+needs mongomock-motor and measures the API's own overhead, not MongoDB's.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# httpx logs every request at INFO: thousands of lines per scenario (the
+# startup and tenant benchmarks import this module and get the same)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Scenario -> (method, url, JSON body factory). Factories get the request
+# number and the seeded ids, so writes touch real documents.
+Scenario = Tuple[str, Callable[[int, Dict[str, List[str]]], str], Optional[Callable[[int, Dict[str, List[str]]], dict]]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "portfolio": ("GET", lambda i, ids: "/api/portfolio", None),
+    "portfolio_lang": ("GET", lambda i, ids: "/api/portfolio?lang=en", None),
+    "skills": ("GET", lambda i, ids: "/api/skills", None),
+    "projects": ("GET", lambda i, ids: "/api/projects", None),
+    "projects_page": ("GET", lambda i, ids: "/api/projects?limit=50", None),
+    "featured_projects": ("GET", lambda i, ids: "/api/projects/featured", None),
+    "status_list": ("GET", lambda i, ids: "/api/status?limit=100", None),
+    "status_post": ("POST", lambda i, ids: "/api/status", lambda i, ids: {"client_name": f"load-{i % 8}"}),
+    "skill_create": ("POST", lambda i, ids: "/api/skills", lambda i, ids: {
+        "category": {"pt": f"Categoria {i}", "en": f"Category {i}"},
+        "technologies": ["Python", "FastAPI"],
+        "order": 100_000 + i,
+    }),
+    "project_update": (
+        "PUT",
+        lambda i, ids: f"/api/projects/{ids['projects'][i % len(ids['projects'])]}",
+        lambda i, ids: {"order": i},
+    ),
+}
+# Scenario -> (measured scenario, background scenario): the first is measured
+# while --background-concurrency workers keep running the second, e.g. cached
+# reads while the write path is saturated. Compare ADMISSION_CONTROL=on/off.
+# The writes leave the measured snapshot alone, so the reads stay cache hits.
+MIXED_SCENARIOS: Dict[str, Tuple[str, str]] = {
+    "skills_under_writes": ("skills", "project_update"),
+    "portfolio_under_status_posts": ("portfolio", "status_post"),
+}
+DEFAULT_SCENARIOS = [*SCENARIOS, *MIXED_SCENARIOS]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def scaled_documents(template: dict, count: int, start: int, vary: Callable[[dict, int], None]) -> List[dict]:
+    documents = []
+    for i in range(start, start + count):
+        document = {key: value for key, value in template.items() if key != "_id"}
+        vary(document, i)
+        documents.append(document)
+    return documents
+
+
+def _vary_skill(document: dict, i: int) -> None:
+    document["category"] = {"pt": f"Categoria {i}", "en": f"Category {i}"}
+    document["order"] = i
+
+
+def _vary_project(document: dict, i: int) -> None:
+    document["title"] = {"pt": f"Projeto {i}", "en": f"Project {i}"}
+    document["featured"] = i % 10 == 0
+    document["order"] = i
+
+
+async def insert_batched(collection, documents: List[dict], batch_size: int = 5_000) -> None:
+    for start in range(0, len(documents), batch_size):
+        await collection.insert_many(documents[start:start + batch_size], ordered=False)
+
+
+async def seed(db, scale: int) -> Dict[str, List[str]]:
+    """Seed data plus (scale - seeded) skills and projects and `scale` status checks"""
+    from seed_data import seed_database
+
+    await seed_database(db)
+    await db.status_checks.delete_many({})
+    for name, vary in (("skills", _vary_skill), ("projects", _vary_project)):
+        template = await db[name].find_one({})
+        existing = await db[name].count_documents({})
+        if template and scale > existing:
+            await insert_batched(db[name], scaled_documents(template, scale - existing, existing + 1, vary))
+
+    now = datetime.utcnow()
+    await insert_batched(db.status_checks, [
+        {"id": f"seed-{i}", "client_name": f"client-{i % 8}", "timestamp": now - timedelta(seconds=scale - i)}
+        for i in range(scale)
+    ])
+    projects = await db.projects.find({}, {"_id": 1}).limit(1_000).to_list(length=1_000)
+    return {"projects": [str(project["_id"]) for project in projects]}
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    if len(latencies) < 2:
+        value = latencies[0] * 1000 if latencies else 0.0
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value, "mean_ms": value, "max_ms": value}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+    }
+
+
+async def saturate(client, scenario: Scenario, ids, concurrency: int, done: asyncio.Event) -> Dict[str, int]:
+    """Run scenario from `concurrency` workers until done is set; returns the status counts"""
+    method, url, body = scenario
+    statuses: Dict[str, int] = {}
+    counter = iter(range(10**9))
+
+    async def worker():
+        for i in counter:
+            if done.is_set():
+                return
+            response = await client.request(method, url(i, ids), json=body(i, ids) if body else None)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            # A request that never waits on I/O (mongomock, an immediate 503)
+            # would otherwise keep the loop from the measured workers
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return dict(sorted(statuses.items()))
+
+
+async def saturate_process(args) -> None:
+    """Child process: run --background against --saturate until SIGTERM, then print the status counts"""
+    import httpx
+
+    ids = json.loads(sys.stdin.readline())
+    done = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, done.set)
+    limits = httpx.Limits(max_connections=args.background_concurrency)
+    async with httpx.AsyncClient(base_url=args.saturate, timeout=60, limits=limits) as client:
+        statuses = await saturate(client, SCENARIOS[args.background], ids, args.background_concurrency, done)
+    print(json.dumps(statuses), flush=True)
+
+
+def child_command(*options: str) -> List[str]:
+    return [sys.executable, str(Path(__file__).resolve()), *options]
+
+
+async def run_mixed(client, base_url: str, name: str, ids, args) -> dict:
+    measured, background = MIXED_SCENARIOS[name]
+    unloaded = await run_scenario(client, SCENARIOS[measured], ids, args.requests, args.concurrency, args.warmup)
+    load = await asyncio.create_subprocess_exec(
+        *child_command("--saturate", base_url, "--background", background,
+                       "--background-concurrency", str(args.background_concurrency)),
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, cwd=BACKEND_DIR,
+    )
+    load.stdin.write(json.dumps(ids).encode() + b"\n")
+    load.stdin.close()
+    try:
+        # Let the writers fill the write path before measuring
+        await asyncio.sleep(args.ramp_up)
+        result = await run_scenario(client, SCENARIOS[measured], ids, args.requests, args.concurrency, 0)
+    finally:
+        load.terminate()
+        output, _ = await load.communicate()
+    lines = output.decode().strip().splitlines()
+    return {
+        **result,
+        "unloaded": {key: unloaded[key] for key in ("rps", "p50_ms", "p95_ms", "p99_ms")},
+        "background": {"scenario": background, "statuses": json.loads(lines[-1]) if lines else {}},
+    }
+
+
+async def run_scenario(client, scenario: Scenario, ids, requests: int, concurrency: int, warmup: int) -> dict:
+    method, url, body = scenario
+
+    async def call(i: int):
+        return await client.request(method, url(i, ids), json=body(i, ids) if body else None)
+
+    for i in range(warmup):
+        await call(i)
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    counter = iter(range(warmup, warmup + requests))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            response = await call(i)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        **percentiles(latencies),
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def connect(backend: str) -> None:
+    from database import mongo
+
+    if backend == "mongomock":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--backend mongomock needs mongomock-motor: pip install mongomock-motor")
+        mongo.connect(client=AsyncMongoMockClient())
+    else:
+        mongo.connect()
+
+
+async def serve(args) -> None:
+    """Child process: seed, serve the app with uvicorn on --serve, print the seeded ids once ready"""
+    import uvicorn
+
+    from database import mongo
+    from server import app
+
+    connect(args.backend)
+    ids = await seed(mongo.db, args.scale)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.serve, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            await task
+            raise SystemExit("uvicorn did not start")
+        await asyncio.sleep(0.05)
+    # seed() prints its progress to stdout too: tag the line served() waits for
+    print("ids", json.dumps(ids), flush=True)
+    await task
+
+
+@asynccontextmanager
+async def served(args):
+    """The app behind uvicorn in a child process: yields its base URL and seeded ids"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = await asyncio.create_subprocess_exec(
+        *child_command("--serve", str(port), "--backend", args.backend, "--scale", str(args.scale)),
+        stdout=asyncio.subprocess.PIPE, cwd=BACKEND_DIR,
+    )
+    try:
+        while True:
+            line = await server.stdout.readline()
+            if not line:
+                raise SystemExit("The uvicorn child process exited before serving")
+            if line.startswith(b"ids "):
+                break
+        yield f"http://127.0.0.1:{port}", json.loads(line[4:])
+    finally:
+        server.terminate()
+        await server.wait()
+
+
+def print_result(name: str, result: dict) -> None:
+    print(
+        f"{name:>18} {result['rps']:>9.1f} rps  p50 {result['p50_ms']:>8.2f}  "
+        f"p95 {result['p95_ms']:>8.2f}  p99 {result['p99_ms']:>8.2f} ms  errors {result['errors']}"
+    )
+    if "unloaded" in result:
+        unloaded = result["unloaded"]
+        print(f"{'':>18} unloaded {unloaded['rps']:>9.1f} rps  p50 {unloaded['p50_ms']:>8.2f}  p99 {unloaded['p99_ms']:>8.2f} ms")
+    if "background" in result:
+        print(f"{'':>18} background {result['background']['scenario']}: {result['background']['statuses']}")
+
+
+async def main(args) -> dict:
+    import httpx
+
+    from database import mongo
+    from server import app
+
+    results = {}
+    scenarios = [name for name in args.scenario if name not in MIXED_SCENARIOS]
+    if scenarios:
+        connect(args.backend)
+        ids = await seed(mongo.db, args.scale)
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for name in scenarios:
+                    results[name] = await run_scenario(
+                        client, SCENARIOS[name], ids, args.requests, args.concurrency, args.warmup
+                    )
+                    print_result(name, results[name])
+
+    mixed = [name for name in args.scenario if name in MIXED_SCENARIOS]
+    if mixed:
+        async with served(args) as (base_url, ids):
+            async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+                for name in mixed:
+                    results[name] = await run_mixed(client, base_url, name, ids, args)
+                    print_result(name, results[name])
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "backend": args.backend,
+            "scale": args.scale,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "env": {name: os.environ[name] for name in sorted(os.environ) if name in SETTINGS},
+        },
+        "results": results,
+    }
+
+
+# Settings worth recording with a run, since they change what is measured
+SETTINGS = {
+    "FAST_JSON", "CACHE_TTL_SECONDS", "CACHE_SYNC_MODE", "STATUS_INGEST_MODE", "STATUS_BATCH_SIZE",
+    "MONGO_MAX_POOL_SIZE", "MONGO_READ_PREFERENCE", "METRICS_ENABLED", "SERVER_TIMING",
+    "ADMISSION_CONTROL", "RATE_LIMIT_WRITES_PER_SECOND", "RATE_LIMIT_STATUS_PER_SECOND",
+}
+
+
+def compare(report: dict, baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())
+    print(f"\nvs {baseline_path} ({baseline['meta'].get('commit')}):")
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        rps_change = (result["rps"] / before["rps"] - 1) * 100 if before["rps"] else 0.0
+        p95_change = (result["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        print(f"{name:>18} rps {rps_change:>+7.1f}%  p95 {p95_change:>+7.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["mongod", "mongomock"], default="mongod")
+    parser.add_argument("--scale", type=int, default=100, help="skills, projects and status checks to seed (10-100000)")
+    parser.add_argument("--concurrency", "-c", type=int, default=16)
+    parser.add_argument("--requests", "-n", type=int, default=2_000, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--background-concurrency", type=int, default=64,
+                        help="workers running the background scenario of the *_under_* scenarios")
+    parser.add_argument("--ramp-up", type=float, default=1.0,
+                        help="seconds of background load before the *_under_* reads are measured")
+    parser.add_argument("--scenario", "-s", action="append", choices=DEFAULT_SCENARIOS,
+                        help="scenario to run, repeatable (default: all)")
+    parser.add_argument("--output", "-o", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="earlier JSON results to compare against")
+    # Child processes of the *_under_* scenarios
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--saturate", help=argparse.SUPPRESS)
+    parser.add_argument("--background", choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.scenario = args.scenario or DEFAULT_SCENARIOS
+
+    if args.backend == "mongomock":
+        # Change streams need a replica set; mongomock has neither
+        os.environ.setdefault("CACHE_SYNC_MODE", "poll")
+        os.environ.setdefault("MONGO_URL", "mongodb://mongomock")
+        os.environ.setdefault("DB_NAME", "portfolio_bench")
+    # Every request comes from one client here: per-client rate limits would
+    # turn most writes into 429s and measure nothing else
+    os.environ.setdefault("RATE_LIMIT_WRITES_PER_SECOND", "0")
+    os.environ.setdefault("RATE_LIMIT_STATUS_PER_SECOND", "0")
+
+    if args.serve:
+        asyncio.run(serve(args))
+        sys.exit()
+    if args.saturate:
+        asyncio.run(saturate_process(args))
+        sys.exit()
+
+    report = asyncio.run(main(args))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        compare(report, args.baseline)
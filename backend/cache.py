@@ -0,0 +1,287 @@
+"""In-process snapshot cache for portfolio reads.
+
+Every cached entry is an immutable, already serialized response body tagged with
+the version of each collection it was built from. Write handlers bump the
+version of the collection they touched, which makes every dependent snapshot
+(including the /portfolio aggregate) stale on the next read. A TTL bounds how
+long a snapshot can survive edits made outside the API, such as seed_data.py.
+
+Each snapshot carries a strong ETag (a hash of its body), so conditional
+requests for a cached key are answered without touching the database, and
+keeps its compressed bodies (see compression.py) next to the raw one.
+
+A snapshot that is no longer current can still be served for `stale` more
+seconds past its TTL (stale-while-revalidate) while one refresh runs, unless
+it predates a write made through this worker: `invalidate()` from the write
+path forces a fresh load, so a client always reads its own writes. Only
+expiry and invalidations from other workers (`stale_ok=True`, CacheSync)
+leave the old snapshot servable.
+
+With tenancy on (tenancy.py), `TenantCaches` keeps one SnapshotCache per
+tenant, evicting the least recently used tenants' caches past a tenant count
+or a byte budget. Each tenant's ETags are hashed with the tenant id, so equal
+bodies of two tenants never share an ETag.
+"""
+import hashlib
+import itertools
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+from tenancy import TENANCY, current_tenant
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    body: bytes
+    versions: Tuple[int, ...]
+    created_at: float
+    etag: str
+    # Content coding -> compressed body, filled on first request for each
+    encoded: Dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+
+
+def make_etag(body: bytes, namespace: Optional[str] = None) -> str:
+    digest = hashlib.blake2b(body, digest_size=16)
+    if namespace is not None:
+        digest.update(b"\0" + namespace.encode("utf-8"))
+    return '"%s"' % digest.hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against a strong ETag (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+# Distinguishes the versions of successive caches of one tenant, so a load that
+# read its versions before an eviction can't store into the tenant's next cache
+_epochs = itertools.count()
+
+
+class SnapshotCache:
+    def __init__(self, ttl: float, stale: float = 0.0, namespace: Optional[str] = None):
+        self.ttl = ttl
+        self.stale = stale
+        self.namespace = namespace
+        self.epoch = next(_epochs)
+        self._entries: Dict[Hashable, Snapshot] = {}
+        self._versions: Dict[str, int] = {}
+        # Version of each collection at its last local write: older snapshots are never served stale
+        self._fresh_from: Dict[str, int] = {}
+        # Bytes of the uncompressed bodies held
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_served = 0
+        # 304s answered straight from a current snapshot vs. after re-running the queries
+        self.not_modified_cached = 0
+        self.not_modified_queried = 0
+
+    def versions(self, collections: Iterable[str]) -> Tuple[int, ...]:
+        """This cache's epoch, then the current version of each collection, in the given order"""
+        return (self.epoch, *(self._versions.get(name, 0) for name in collections))
+
+    def get(self, key: Hashable, collections: Iterable[str]) -> Optional[Snapshot]:
+        """Return the snapshot for key if it is still current, else None"""
+        snapshot = self._entries.get(key)
+        if (
+            snapshot is None
+            or snapshot.versions != self.versions(collections)
+            or time.monotonic() - snapshot.created_at > self.ttl
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return snapshot
+
+    def get_stale(self, key: Hashable, collections: Iterable[str]) -> Optional[Snapshot]:
+        """Return the last snapshot for key if it may still be served while refreshing"""
+        if not self.stale:
+            return None
+        snapshot = self._entries.get(key)
+        if snapshot is None or time.monotonic() - snapshot.created_at > self.ttl + self.stale:
+            return None
+        if any(
+            version < self._fresh_from.get(name, 0)
+            for name, version in zip(collections, snapshot.versions[1:])
+        ):
+            return None
+        self.stale_served += 1
+        return snapshot
+
+    def put(self, key: Hashable, versions: Tuple[int, ...], body: bytes) -> Snapshot:
+        """Store body under key.
+
+        `versions` must be read *before* querying the database, so a write that
+        lands while the query runs leaves the stored snapshot already stale.
+        """
+        snapshot = Snapshot(
+            body=body,
+            versions=versions,
+            created_at=time.monotonic(),
+            etag=make_etag(body, self.namespace),
+        )
+        previous = self._entries.get(key)
+        self.size += len(body) - (len(previous.body) if previous is not None else 0)
+        self._entries[key] = snapshot
+        return snapshot
+
+    def invalidate(self, *collections: str, stale_ok: bool = False) -> None:
+        """Bump the version of each collection, staling every dependent snapshot.
+
+        Unless `stale_ok`, the dependent snapshots may not be served stale either.
+        """
+        for name in collections:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            if not stale_ok:
+                self._fresh_from[name] = self._versions[name]
+        self.invalidations += 1
+
+    def record_not_modified(self, from_cache: bool) -> None:
+        if from_cache:
+            self.not_modified_cached += 1
+        else:
+            self.not_modified_queried += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "stale_served": self.stale_served,
+            "not_modified": {
+                "without_query": self.not_modified_cached,
+                "after_query": self.not_modified_queried,
+            },
+            "versions": dict(self._versions),
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale,
+        }
+
+
+# Counters summed across tenants in TenantCaches.stats()
+COUNTERS = ("hits", "misses", "invalidations", "stale_served", "not_modified_cached", "not_modified_queried")
+
+
+class TenantCaches:
+    """One SnapshotCache per tenant, the least recently used evicted first.
+
+    Same interface as SnapshotCache, applied to the current tenant's cache.
+    `invalidate()` with a tenant set only touches that tenant's cache, if it
+    has one; outside a request or tenant_context() (scripts, CacheSync for
+    changes it can't trace back to a tenant) it reaches every tenant.
+    """
+
+    def __init__(self, ttl: float, stale: float = 0.0, max_tenants: int = 1000, max_bytes: int = 256 * 1024 * 1024):
+        self.ttl = ttl
+        self.stale = stale
+        self.max_tenants = max_tenants
+        self.max_bytes = max_bytes
+        self._caches: "OrderedDict[Optional[str], SnapshotCache]" = OrderedDict()
+        self.size = 0
+        self.evictions = 0
+        # Counters of evicted caches, so the totals don't go backwards
+        self._retired = dict.fromkeys(COUNTERS, 0)
+
+    def _current(self) -> SnapshotCache:
+        tenant = current_tenant()
+        cache = self._caches.get(tenant)
+        if cache is None:
+            cache = self._caches[tenant] = SnapshotCache(self.ttl, self.stale, namespace=tenant)
+            self._evict()
+        else:
+            self._caches.move_to_end(tenant)
+        return cache
+
+    def _evict(self) -> None:
+        # The most recent cache, the one being used, is never evicted
+        while len(self._caches) > 1 and (len(self._caches) > self.max_tenants or self.size > self.max_bytes):
+            _, cache = self._caches.popitem(last=False)
+            self.size -= cache.size
+            self.evictions += 1
+            for name in COUNTERS:
+                self._retired[name] += getattr(cache, name)
+
+    def versions(self, collections: Iterable[str]) -> Tuple[int, ...]:
+        return self._current().versions(collections)
+
+    def get(self, key: Hashable, collections: Iterable[str]) -> Optional[Snapshot]:
+        return self._current().get(key, collections)
+
+    def get_stale(self, key: Hashable, collections: Iterable[str]) -> Optional[Snapshot]:
+        return self._current().get_stale(key, collections)
+
+    def put(self, key: Hashable, versions: Tuple[int, ...], body: bytes) -> Snapshot:
+        cache = self._current()
+        before = cache.size
+        snapshot = cache.put(key, versions, body)
+        self.size += cache.size - before
+        self._evict()
+        return snapshot
+
+    def invalidate(self, *collections: str, stale_ok: bool = False) -> None:
+        tenant = current_tenant()
+        if TENANCY != "off" and tenant is None:
+            for cache in self._caches.values():
+                cache.invalidate(*collections, stale_ok=stale_ok)
+            return
+        # A tenant without a cache has nothing to invalidate: don't allocate one
+        # (or refresh its place in the LRU order) for a write
+        cache = self._caches.get(tenant)
+        if cache is not None:
+            cache.invalidate(*collections, stale_ok=stale_ok)
+
+    def record_not_modified(self, from_cache: bool) -> None:
+        self._current().record_not_modified(from_cache)
+
+    def clear(self) -> None:
+        self._caches.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        totals = dict(self._retired)
+        for cache in self._caches.values():
+            for name in COUNTERS:
+                totals[name] += getattr(cache, name)
+        lookups = totals["hits"] + totals["misses"]
+        current = self._caches.get(current_tenant())
+        return {
+            "entries": sum(len(cache._entries) for cache in self._caches.values()),
+            "bytes": self.size,
+            "hits": totals["hits"],
+            "misses": totals["misses"],
+            "hit_ratio": round(totals["hits"] / lookups, 4) if lookups else 0.0,
+            "invalidations": totals["invalidations"],
+            "stale_served": totals["stale_served"],
+            "not_modified": {
+                "without_query": totals["not_modified_cached"],
+                "after_query": totals["not_modified_queried"],
+            },
+            "versions": dict(current._versions) if current is not None else {},
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale,
+            "tenants": len(self._caches),
+            "evictions": self.evictions,
+            "max_tenants": self.max_tenants,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,206 @@
+"""Cross-worker coherence for the snapshot cache.
+
+Each uvicorn worker owns its own SnapshotCache, so a write handled by one worker
+leaves the others serving old snapshots until their TTL expires. CacheSync runs
+in the background of every worker and invalidates the local cache when any
+watched collection changes, wherever the write came from:
+
+- On a replica set (or sharded cluster) it follows a database change stream,
+  resuming from the last seen token after a disconnect.
+- On a standalone mongod, where change streams are unavailable, it polls the
+  newest `updated_at` (or `timestamp`) and the document count of each collection.
+
+With TENANCY on, a change event carrying the written document (inserts,
+replaces, updates through `updateLookup`) invalidates only its tenant's
+snapshots. Deletes, drops and every change found by polling can't be traced
+back to a tenant and invalidate all of them.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from tenancy import TENANCY, TENANT_FIELD, tenant_context
+
+logger = logging.getLogger(__name__)
+
+# Server error codes meaning "change streams are not available here"
+CHANGE_STREAM_UNSUPPORTED = {
+    40573,  # The $changeStream stage is only supported on replica sets
+    40324,  # Unrecognized pipeline stage name (very old servers)
+    303,    # Command not supported by this storage engine / topology
+}
+# The resume token fell off the oplog, so the stream cannot pick up where it left
+CHANGE_STREAM_HISTORY_LOST = {286, 280}
+
+# Field holding the last modification time of each watched collection
+DEFAULT_TIMESTAMP_FIELDS = {
+    "personal_info": "updated_at",
+    "skills": "updated_at",
+    "education": "updated_at",
+    "projects": "updated_at",
+    "goals": "updated_at",
+    "current_learning": "updated_at",
+    "status_checks": "timestamp",
+}
+
+
+class CacheSync:
+    def __init__(
+        self,
+        cache,
+        collections: Iterable[str] = tuple(DEFAULT_TIMESTAMP_FIELDS),
+        mode: str = "auto",
+        poll_interval: float = 5.0,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 30.0,
+    ):
+        self.db = None
+        self.cache = cache
+        self.collections = list(collections)
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.active_mode: Optional[str] = None
+        self.resume_token = None
+        self.events = 0
+        self.reconnects = 0
+        self._signatures: Dict[str, Tuple] = {}
+        # Called with the names of the collections invalidated, after the cache
+        # (e.g. TechnologyIndex.refresh, see server.py)
+        self.listeners: List[Callable[..., None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db) -> None:
+        if self.mode == "off" or self._task is not None:
+            return
+        self.db = db
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # _run logs its own failures; stopping must never fail the shutdown
+            logger.exception("Cache sync task ended with an error")
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.active_mode,
+            "events": self.events,
+            "reconnects": self.reconnects,
+        }
+
+    async def _run(self) -> None:
+        if self.mode == "poll":
+            await self._poll_forever()
+            return
+
+        delay = self.retry_delay
+        while True:
+            try:
+                await self._watch()
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAM_UNSUPPORTED and self.mode == "auto":
+                    logger.info("Change streams unavailable (%s), polling every %ss", e, self.poll_interval)
+                    await self._poll_forever()
+                    return
+                if e.code in CHANGE_STREAM_HISTORY_LOST:
+                    # Whatever happened while we were away is unknown: drop it all
+                    logger.warning("Change stream history lost, invalidating all snapshots")
+                    self.resume_token = None
+                    self._invalidate_all()
+                else:
+                    logger.warning("Change stream failed: %s", e)
+            except PyMongoError as e:
+                logger.warning("Change stream disconnected: %s", e)
+            except Exception:
+                # Retried like a disconnect: the cache must not silently stop syncing
+                logger.exception("Change stream failed unexpectedly")
+            else:
+                # The stream was invalidated (e.g. database dropped)
+                self.resume_token = None
+                self._invalidate_all()
+                delay = self.retry_delay
+                continue
+
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    async def _watch(self) -> None:
+        pipeline = [{"$match": {"$or": [
+            {"ns.coll": {"$in": self.collections}},
+            {"operationType": {"$in": ["dropDatabase", "invalidate"]}},
+        ]}}]
+        # Updates only carry the changed fields: look the document up for its tenant
+        full_document = "updateLookup" if TENANCY != "off" else None
+        async with self.db.watch(pipeline, full_document=full_document, resume_after=self.resume_token) as stream:
+            if self.active_mode != "change_stream":
+                logger.info("Cache sync following change stream on %s", self.db.name)
+            self.active_mode = "change_stream"
+            async for change in stream:
+                self.resume_token = stream.resume_token
+                self._apply(change)
+                if change["operationType"] == "invalidate":
+                    return
+
+    def _apply(self, change: dict) -> None:
+        self.events += 1
+        collection = change.get("ns", {}).get("coll")
+        if collection in self.collections:
+            # None without tenancy, and for deletes (or documents gone by the lookup)
+            tenant = (change.get("fullDocument") or {}).get(TENANT_FIELD)
+            with tenant_context(tenant):
+                self._invalidate(collection)
+        else:
+            self._invalidate_all()
+
+    def _invalidate(self, *collections: str) -> None:
+        # Writes from other workers: serving the previous snapshot while refreshing is fine
+        self.cache.invalidate(*collections, stale_ok=True)
+        for listener in self.listeners:
+            try:
+                listener(*collections)
+            except Exception:
+                logger.exception("Cache sync listener failed")
+
+    def _invalidate_all(self) -> None:
+        self._invalidate(*self.collections)
+
+    async def _poll_forever(self) -> None:
+        self.active_mode = "poll"
+        while True:
+            try:
+                await self.poll_once()
+            except PyMongoError as e:
+                logger.warning("Cache sync poll failed: %s", e)
+            except Exception:
+                logger.exception("Cache sync poll failed unexpectedly")
+            await asyncio.sleep(self.poll_interval)
+
+    async def poll_once(self) -> None:
+        """Invalidate every collection whose newest timestamp or size changed"""
+        signatures = await asyncio.gather(*(self._signature(name) for name in self.collections))
+        for name, signature in zip(self.collections, signatures):
+            previous = self._signatures.get(name)
+            self._signatures[name] = signature
+            if previous is not None and previous != signature:
+                self.events += 1
+                self._invalidate(name)
+
+    async def _signature(self, name: str) -> Tuple:
+        field = DEFAULT_TIMESTAMP_FIELDS.get(name, "updated_at")
+        collection = self.db[name]
+        latest = await collection.find_one({}, {field: 1}, sort=[(field, -1)])
+        # The count catches deletes, which never move the newest timestamp
+        count = await collection.estimated_document_count()
+        return (latest.get(field) if latest else None, count)
@@ -0,0 +1,276 @@
+"""Portfolio data management CLI.
+
+    cd backend
+    python cli.py seed
+    python cli.py seed --tenant alice                # with TENANCY on: alice's portfolio only
+    python cli.py export ./dump                      # one <collection>.ndjson per collection
+    python cli.py export ./dump --format bson -c projects
+    python cli.py import ./dump --key _id --dry-run  # validate and count, write nothing
+    python cli.py import ./dump --key _id            # upsert by _id
+    python cli.py export ./alice --tenant alice      # with TENANCY on: one tenant's documents
+    python cli.py import ./alice --tenant bob --drop # replace bob's documents, stamped as his
+    python cli.py rebuild-rollups --since 2024-01-01 # recompute status_rollups from status_checks
+    python cli.py export-static ./static --html-template ../frontend/public/index.html
+
+Exports stream documents from the cursor to disk, imports stream them from disk
+into unordered bulk writes of --batch-size documents; every collection is
+processed concurrently and the throughput is reported in docs/s.
+
+With TENANCY on, export and import cover every tenant's documents as stored
+unless --tenant scopes them to one; --drop then needs --tenant, so that one
+tenant's import can't empty everyone else's collections. Documents imported
+into a tenant they don't belong to are copies: they get new _ids, since the
+originals keep theirs (and --key _id is refused for them).
+"""
+import asyncio
+import time
+from datetime import datetime
+from enum import Enum
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+import bson
+import typer
+from bson import json_util
+from pymongo import ReplaceOne, UpdateOne
+
+from database import mongo
+from seed_data import COLLECTIONS, seed_database
+from static_export import StaticExporter
+from status_rollup import GRANULARITIES, rebuild_rollups
+from tenancy import TENANCY, TENANT_FIELD, tenant_context
+
+app = typer.Typer(help="Seed, export and import the portfolio collections.")
+
+NDJSON_OPTIONS = json_util.RELAXED_JSON_OPTIONS
+
+
+class FileFormat(str, Enum):
+    ndjson = "ndjson"
+    bson = "bson"
+
+
+def encode(document: dict, file_format: FileFormat) -> bytes:
+    if file_format is FileFormat.bson:
+        return bson.encode(document)
+    return json_util.dumps(document, json_options=NDJSON_OPTIONS).encode("utf-8") + b"\n"
+
+
+def read_documents(path: Path, file_format: FileFormat) -> Iterator[dict]:
+    with open(path, "rb") as source:
+        if file_format is FileFormat.bson:
+            yield from bson.decode_file_iter(source)
+            return
+        for line in source:
+            if line.strip():
+                yield json_util.loads(line, json_options=NDJSON_OPTIONS)
+
+
+def batched(documents: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(documents)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def tenant_filter(tenant: Optional[str]) -> dict:
+    """Query matching one tenant's documents, or every document without a tenant given"""
+    return {TENANT_FIELD: tenant} if tenant else {}
+
+
+def upsert_operation(document: dict, key: str, tenant: Optional[str] = None):
+    """Replace by _id, or update-by-key keeping the stored _id of existing documents"""
+    if key == "_id":
+        return ReplaceOne({"_id": document["_id"], **tenant_filter(tenant)}, document, upsert=True)
+    fields = {name: value for name, value in document.items() if name != "_id"}
+    update = {"$set": fields}
+    if "_id" in document:
+        update["$setOnInsert"] = {"_id": document["_id"]}
+    return UpdateOne({key: document[key], **tenant_filter(tenant)}, update, upsert=True)
+
+
+def report(action: str, name: str, count: int, elapsed: float) -> None:
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    typer.echo(f"{action} {name}: {count} documents in {elapsed:.3f}s ({rate:.0f} docs/s)")
+
+
+async def export_collection(
+    db, name: str, path: Path, file_format: FileFormat, batch_size: int, tenant: Optional[str] = None,
+) -> int:
+    started = time.perf_counter()
+    count = 0
+    with open(path, "wb") as target:
+        async for document in db[name].find(tenant_filter(tenant), batch_size=batch_size):
+            target.write(encode(document, file_format))
+            count += 1
+    report("Exported", name, count, time.perf_counter() - started)
+    return count
+
+
+def retarget(document: dict, tenant: str, key: Optional[str]) -> dict:
+    """Stamp a document as tenant's. Copied from elsewhere (another tenant, or
+    no tenant), it loses its _id: the original still holds that one."""
+    if document.get(TENANT_FIELD) != tenant:
+        if key == "_id":
+            raise typer.BadParameter(
+                f"--key _id can't import documents of another tenant into {tenant!r}: upsert by another key"
+            )
+        document.pop("_id", None)
+    document[TENANT_FIELD] = tenant
+    return document
+
+
+async def import_collection(
+    db, name: str, path: Path, file_format: FileFormat, batch_size: int,
+    key: Optional[str], drop: bool, dry_run: bool, tenant: Optional[str] = None,
+) -> int:
+    started = time.perf_counter()
+    count = 0
+    # Dropped only once the first batch is valid, so a rejected import leaves the collection alone
+    dropping = drop and not dry_run
+    for batch in batched(read_documents(path, file_format), batch_size):
+        if tenant:
+            batch = [retarget(document, tenant, key) for document in batch]
+        if key:
+            missing = [document for document in batch if key not in document]
+            if missing:
+                raise typer.BadParameter(f"{len(missing)} document(s) in {path} have no '{key}' field")
+        if dropping:
+            await db[name].delete_many(tenant_filter(tenant))
+            dropping = False
+        if not dry_run:
+            if key:
+                operations = [upsert_operation(document, key, tenant) for document in batch]
+                await db[name].bulk_write(operations, ordered=False)
+            else:
+                await db[name].insert_many(batch, ordered=False)
+        count += len(batch)
+    if dropping:
+        await db[name].delete_many(tenant_filter(tenant))
+    report("Would import" if dry_run else "Imported", name, count, time.perf_counter() - started)
+    return count
+
+
+async def run_all(jobs) -> int:
+    mongo.connect()
+    try:
+        started = time.perf_counter()
+        counts = await asyncio.gather(*(job(mongo.db) for job in jobs))
+        report("Total", f"{len(counts)} collection(s)", sum(counts), time.perf_counter() - started)
+        return sum(counts)
+    finally:
+        mongo.close()
+
+
+CollectionOption = typer.Option(COLLECTIONS, "--collection", "-c", help="Collection(s) to process")
+FormatOption = typer.Option(FileFormat.ndjson, "--format", "-f")
+BatchSizeOption = typer.Option(1000, "--batch-size", "-b", min=1)
+
+
+def tenant_option(tenant: Optional[str]) -> Optional[str]:
+    if tenant and TENANCY == "off":
+        raise typer.BadParameter("--tenant needs TENANCY=host or TENANCY=path")
+    return tenant.lower() if tenant else None
+
+
+@app.command()
+def seed(tenant: Optional[str] = typer.Option(None, help="Tenant to seed (TENANCY on)")):
+    """Replace the portfolio collections with the initial seed data."""
+    with tenant_context(tenant_option(tenant)):
+        asyncio.run(seed_database())
+
+
+@app.command()
+def export(
+    directory: Path = typer.Argument(..., file_okay=False),
+    collection: List[str] = CollectionOption,
+    file_format: FileFormat = FormatOption,
+    batch_size: int = BatchSizeOption,
+    tenant: Optional[str] = typer.Option(None, help="Export only this tenant's documents (TENANCY on)"),
+):
+    """Export collections to <directory>/<collection>.<format>."""
+    tenant = tenant_option(tenant)
+    directory.mkdir(parents=True, exist_ok=True)
+    jobs = [
+        lambda db, name=name: export_collection(
+            db, name, directory / f"{name}.{file_format.value}", file_format, batch_size, tenant
+        )
+        for name in collection
+    ]
+    asyncio.run(run_all(jobs))
+
+
+@app.command("import")
+def import_(
+    directory: Path = typer.Argument(..., exists=True, file_okay=False),
+    collection: List[str] = CollectionOption,
+    file_format: FileFormat = FormatOption,
+    batch_size: int = BatchSizeOption,
+    key: Optional[str] = typer.Option(None, help="Upsert by this field instead of inserting"),
+    drop: bool = typer.Option(False, help="Empty each collection before importing"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Read and validate files without writing"),
+    tenant: Optional[str] = typer.Option(None, help="Import as this tenant's documents (TENANCY on)"),
+):
+    """Import collections from <directory>/<collection>.<format>."""
+    tenant = tenant_option(tenant)
+    if drop and TENANCY != "off" and not tenant:
+        raise typer.BadParameter("--drop would empty every tenant's collections: pass --tenant")
+    jobs = []
+    for name in collection:
+        path = directory / f"{name}.{file_format.value}"
+        if not path.exists():
+            typer.echo(f"Skipping {name}: {path} not found")
+            continue
+        jobs.append(lambda db, name=name, path=path: import_collection(
+            db, name, path, file_format, batch_size, key, drop, dry_run, tenant
+        ))
+    asyncio.run(run_all(jobs))
+
+
+@app.command("rebuild-rollups")
+def rebuild_rollups_command(
+    since: Optional[datetime] = typer.Option(None, help="Only rebuild buckets from this time on (UTC)"),
+    granularity: List[str] = typer.Option(list(GRANULARITIES), "--granularity", "-g"),
+):
+    """Recompute the status check rollups from the raw status_checks."""
+    unknown = set(granularity) - set(GRANULARITIES)
+    if unknown:
+        raise typer.BadParameter(f"Unknown granularity: {', '.join(sorted(unknown))}")
+
+    async def run():
+        mongo.connect()
+        try:
+            started = time.perf_counter()
+            await rebuild_rollups(mongo.db, since, granularity)
+            typer.echo(f"Rebuilt {', '.join(granularity)} rollups in {time.perf_counter() - started:.3f}s")
+        finally:
+            mongo.close()
+
+    asyncio.run(run())
+
+
+@app.command("export-static")
+def export_static(
+    directory: Path = typer.Argument(..., file_okay=False),
+    html_template: Optional[Path] = typer.Option(None, exists=True, dir_okay=False, help="index.html to pre-render"),
+    keep: int = typer.Option(5, min=1, help="Versions kept per language"),
+):
+    """Render /api/portfolio per language into versioned static files."""
+
+    async def run():
+        mongo.connect()
+        try:
+            exporter = StaticExporter(directory, keep=keep, html_template=html_template)
+            started = time.perf_counter()
+            manifest = await exporter.build(db=mongo.db)
+            for lang, entry in manifest.items():
+                typer.echo(f"{lang}: {entry['file']} ({entry['bytes']} bytes)")
+            typer.echo(f"Exported to {directory} in {time.perf_counter() - started:.3f}s")
+        finally:
+            mongo.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,186 @@
+"""Response compression: gzip and, when the brotli package is installed, br.
+
+Two paths:
+
+- Cached snapshots (routes/portfolio.py) are compressed once per snapshot and
+  encoding, at the high "static" levels, and the compressed bytes are kept on
+  the snapshot, so a hot response is never compressed per request. Each
+  encoding gets its own strong ETag.
+- `CompressionMiddleware` compresses every other response (paged lists,
+  NDJSON streams, status checks) on the fly, at cheaper "dynamic" levels.
+  Streamed bodies are flushed chunk by chunk so NDJSON lines still arrive as
+  they are produced. Responses that already carry a Content-Encoding pass
+  through untouched.
+
+Bodies under COMPRESSION_MIN_SIZE bytes are sent as they are: below roughly
+one packet the header overhead and CPU outweigh the saving.
+
+    COMPRESSION                   "off" disables both paths (default on)
+    COMPRESSION_MIN_SIZE          bytes (default 1024)
+    GZIP_LEVEL / BROTLI_QUALITY   dynamic levels (default 6 / 4)
+    PRECOMPRESS_GZIP_LEVEL        snapshot levels (default 9)
+    PRECOMPRESS_BROTLI_QUALITY    (default 9; 10-11 shave another ~20% off large
+                                  bodies for 10-100x the CPU, once per snapshot)
+"""
+import asyncio
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSION = os.environ.get('COMPRESSION', 'on').lower() not in ('0', 'off', 'false', 'no')
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '4'))
+PRECOMPRESS_GZIP_LEVEL = int(os.environ.get('PRECOMPRESS_GZIP_LEVEL', '9'))
+PRECOMPRESS_BROTLI_QUALITY = int(os.environ.get('PRECOMPRESS_BROTLI_QUALITY', '9'))
+
+# Server preference when the client accepts several with the same q-value
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Snapshots larger than this are compressed on a worker thread, off the event loop
+OFFLOAD_SIZE = 256 * 1024
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported content coding for an Accept-Encoding header, or None for identity"""
+    if not COMPRESSION or not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in ENCODINGS:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=PRECOMPRESS_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    compressor = zlib.compressobj(PRECOMPRESS_GZIP_LEVEL if static else GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def add_vary(headers: MutableHeaders, name: str) -> None:
+    """Add `name` to Vary unless a route already listed it"""
+    listed = {token.strip().lower() for token in headers.get("vary", "").split(",")}
+    if name.lower() not in listed and "*" not in listed:
+        headers.add_vary_header(name)
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """Strong ETag of one encoding of a body: '"<hash>"' becomes '"<hash>-br"'"""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+async def encoded_body(snapshot, encoding: str) -> bytes:
+    """The snapshot body in `encoding`, compressed on first use and kept on the snapshot"""
+    body = snapshot.encoded.get(encoding)
+    if body is None:
+        if len(snapshot.body) > OFFLOAD_SIZE:
+            body = await asyncio.to_thread(compress, snapshot.body, encoding, True)
+        else:
+            body = compress(snapshot.body, encoding, True)
+        snapshot.encoded[encoding] = body
+    return body
+
+
+class _StreamCompressor:
+    """Incremental compressor whose output is flushed after every chunk"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes, last: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if last else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held back until the first body chunk says whether to compress
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                add_vary(headers, "Accept-Encoding")
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _StreamCompressor(encoding)
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = compressor.chunk(body, last=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({**message, "body": body})
+                    return
+                await send(start_message)
+                start_message = None
+            await send({**message, "body": compressor.chunk(body, last=not more_body)})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,212 @@
+"""Shared MongoDB client.
+
+One AsyncIOMotorClient (and so one connection pool) per process, opened by the
+application lifespan and shared by server.py, the routers and the scripts.
+
+Pool settings are read from the environment:
+
+    MONGO_MAX_POOL_SIZE          max connections per server (default 100)
+    MONGO_MIN_POOL_SIZE          connections kept open when idle (default 0)
+    MONGO_MAX_IDLE_TIME_MS       close connections idle for longer (default: never)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS  fail a checkout after waiting this long (default: never)
+    MONGO_COMPRESSORS            e.g. "zstd,snappy,zlib" (default: none)
+    MONGO_READ_PREFERENCE        read preference of `read_db`, used by the GET routes
+                                 (default "primary"; "secondaryPreferred" offloads reads
+                                 to secondaries at the price of replication lag)
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# The one load_dotenv of the backend: server.py, the routers and the scripts all
+# import this module before any module that reads its settings at import time
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+from pymongo import monitoring  # noqa: E402
+from pymongo.errors import WaitQueueTimeoutError  # noqa: E402
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference  # noqa: E402
+
+from metrics import METRICS_ENABLED, command_metrics  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+MONGO_URL = os.environ.get('MONGO_URL')
+DB_NAME = os.environ.get('DB_NAME')
+if not MONGO_URL or not DB_NAME:
+    raise RuntimeError("MONGO_URL e DB_NAME devem estar definidos no .env")
+
+
+def _int_env(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def client_options() -> dict:
+    """Motor client keyword arguments from the MONGO_* environment variables"""
+    options = {
+        "maxPoolSize": _int_env('MONGO_MAX_POOL_SIZE'),
+        "minPoolSize": _int_env('MONGO_MIN_POOL_SIZE'),
+        "maxIdleTimeMS": _int_env('MONGO_MAX_IDLE_TIME_MS'),
+        "waitQueueTimeoutMS": _int_env('MONGO_WAIT_QUEUE_TIMEOUT_MS'),
+        "compressors": os.environ.get('MONGO_COMPRESSORS') or None,
+    }
+    return {key: value for key, value in options.items() if value is not None}
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters, fed by PyMongo's CMAP events.
+
+    Checkouts happen on Motor's executor threads, so the wait of each checkout
+    is measured between the started and checked-out events of the same thread.
+    """
+
+    def __init__(self, max_pool_size: int):
+        self.max_pool_size = max_pool_size
+        self.open_connections = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = {}
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _wait(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        wait = self._wait()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def connection_check_out_failed(self, event):
+        self._wait()
+        with self._lock:
+            self.checkout_failures[event.reason] = self.checkout_failures.get(event.reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "max_pool_size": self.max_pool_size,
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "saturation": round(self.checked_out / self.max_pool_size, 4) if self.max_pool_size else 0.0,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "wait_ms_avg": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+            }
+
+
+class Mongo:
+    """Lazily connected holder of the process-wide client and databases"""
+
+    def __init__(self):
+        self.client = None
+        self.pool: Optional[PoolStats] = None
+        self._db = None
+        self._read_db = None
+
+    def connect(self, client=None) -> None:
+        """Open the shared client; `client` lets tools and benchmarks inject their own"""
+        if self.client is not None:
+            return
+        if client is None:
+            options = client_options()
+            self.pool = PoolStats(options.get("maxPoolSize", 100))
+            listeners = [self.pool, command_metrics] if METRICS_ENABLED else [self.pool]
+            client = AsyncIOMotorClient(MONGO_URL, event_listeners=listeners, **options)
+        self.client = client
+        self._db = client[DB_NAME]
+        read_preference = make_read_preference(
+            read_pref_mode_from_name(os.environ.get('MONGO_READ_PREFERENCE', 'primary')), None
+        )
+        self._read_db = client.get_database(DB_NAME, read_preference=read_preference)
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+        self.client = None
+        self._db = None
+        self._read_db = None
+
+    @property
+    def db(self):
+        """Database for writes and reads that must see them (primary)"""
+        if self._db is None:
+            self.connect()
+        return self._db
+
+    @property
+    def read_db(self):
+        """Database for the read-only GET routes (MONGO_READ_PREFERENCE)"""
+        if self._read_db is None:
+            self.connect()
+        return self._read_db
+
+    def pool_stats(self) -> dict:
+        return self.pool.snapshot() if self.pool is not None else {}
+
+
+def database_error(error: Exception) -> HTTPException:
+    """HTTP error for a failed database call (HTTPExceptions pass through).
+
+    Pool exhaustion (a checkout that hit MONGO_WAIT_QUEUE_TIMEOUT_MS) becomes a
+    503 the client can retry, instead of a generic 500.
+    """
+    if isinstance(error, HTTPException):
+        return error
+    if isinstance(error, WaitQueueTimeoutError):
+        logger.warning("MongoDB pool exhausted: %s", error)
+        return HTTPException(status_code=503, detail="Database busy", headers={"Retry-After": "1"})
+    logger.error("Database error: %r", error)
+    return HTTPException(status_code=500, detail="Database error")
+
+
+mongo = Mongo()
@@ -0,0 +1,97 @@
+"""Background dependency checks behind the health probes.
+
+Probes hit the API every few seconds per replica; if each one pinged MongoDB,
+the probes themselves would be a steady share of the database load. Instead
+HealthChecker pings every `interval` seconds in the background and the probe
+routes only read its last result:
+
+- liveness never touches a dependency: the event loop answering is the check
+- readiness is ready once startup finished and the last ping succeeded
+  recently; a ping that fails, times out, or is older than `max_age`
+  (the checker itself is stuck) makes it not ready
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HealthChecker:
+    def __init__(self, interval: float = 5.0, timeout: float = 2.0, max_age: Optional[float] = None):
+        self.interval = interval
+        self.timeout = timeout
+        self.max_age = max_age if max_age is not None else 3 * interval + timeout
+        self.db = None
+        # Set once startup (indexes, background tasks) has completed
+        self.started = False
+        self.ok = False
+        self.checked_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checks = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db) -> None:
+        if self._task is not None:
+            return
+        self.db = db
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.check_once()
+            await asyncio.sleep(self.interval)
+
+    async def check_once(self) -> bool:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.db.command("ping"), self.timeout)
+        except Exception as e:
+            error = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e) or type(e).__name__
+            if self.ok or self.checks == 0:
+                logger.warning("MongoDB health check failed: %s", error)
+            self.ok = False
+            self.error = error
+            self.failures += 1
+            self.consecutive_failures += 1
+        else:
+            if not self.ok and self.checks:
+                logger.info("MongoDB health check recovered")
+            self.ok = True
+            self.error = None
+            self.consecutive_failures = 0
+        self.latency_ms = (time.perf_counter() - started) * 1000
+        self.checked_at = time.monotonic()
+        self.checks += 1
+        return self.ok
+
+    def age(self) -> Optional[float]:
+        return time.monotonic() - self.checked_at if self.checked_at is not None else None
+
+    def ready(self) -> bool:
+        age = self.age()
+        return self.started and self.ok and age is not None and age <= self.max_age
+
+    def database(self) -> dict:
+        age = self.age()
+        return {
+            "status": "up" if self.ok else ("unknown" if self.checked_at is None else "down"),
+            "last_check_age_s": round(age, 3) if age is not None else None,
+            "last_latency_ms": round(self.latency_ms, 3) if self.latency_ms is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "error": self.error,
+        }
@@ -0,0 +1,306 @@
+"""Index registry for every collection the API reads.
+
+`ensure_indexes()` runs on startup and is idempotent: creating an index that
+already exists with the same keys and options is a no-op on the server.
+
+`check_query_plans()` runs `explain()` on every query shape the routers issue
+and reports any plan that falls back to a collection scan or an in-memory sort.
+Run it against a seeded database after changing a query or an index:
+
+    cd backend && python indexes.py --explain
+
+With TENANCY on (tenancy.py) every portfolio index leads with tenant_id, so
+one tenant's reads never walk another tenant's keys, and personal_info holds
+one document per tenant.
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from bson import ObjectId
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+from database import mongo
+from tenancy import TENANCY, TENANT_FIELD
+
+logger = logging.getLogger(__name__)
+
+ORDERED_ACTIVE_COLLECTIONS = ['skills', 'education', 'goals', 'current_learning']
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, Union[int, str]], ...]
+    options: Dict = field(default_factory=dict, hash=False)
+
+    def model(self) -> IndexModel:
+        return IndexModel(list(self.keys), **self.options)
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """One query as issued by a router: a find() or an aggregate() pipeline"""
+    name: str
+    collection: str
+    filter: Dict = field(default_factory=dict, hash=False)
+    sort: Optional[Sequence[Tuple[str, int]]] = None
+    pipeline: Optional[List[Dict]] = field(default=None, hash=False)
+    # Unindexed on purpose: the collection holds a single document
+    collscan_ok: bool = False
+
+
+ORDER_KEYS = (("order", ASCENDING), ("_id", ASCENDING))
+
+PORTFOLIO_INDEXES: List[IndexSpec] = [
+    *[IndexSpec(name, (("is_active", ASCENDING), *ORDER_KEYS)) for name in ORDERED_ACTIVE_COLLECTIONS],
+    IndexSpec("projects", ORDER_KEYS),
+    IndexSpec("projects", (("featured", ASCENDING), *ORDER_KEYS)),
+    # Multikey: /search?tech=... in list order
+    IndexSpec("projects", (("technologies", ASCENDING), *ORDER_KEYS)),
+    IndexSpec("skills", (("is_active", ASCENDING), ("technologies", ASCENDING), *ORDER_KEYS)),
+    # /search?q=..., both languages in one index (one text index per collection).
+    # No stemming or stop words: the documents mix languages and tech names.
+    IndexSpec(
+        "projects",
+        tuple((name, TEXT) for name in ("title.pt", "title.en", "description.pt", "description.en", "technologies")),
+        {
+            "name": "projects_text",
+            "default_language": "none",
+            "weights": {"title.pt": 5, "title.en": 5, "technologies": 3, "description.pt": 1, "description.en": 1},
+        },
+    ),
+    IndexSpec(
+        "skills",
+        tuple((name, TEXT) for name in ("category.pt", "category.en", "technologies")),
+        {"name": "skills_text", "default_language": "none", "weights": {"technologies": 3, "category.pt": 1, "category.en": 1}},
+    ),
+]
+
+if TENANCY != "off":
+    # A text index may have equality-only prefix keys; scoped() always supplies one
+    PORTFOLIO_INDEXES = [
+        IndexSpec(spec.collection, ((TENANT_FIELD, ASCENDING), *spec.keys), spec.options)
+        for spec in PORTFOLIO_INDEXES
+    ]
+    PORTFOLIO_INDEXES.append(IndexSpec("personal_info", ((TENANT_FIELD, ASCENDING),), {"unique": True}))
+
+# status_checks and status_rollups are deployment-wide operational data
+INDEXES: List[IndexSpec] = [
+    *PORTFOLIO_INDEXES,
+    IndexSpec("status_checks", (("timestamp", ASCENDING), ("_id", ASCENDING))),
+    IndexSpec("status_checks", (("client_name", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING))),
+    # Upsert key of the ingest-time increments and the $merge key of rebuilds
+    IndexSpec(
+        "status_rollups",
+        (("granularity", ASCENDING), ("client_name", ASCENDING), ("bucket", ASCENDING)),
+        {"unique": True},
+    ),
+    # Rollups across all clients, sorted by bucket
+    IndexSpec("status_rollups", (("granularity", ASCENDING), ("bucket", ASCENDING), ("client_name", ASCENDING))),
+]
+
+# Optional retention for status_checks: documents expire STATUS_TTL_SECONDS after
+# their timestamp. TTL indexes are not allowed on capped collections, so it is
+# skipped when STATUS_CAPPED_BYTES is set.
+STATUS_TTL_SECONDS = int(os.environ.get('STATUS_TTL_SECONDS', '0'))
+if STATUS_TTL_SECONDS and not int(os.environ.get('STATUS_CAPPED_BYTES', '0')):
+    INDEXES.append(IndexSpec(
+        "status_checks",
+        (("timestamp", ASCENDING),),
+        {"name": "status_checks_ttl", "expireAfterSeconds": STATUS_TTL_SECONDS},
+    ))
+
+
+def _after(values: Sequence) -> Dict:
+    """Representative keyset condition, as built by pagination.keyset_filter"""
+    return {"$or": [{"order": {"$gt": values[0]}}, {"order": values[0], "_id": {"$gt": values[1]}}]}
+
+
+def query_shapes() -> List[QueryShape]:
+    """Every query issued by routes/portfolio.py, routes/status.py and the tenant check"""
+    order_sort = list(ORDER_KEYS)
+    cursor = (1, ObjectId())
+    # What tenancy.scoped() adds to every portfolio query
+    tenant = {TENANT_FIELD: "example"} if TENANCY != "off" else {}
+    shapes = []
+    for name in ORDERED_ACTIVE_COLLECTIONS:
+        active = {**tenant, "is_active": True}
+        shapes += [
+            QueryShape(f"{name}", name, active, order_sort),
+            QueryShape(f"{name} page", name, {"$and": [active, _after(cursor)]}, order_sort),
+            QueryShape(f"{name} lang", name, pipeline=[{"$match": active}, {"$sort": dict(order_sort)}]),
+        ]
+    # One personal_info document per deployment; with TENANCY on, one per
+    # tenant, found through the unique tenant_id index
+    shapes += [
+        QueryShape("personal info", "personal_info", tenant, collscan_ok=not tenant),
+        QueryShape("personal info lang", "personal_info", pipeline=[
+            {"$match": tenant}, {"$limit": 1}, {"$addFields": {"title": {"$ifNull": ["$title.en", "$title"]}}},
+        ], collscan_ok=not tenant),
+    ]
+    if tenant:
+        # KnownTenants._lookup, on every request for a tenant it has not seen lately
+        shapes.append(QueryShape("known tenant lookup", "personal_info", tenant))
+    featured = {**tenant, "featured": True}
+    shapes += [
+        QueryShape("projects", "projects", tenant, order_sort),
+        QueryShape("projects page", "projects", {"$and": [tenant, _after(cursor)]}, order_sort),
+        QueryShape("projects lang", "projects", pipeline=[{"$match": tenant}, {"$sort": dict(order_sort)}]),
+        QueryShape("featured projects", "projects", featured, order_sort),
+        QueryShape("featured projects page", "projects", {"$and": [featured, _after(cursor)]}, order_sort),
+        QueryShape("search projects by technology", "projects", {
+            **tenant, "technologies": {"$all": ["Python"]},
+        }, order_sort),
+        QueryShape("search skills by technology", "skills", {
+            **tenant, "is_active": True, "technologies": {"$all": ["Python"]},
+        }, order_sort),
+        # Text matches come back sorted by score, which is always computed in
+        # memory, so only the match is checked
+        QueryShape("search projects text", "projects", pipeline=[{"$match": {**tenant, "$text": {"$search": "api"}}}]),
+        QueryShape("search skills text", "skills", pipeline=[{"$match": {**tenant, "$text": {"$search": "python"}}}]),
+        QueryShape("status checks", "status_checks", {}, [("timestamp", 1), ("_id", 1)]),
+        QueryShape("status checks page", "status_checks", {"$or": [
+            {"timestamp": {"$gt": datetime.utcnow()}},
+            {"timestamp": datetime.utcnow(), "_id": {"$gt": ObjectId()}},
+        ]}, [("timestamp", 1), ("_id", 1)]),
+        QueryShape("status checks by client", "status_checks", {
+            "client_name": "web", "timestamp": {"$gte": datetime(2024, 1, 1), "$lt": datetime.utcnow()},
+        }, [("timestamp", 1), ("_id", 1)]),
+        QueryShape("status checks in range", "status_checks", {
+            "timestamp": {"$gte": datetime(2024, 1, 1), "$lt": datetime.utcnow()},
+        }, [("timestamp", 1), ("_id", 1)]),
+        QueryShape("status rollup", "status_rollups", {
+            "granularity": "day", "bucket": {"$gte": datetime(2024, 1, 1), "$lt": datetime.utcnow()},
+        }, [("bucket", 1), ("client_name", 1)]),
+        QueryShape("status rollup by client", "status_rollups", {
+            "granularity": "day", "client_name": "web", "bucket": {"$gte": datetime(2024, 1, 1)},
+        }, [("bucket", 1), ("client_name", 1)]),
+    ]
+    return shapes
+
+
+async def ensure_indexes(db, specs: Sequence[IndexSpec] = INDEXES) -> Dict[str, List[str]]:
+    """Create every registered index, grouped per collection"""
+    by_collection: Dict[str, List[IndexSpec]] = {}
+    ttl_specs = []
+    text_specs = []
+    for spec in specs:
+        if "expireAfterSeconds" in spec.options:
+            ttl_specs.append(spec)
+        elif any(direction == TEXT for _, direction in spec.keys):
+            text_specs.append(spec)
+        else:
+            by_collection.setdefault(spec.collection, []).append(spec)
+    names = await asyncio.gather(*(
+        db[collection].create_indexes([spec.model() for spec in collection_specs])
+        for collection, collection_specs in by_collection.items()
+    ))
+    created = dict(zip(by_collection, names))
+    for spec in ttl_specs:
+        created.setdefault(spec.collection, []).append(await _ensure_ttl_index(db, spec))
+    for spec in text_specs:
+        created.setdefault(spec.collection, []).append(await _ensure_text_index(db, spec))
+    logger.info("Indexes ensured: %s", created)
+    return created
+
+
+async def _ensure_ttl_index(db, spec: IndexSpec) -> str:
+    """Create a TTL index, or update its expiry in place when only that changed"""
+    try:
+        return (await db[spec.collection].create_indexes([spec.model()]))[0]
+    except OperationFailure as e:
+        if e.code not in (85, 86):  # IndexOptionsConflict, IndexKeySpecsConflict
+            raise
+        await db.command(
+            "collMod", spec.collection,
+            index={"name": spec.options["name"], "expireAfterSeconds": spec.options["expireAfterSeconds"]},
+        )
+        return spec.options["name"]
+
+
+async def _ensure_text_index(db, spec: IndexSpec) -> str:
+    """Create a text index, replacing the collection's existing one when its keys changed
+
+    A collection has at most one text index, so switching TENANCY on or off
+    conflicts with the index built under the other setting.
+    """
+    try:
+        return (await db[spec.collection].create_indexes([spec.model()]))[0]
+    except OperationFailure as e:
+        if e.code not in (85, 86):  # IndexOptionsConflict, IndexKeySpecsConflict
+            raise
+        async for index in db[spec.collection].list_indexes():
+            if index["key"].get("_fts") == "text":
+                logger.warning("Replacing text index %s on %s", index["name"], spec.collection)
+                await db[spec.collection].drop_index(index["name"])
+        return (await db[spec.collection].create_indexes([spec.model()]))[0]
+
+
+def _plan_stages(explain: Dict) -> List[str]:
+    """Stage names of every winning plan found anywhere in an explain() result"""
+    stages = []
+
+    def walk(node, in_plan=False):
+        if isinstance(node, dict):
+            if in_plan and "stage" in node:
+                stages.append(node["stage"])
+            for key, value in node.items():
+                walk(value, in_plan or key in ("winningPlan", "queryPlan"))
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_plan)
+
+    walk(explain)
+    return stages
+
+
+async def explain(db, shape: QueryShape) -> Dict:
+    if shape.pipeline is not None:
+        return await db.command("aggregate", shape.collection, pipeline=shape.pipeline, explain=True)
+    cursor = db[shape.collection].find(shape.filter)
+    if shape.sort:
+        cursor = cursor.sort(list(shape.sort))
+    return await cursor.explain()
+
+
+async def check_query_plans(db, shapes: Optional[Sequence[QueryShape]] = None) -> List[str]:
+    """Return one message per query whose plan has a COLLSCAN or an in-memory SORT"""
+    problems = []
+    for shape in shapes or query_shapes():
+        stages = _plan_stages(await explain(db, shape))
+        bad = sorted({stage for stage in stages if stage in ("COLLSCAN", "SORT")} - (
+            {"COLLSCAN"} if shape.collscan_ok else set()
+        ))
+        if bad:
+            problems.append(f"{shape.name} ({shape.collection}): {', '.join(bad)} in {' > '.join(stages)}")
+    return problems
+
+
+async def main(run_explain: bool) -> int:
+    mongo.connect()
+    db = mongo.db
+    try:
+        await ensure_indexes(db)
+        if not run_explain:
+            return 0
+        problems = await check_query_plans(db)
+        for problem in problems:
+            print(f"FAIL {problem}")
+        print(f"{len(query_shapes()) - len(problems)}/{len(query_shapes())} query plans use an index")
+        return 1 if problems else 0
+    finally:
+        mongo.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Create indexes and check query plans")
+    parser.add_argument("--explain", action="store_true", help="fail on COLLSCAN or in-memory SORT plans")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.explain)))
@@ -0,0 +1,251 @@
+"""Request and database instrumentation, exposed in the Prometheus text format.
+
+- `MetricsMiddleware` (pure ASGI, no per-request objects beyond a closure)
+  records per-route latency and response size histograms and the number of
+  requests in flight. Routes are labelled by their template
+  ("/api/projects/{project_id}"), never by the raw path.
+- `CommandMetrics` is a PyMongo command listener recording the duration and
+  the number of documents returned or written per collection and command.
+- `timed()` measures one named step of a request, e.g. each sub-query of
+  /api/portfolio.
+
+With SERVER_TIMING enabled the middleware also adds a Server-Timing header
+with the app time, the summed database time and every `timed()` step of the
+request. Motor copies the context into its executor threads, so the command
+listener sees the timings of the request that issued the command.
+
+    METRICS_ENABLED  "false" turns off the middleware, the command listener
+                     and /metrics (default on)
+    SERVER_TIMING    "true" adds the Server-Timing header (default off: it
+                     tells every client how long our queries take)
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+DOCUMENT_BUCKETS = (0, 1, 10, 100, 1_000, 10_000)
+
+# Commands that are not application queries
+IGNORED_COMMANDS = frozenset({
+    "hello", "ismaster", "isMaster", "ping", "buildInfo", "saslStart", "saslContinue",
+    "endSessions", "killCursors", "listCollections", "listIndexes", "createIndexes",
+})
+
+# (name, seconds) steps of the current request, only set when Server-Timing is on
+_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label tuple"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self.series: Dict[Tuple, list] = {}
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in zip(self.labels, labels))
+            prefix = f"{label_text}," if label_text else ""
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    def __init__(self):
+        self.in_flight = 0
+        self.request_duration = Histogram(
+            "http_request_duration_seconds", "Time from request start to the last body byte",
+            ("method", "route", "status"), LATENCY_BUCKETS,
+        )
+        self.response_size = Histogram(
+            "http_response_size_bytes", "Response body size", ("method", "route"), SIZE_BUCKETS,
+        )
+        self.step_duration = Histogram(
+            "request_step_duration_seconds", "Duration of named steps inside a request",
+            ("step",), LATENCY_BUCKETS,
+        )
+        self.command_duration = Histogram(
+            "mongodb_command_duration_seconds", "MongoDB command round trip",
+            ("collection", "command", "outcome"), LATENCY_BUCKETS,
+        )
+        self.command_documents = Histogram(
+            "mongodb_command_documents", "Documents returned or written by a MongoDB command",
+            ("collection", "command"), DOCUMENT_BUCKETS,
+        )
+        # Command events arrive on Motor's executor threads
+        self._command_lock = threading.Lock()
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, size: int) -> None:
+        self.request_duration.observe((method, route, status), seconds)
+        self.response_size.observe((method, route), size)
+
+    def observe_command(self, collection: str, command: str, outcome: str, seconds: float, documents: Optional[int]) -> None:
+        with self._command_lock:
+            self.command_duration.observe((collection, command, outcome), seconds)
+            if documents is not None:
+                self.command_documents.observe((collection, command), documents)
+
+    def render(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests being handled",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        lines += self.request_duration.render()
+        lines += self.response_size.render()
+        lines += self.step_duration.render()
+        with self._command_lock:
+            lines += self.command_duration.render()
+            lines += self.command_documents.render()
+        for name, value in (gauges or {}).items():
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+async def timed(step: str, awaitable):
+    """Await `awaitable`, recording its duration as a named request step"""
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.step_duration.observe((step,), elapsed)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((step, elapsed))
+
+
+def _document_count(command: str, reply: dict) -> Optional[int]:
+    cursor = reply.get("cursor")
+    if cursor is not None:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", ())))
+    if command in ("insert", "update", "delete"):
+        return reply.get("nModified", reply.get("n"))
+    if command == "findAndModify":
+        return 1 if reply.get("value") is not None else 0
+    return None
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Per-collection command durations and document counts"""
+
+    def __init__(self, registry: Metrics = metrics):
+        self.registry = registry
+        # request_id -> collection, between the started and finished events
+        self._collections: Dict[int, str] = {}
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        command = event.command
+        collection = command.get("collection") if event.command_name == "getMore" else command.get(event.command_name)
+        self._collections[event.request_id] = collection if isinstance(collection, str) else "-"
+
+    def _finish(self, event, outcome: str, reply: Optional[dict]) -> None:
+        collection = self._collections.pop(event.request_id, None)
+        if collection is None:
+            return
+        seconds = event.duration_micros / 1_000_000
+        documents = _document_count(event.command_name, reply) if reply is not None else None
+        self.registry.observe_command(collection, event.command_name, outcome, seconds, documents)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append(("db", seconds))
+
+    def succeeded(self, event):
+        self._finish(event, "ok", event.reply)
+
+    def failed(self, event):
+        self._finish(event, "error", None)
+
+
+command_metrics = CommandMetrics()
+
+
+def server_timing(timings: List[Tuple[str, float]], app_seconds: float) -> bytes:
+    """Server-Timing value: app time, summed database time, then each step"""
+    db_seconds = sum(seconds for name, seconds in timings if name == "db")
+    db_count = sum(1 for name, _ in timings if name == "db")
+    parts = [f"app;dur={app_seconds * 1000:.2f}"]
+    if db_count:
+        parts.append(f'db;dur={db_seconds * 1000:.2f};desc="{db_count} commands"')
+    parts += [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings if name != "db"]
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry: Metrics = metrics, server_timing: bool = False):
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        started = time.perf_counter()
+        status = 500
+        size = 0
+        timings = [] if self.server_timing else None
+        token = _timings.set(timings) if timings is not None else None
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timings is not None:
+                    header = server_timing(timings, time.perf_counter() - started)
+                    message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", header)]}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            registry.in_flight -= 1
+            route = scope.get("route")
+            registry.observe_request(
+                scope["method"], route.path if route is not None else "unmatched",
+                status, time.perf_counter() - started, size,
+            )
+            if token is not None:
+                _timings.reset(token)
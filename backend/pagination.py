@@ -0,0 +1,98 @@
+"""Keyset pagination, field projection and NDJSON streaming for list endpoints.
+
+Pages are addressed by an opaque `after` cursor holding the sort key of the
+last document returned, so every page is an index range scan of `limit`
+documents no matter how deep into the collection it is.
+"""
+import base64
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, List, Optional, Sequence
+
+from bson import json_util
+from fastapi import HTTPException, Query
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class ListParams:
+    """Query parameters shared by the paginated list endpoints"""
+    limit: Optional[int] = None
+    after: Optional[str] = None
+    fields: Optional[List[str]] = None
+    stream: bool = False
+
+    @property
+    def requested(self) -> bool:
+        """Whether any paging option was given (otherwise the full cached list is served)"""
+        return bool(self.limit or self.after or self.fields or self.stream)
+
+
+async def list_params(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[str] = Query(None, description="Cursor returned in X-Next-Cursor"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$", description="ndjson streams documents"),
+) -> ListParams:
+    """Dependency building ListParams; a coroutine, so that FastAPI resolves it
+    on the event loop instead of the threadpool"""
+    return ListParams(limit, after, parse_fields(fields), format == "ndjson")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    for name in names:
+        if name.startswith("$"):
+            raise HTTPException(status_code=400, detail=f"Invalid field: {name}")
+    return names or None
+
+
+def projection(fields: Optional[Sequence[str]], sort_keys: Sequence[str]) -> Optional[dict]:
+    """Mongo projection for `fields`, always keeping the sort keys so the cursor can be built"""
+    if not fields:
+        return None
+    return {name: 1 for name in [*fields, *sort_keys]}
+
+
+def encode_cursor(document: dict, sort_keys: Sequence[str]) -> str:
+    values = [document.get(key) for key in sort_keys]
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort_keys: Sequence[str]) -> list:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(sort_keys):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_filter(sort_keys: Sequence[str], values: Sequence) -> dict:
+    """Filter for documents strictly after `values` in ascending (sort_keys) order"""
+    clauses = []
+    for i, key in enumerate(sort_keys):
+        clause = {prior: values[j] for j, prior in enumerate(sort_keys[:i])}
+        clause[key] = {"$gt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def next_page_headers(request_url, documents: list, limit: int, sort_keys: Sequence[str]) -> dict:
+    """X-Next-Cursor / Link headers when a full page was returned"""
+    if len(documents) < limit:
+        return {}
+    cursor = encode_cursor(documents[-1], sort_keys)
+    next_url = request_url.include_query_params(after=cursor)
+    return {"X-Next-Cursor": cursor, "Link": f'<{next_url}>; rel="next"'}
+
+
+async def ndjson_lines(cursor, encode: Callable[[dict], bytes]) -> AsyncIterator[bytes]:
+    """Yield one encoded line per document as the Motor cursor produces them"""
+    async for document in cursor:
+        yield encode(document) + b"\n"
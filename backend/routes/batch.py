@@ -0,0 +1,162 @@
+from fastapi import APIRouter, HTTPException
+from models.portfolio import (
+    Skill, SkillCreate, SkillUpdate,
+    Education, EducationCreate, EducationUpdate,
+    Project, ProjectCreate, ProjectUpdate,
+    Goal, GoalCreate, GoalUpdate,
+    CurrentLearning, CurrentLearningCreate, CurrentLearningUpdate,
+)
+from pydantic import BaseModel, ValidationError
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import Any, Dict, List, Literal, Optional
+from bson import ObjectId
+from datetime import datetime
+from enum import Enum
+
+from database import database_error, mongo
+from routes.portfolio import collection_changed, documents_changed, object_id_str
+from tenancy import scoped, stamp
+
+router = APIRouter()
+
+MAX_BATCH_OPERATIONS = 1000
+
+class BatchCollection(str, Enum):
+    skills = "skills"
+    education = "education"
+    projects = "projects"
+    goals = "goals"
+    current_learning = "current-learning"
+
+# URL name -> (Mongo collection, full model, create model, update model)
+BATCH_MODELS = {
+    BatchCollection.skills: ("skills", Skill, SkillCreate, SkillUpdate),
+    BatchCollection.education: ("education", Education, EducationCreate, EducationUpdate),
+    BatchCollection.projects: ("projects", Project, ProjectCreate, ProjectUpdate),
+    BatchCollection.goals: ("goals", Goal, GoalCreate, GoalUpdate),
+    BatchCollection.current_learning: ("current_learning", CurrentLearning, CurrentLearningCreate, CurrentLearningUpdate),
+}
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete", "reorder"]
+    id: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+    order: Optional[int] = None
+
+class BatchItemResult(BaseModel):
+    index: int
+    op: str
+    ok: bool
+    id: Optional[str] = None
+    # Created documents in full; for update/reorder, only the fields that were set
+    document: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    success: bool
+    inserted: int = 0
+    matched: int = 0
+    modified: int = 0
+    deleted: int = 0
+    # Update/reorder/delete operations whose id matched no document
+    not_found: int = 0
+    results: List[BatchItemResult]
+
+def _object_id(operation: BatchOperation) -> ObjectId:
+    if not operation.id or not ObjectId.is_valid(operation.id):
+        raise ValueError("Invalid ID")
+    return ObjectId(operation.id)
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+def build_write(operation: BatchOperation, model, create_model, update_model):
+    """Turn one operation into a pymongo write plus the document to report back.
+
+    Created documents get their _id here, so the response can be built
+    without reading anything back.
+    """
+    now = datetime.utcnow()
+    if operation.op == "create":
+        item = model(**create_model(**(operation.data or {})).dict())
+        document = item.dict(by_alias=True, exclude={"id"})
+        document["_id"] = ObjectId()
+        # The reported document leaves the tenant out
+        return InsertOne(stamp(dict(document))), document
+    object_id = _object_id(operation)
+    if operation.op == "delete":
+        return DeleteOne(scoped({"_id": object_id})), None
+    if operation.op == "reorder":
+        if operation.order is None:
+            raise ValueError("reorder requires 'order'")
+        changes = {"order": operation.order}
+    else:
+        changes = update_model(**(operation.data or {})).dict(exclude_unset=True)
+    changes["updated_at"] = now
+    return UpdateOne(scoped({"_id": object_id}), {"$set": changes}), {"_id": object_id, **changes}
+
+@router.post("/{collection}/batch", response_model=BatchResponse)
+async def batch_write(collection: BatchCollection, operations: List[BatchOperation]):
+    """Apply create/update/delete/reorder operations in a single unordered bulk write"""
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_OPERATIONS} operations per batch")
+    collection_name, model, create_model, update_model = BATCH_MODELS[collection]
+
+    results = [BatchItemResult(index=i, op=operation.op, ok=False) for i, operation in enumerate(operations)]
+    writes, positions, documents, ids = [], [], [], []
+    for i, operation in enumerate(operations):
+        try:
+            write, document = build_write(operation, model, create_model, update_model)
+        except (ValidationError, ValueError) as e:
+            results[i].error = _error_message(e)
+            continue
+        writes.append(write)
+        positions.append(i)
+        documents.append(document)
+        ids.append(document["_id"] if document else _object_id(operation))
+
+    response = BatchResponse(success=False, results=results)
+    if writes:
+        try:
+            try:
+                bulk_result = (await mongo.db[collection_name].bulk_write(writes, ordered=False)).bulk_api_result
+            except BulkWriteError as e:
+                bulk_result = e.details
+            collection_changed(collection_name)
+        except Exception as e:
+            raise database_error(e)
+
+        failed = {error["index"]: error.get("errmsg", "Write error") for error in bulk_result.get("writeErrors", [])}
+        # Before the results below turn the ids into strings. Updates may not
+        # have matched anything (see not_found), so they are reported as partial
+        written = [
+            (operations[i].op, (object_id, document))
+            for write_index, (i, object_id, document) in enumerate(zip(positions, ids, documents))
+            if write_index not in failed
+        ]
+        documents_changed(collection_name, [change for op, change in written if op in ("create", "delete")])
+        documents_changed(
+            collection_name, [change for op, change in written if op in ("update", "reorder")], partial=True
+        )
+        for write_index, (i, document) in enumerate(zip(positions, documents)):
+            if write_index in failed:
+                results[i].error = failed[write_index]
+                continue
+            results[i].ok = True
+            results[i].id = str(ids[write_index])
+            results[i].document = object_id_str(document) if document else None
+
+        response.inserted = bulk_result.get("nInserted", 0)
+        response.matched = bulk_result.get("nMatched", 0)
+        response.modified = bulk_result.get("nModified", 0)
+        response.deleted = bulk_result.get("nRemoved", 0)
+        # Mongo only returns totals, so which ids matched nothing is unknown:
+        # they are counted here and the batch is not a success
+        targeted = sum(1 for op, _ in written if op != "create")
+        response.not_found = targeted - response.matched - response.deleted
+
+    response.success = all(result.ok for result in results) and response.not_found == 0
+    return response
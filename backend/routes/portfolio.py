@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from models.portfolio import (
     PersonalInfo, PersonalInfoUpdate,
     Skill, SkillCreate, SkillUpdate,
@@ -9,27 +10,90 @@ from models.portfolio import (
     CurrentLearning, CurrentLearningCreate, CurrentLearningUpdate,
     PortfolioData
 )
-from typing import List
+from typing import Callable, List, Optional
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pydantic import BaseModel
+from database import database_error, mongo
+from cache import Snapshot, TenantCaches, etag_matches
+from singleflight import SingleFlight
+from compression import COMPRESSION, COMPRESSION_MIN_SIZE, encoded_body, negotiate, variant_etag
+from metrics import timed
+from tenancy import current_tenant, response_fields, scoped, stamp
+from pagination import (
+    DEFAULT_PAGE_SIZE, ListParams, decode_cursor, keyset_filter, list_params,
+    ndjson_lines, next_page_headers, projection
+)
+import asyncio
+import json
+import logging
+import orjson
 import os
 from datetime import datetime
-from dotenv import load_dotenv
-from pathlib import Path
 
 router = APIRouter()
 
-# Load environment variables
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
+# Aggregate endpoint tuning
+# Seconds each sub-query of /portfolio may take before it is abandoned
+PORTFOLIO_QUERY_TIMEOUT = float(os.environ.get('PORTFOLIO_QUERY_TIMEOUT', '5'))
+# What to do when a list sub-query fails or times out:
+#   "fail"  -> the whole request fails with 500 (default)
+#   "empty" -> the section is returned as [] and listed under "errors"
+PORTFOLIO_PARTIAL_FAILURE = os.environ.get('PORTFOLIO_PARTIAL_FAILURE', 'fail')
+
+# Read cache: snapshots are invalidated by the write routes below, the TTL only
+# catches edits that bypass this API (seed_data.py, manual changes in Mongo)
+CACHE_TTL_SECONDS = float(os.environ.get('CACHE_TTL_SECONDS', '300'))
+PORTFOLIO_COLLECTIONS = ['personal_info', 'skills', 'education', 'projects', 'goals', 'current_learning']
+# Filter of each list section of /portfolio (every section but personal_info)
+PORTFOLIO_SECTIONS = {
+    'skills': {"is_active": True},
+    'education': {"is_active": True},
+    'projects': {},
+    'goals': {"is_active": True},
+    'current_learning': {"is_active": True},
+}
+
+# Seconds past the TTL a replaced or expired snapshot may still be served while
+# one background refresh rebuilds it (0 turns stale-while-revalidate off)
+CACHE_STALE_SECONDS = float(os.environ.get('CACHE_STALE_SECONDS', '30'))
+
+# With tenancy on, each tenant gets its own cache; the least recently used
+# tenants' snapshots are dropped past TENANT_CACHE_MAX_TENANTS tenants or
+# TENANT_CACHE_MAX_MB of response bodies
+cache = TenantCaches(
+    ttl=CACHE_TTL_SECONDS,
+    stale=CACHE_STALE_SECONDS,
+    max_tenants=int(os.environ.get('TENANT_CACHE_MAX_TENANTS', '1000')),
+    max_bytes=int(float(os.environ.get('TENANT_CACHE_MAX_MB', '256')) * 1024 * 1024),
+)
+# One load per snapshot at a time, however many requests miss it together
+flights = SingleFlight()
+
+# Sent with every cacheable GET so browsers and the CDN revalidate with the ETag
+CACHE_CONTROL = os.environ.get('CACHE_CONTROL', 'public, max-age=0, stale-while-revalidate=60')
+
+# Fast response mode: documents go straight from Motor to orjson, skipping the
+# per-document Pydantic models and the ObjectId walk. Responses then contain the
+# stored fields only (no model defaults filled in), hence opt-in.
+FAST_JSON = os.environ.get('FAST_JSON', '').lower() in ('1', 'true', 'yes')
 
-# Database connection
-mongo_url = os.environ.get('MONGO_URL')
-db_name = os.environ.get('DB_NAME')
-if not mongo_url or not db_name:
-    raise RuntimeError("MONGO_URL e DB_NAME devem estar definidos no .env")
+# Language projection: `?lang=pt|en` flattens every MultiLanguageField to the
+# requested string inside Mongo; `?lang=auto` picks it from Accept-Language.
+# Without `lang` the dual-language documents are returned unchanged.
+SUPPORTED_LANGUAGES = ('pt', 'en')
+DEFAULT_LANGUAGE = os.environ.get('DEFAULT_LANGUAGE', 'pt')
+MULTILANGUAGE_FIELDS = {
+    'personal_info': ['title', 'subtitle', 'description', 'status'],
+    'skills': ['category'],
+    'education': ['degree', 'status'],
+    'projects': ['title', 'description'],
+    'goals': ['goal'],
+    'current_learning': ['item'],
+}
+LANG_QUERY = Query(None, pattern="^(pt|en|auto)$", description="Flatten multi-language fields to one language")
 
-client = AsyncIOMotorClient(mongo_url)
-db = client[db_name]
+logger = logging.getLogger(__name__)
 
 def object_id_str(obj):
     """Convert ObjectId to string for JSON serialization"""
@@ -49,18 +113,256 @@ def object_id_str(obj):
                 object_id_str(item)
     return obj
 
+def _orjson_default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def to_response_items(documents, model, plain=False):
+    """Prepare raw documents for serialize(), validating through `model` unless FAST_JSON is on.
+
+    `plain` documents (language-projected or field-projected) no longer fit
+    the models and are passed through as dicts.
+    """
+    if FAST_JSON:
+        return documents
+    if plain:
+        return [object_id_str(document) for document in documents]
+    return [model(**object_id_str(document)) for document in documents]
+
+def resolve_language(request: Request, lang: Optional[str]) -> Optional[str]:
+    """Turn the `lang` query parameter into pt/en, or None for dual-language output"""
+    if lang != "auto":
+        return lang
+    best, best_q = DEFAULT_LANGUAGE, 0.0
+    for part in request.headers.get("accept-language", "").split(","):
+        tag, _, params = part.strip().partition(";")
+        primary = tag.strip().lower().split("-")[0]
+        if primary not in SUPPORTED_LANGUAGES:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        if q > best_q:
+            best, best_q = primary, q
+    return best
+
+def language_projection(collection_name: str, lang: str) -> dict:
+    """$addFields stage replacing each {pt, en} field with its `lang` string"""
+    return {
+        field: {"$ifNull": [f"${field}.{lang}", f"${field}"]}
+        for field in MULTILANGUAGE_FIELDS.get(collection_name, [])
+    }
+
+# Every ordered list is sorted on (order, _id): _id breaks ties so keyset pages are stable
+ORDER_KEYS = ["order", "_id"]
+ORDER_SORT = [("order", 1), ("_id", 1)]
+
+def ordered_cursor(collection, query, lang=None, limit=None, fields=None):
+    """Cursor over the current tenant's documents matching query in list order, projected to `lang` if given"""
+    query = scoped(query)
+    fields = response_fields(fields)
+    if lang is None:
+        cursor = collection.find(query, fields).sort(ORDER_SORT)
+        return cursor.limit(limit) if limit else cursor
+    pipeline = [{"$match": query}, {"$sort": dict(ORDER_SORT)}]
+    if limit:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$addFields": language_projection(collection.name, lang)})
+    if fields:
+        pipeline.append({"$project": fields})
+    return collection.aggregate(pipeline)
+
+async def fetch_ordered(collection, query, lang=None):
+    """Fetch every document matching query in list order"""
+    return await ordered_cursor(collection, query, lang).to_list(length=None)
+
+async def list_page(request: Request, collection, query, model, lang, page: ListParams) -> Response:
+    """Serve one keyset page, or an NDJSON stream, of an ordered list straight from Mongo"""
+    if page.after:
+        query = {"$and": [query, keyset_filter(ORDER_KEYS, decode_cursor(page.after, ORDER_KEYS))]}
+    limit = page.limit or (None if page.stream else DEFAULT_PAGE_SIZE)
+    cursor = ordered_cursor(collection, query, lang, limit, projection(page.fields, ORDER_KEYS))
+    if page.stream:
+        return StreamingResponse(ndjson_lines(cursor, encode_document), media_type="application/x-ndjson")
+
+    documents = await cursor.to_list(length=limit)
+    headers = next_page_headers(request.url, documents, limit, ORDER_KEYS)
+    items = to_response_items(documents, model, plain=bool(lang or page.fields))
+    return Response(content=serialize(items), media_type="application/json", headers=headers)
+
+async def fetch_personal_info(lang=None, db=None):
+    db = db if db is not None else mongo.read_db
+    if lang is None:
+        return await db.personal_info.find_one(scoped({}), response_fields(None))
+    pipeline = [
+        {"$match": scoped({})},
+        {"$limit": 1},
+        {"$addFields": language_projection("personal_info", lang)},
+    ]
+    if response_fields(None):
+        pipeline.append({"$project": response_fields(None)})
+    documents = await db.personal_info.aggregate(pipeline).to_list(length=1)
+    return documents[0] if documents else None
+
+def encode_document(document) -> bytes:
+    return orjson.dumps(document, default=_orjson_default)
+
+def serialize(payload) -> bytes:
+    """Encode a response payload the same way FastAPI's JSONResponse does"""
+    if FAST_JSON:
+        # ObjectId is the only BSON type orjson needs help with; datetimes are native
+        return orjson.dumps(payload, default=_orjson_default)
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+def _snapshot_loader(key, versions, load):
+    async def refresh():
+        payload = await load()
+        if isinstance(payload, Response):
+            # Loaders return a ready Response for results that must not be
+            # cached (e.g. a degraded /portfolio)
+            return payload
+        return cache.put(key, versions, serialize(payload))
+    return refresh
+
+async def cached_response(request: Request, key, collections, load) -> Response:
+    """Serve key from the snapshot cache, calling `load()` only on a miss.
+
+    Concurrent misses share one `load()`; a stale snapshot, if still within
+    CACHE_STALE_SECONDS and not older than this worker's last write to its
+    collections, is served at once while `load()` runs in the background.
+
+    Answers 304 when the client's If-None-Match still matches the snapshot,
+    and serves the precompressed body the client's Accept-Encoding allows.
+    """
+    snapshot = cache.get(key, collections)
+    from_cache = snapshot is not None
+    if snapshot is None:
+        versions = cache.versions(collections)
+        # The versions are part of the flight key: a request arriving after a
+        # write never joins a load that started before it
+        flight = (current_tenant(), key, versions)
+        snapshot = cache.get_stale(key, collections)
+        if snapshot is not None:
+            from_cache = True
+            flights.spawn(flight, _snapshot_loader(key, versions, load))
+        else:
+            snapshot = await flights.do(flight, _snapshot_loader(key, versions, load))
+            if isinstance(snapshot, Response):
+                return snapshot
+
+    # Snapshots carry their compressed bodies, so CompressionMiddleware leaves these alone
+    encoding = None
+    if len(snapshot.body) >= COMPRESSION_MIN_SIZE:
+        encoding = negotiate(request.headers.get("accept-encoding"))
+    etag = variant_etag(snapshot.etag, encoding)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    vary = ["Accept-Encoding"] if COMPRESSION else []
+    if request.query_params.get("lang") == "auto":
+        vary.append("Accept-Language")
+    if vary:
+        headers["Vary"] = ", ".join(vary)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        cache.record_not_modified(from_cache)
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=await encoded_body(snapshot, encoding), media_type="application/json", headers=headers)
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get read cache hit/miss and request coalescing counters"""
+    return {**cache.stats(), "single_flight": flights.stats()}
+
+# Called with the collections touched by every successful write, after the
+# cache has been invalidated (e.g. StaticExporter.schedule, see server.py)
+write_hooks: List[Callable[..., None]] = []
+
+def collection_changed(*collection_names: str) -> None:
+    """Invalidate dependent snapshots and notify the write hooks"""
+    cache.invalidate(*collection_names)
+    for hook in write_hooks:
+        hook(*collection_names)
+
+# Called with (collection, [(id, fields), ...], partial) for the documents written
+# by the routes: the stored fields after an insert or update, None after a delete
+# (e.g. TechnologyIndex.apply, see server.py). Batch updates are `partial`: only
+# the fields they set, on documents that may not exist
+document_hooks: List[Callable[..., None]] = []
+
+def documents_changed(collection_name: str, changes: list, partial: bool = False) -> None:
+    if not changes:
+        return
+    for hook in document_hooks:
+        hook(collection_name, changes, partial)
+
+# Write helpers: every mutation is one round trip, the response is built from
+# what was sent (inserts) or returned atomically by the server (updates)
+async def insert_document(collection_name: str, item):
+    """Insert a model instance and return it as stored"""
+    document = item.dict(by_alias=True, exclude={"id"})
+    result = await mongo.db[collection_name].insert_one(stamp(document))
+    collection_changed(collection_name)
+    document["_id"] = result.inserted_id
+    documents_changed(collection_name, [(document["_id"], document)])
+    return type(item)(**object_id_str(document))
+
+async def update_document(collection_name: str, item_id: str, update, model, label: str):
+    """Apply a partial update and return the updated document in the same round trip"""
+    if not ObjectId.is_valid(item_id):
+        raise HTTPException(status_code=400, detail=f"Invalid {label.lower()} ID")
+    update_data = update.dict(exclude_unset=True)
+    update_data["updated_at"] = datetime.utcnow()
+    updated = await mongo.db[collection_name].find_one_and_update(
+        scoped({"_id": ObjectId(item_id)}),
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        raise HTTPException(status_code=404, detail=f"{label} not found")
+    collection_changed(collection_name)
+    documents_changed(collection_name, [(updated["_id"], updated)])
+    return model(**object_id_str(updated))
+
+async def delete_document(collection_name: str, item_id: str, label: str):
+    if not ObjectId.is_valid(item_id):
+        raise HTTPException(status_code=400, detail=f"Invalid {label.lower()} ID")
+    result = await mongo.db[collection_name].delete_one(scoped({"_id": ObjectId(item_id)}))
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail=f"{label} not found")
+    collection_changed(collection_name)
+    documents_changed(collection_name, [(ObjectId(item_id), None)])
+    return {"message": f"{label} deleted successfully"}
+
 # Personal Info Routes
+async def _load_personal_info(lang=None):
+    personal_info = await fetch_personal_info(lang)
+    if not personal_info:
+        raise HTTPException(status_code=404, detail="Personal info not found")
+    return to_response_items([personal_info], PersonalInfo, plain=lang is not None)[0]
+
 @router.get("/personal-info", response_model=PersonalInfo)
-async def get_personal_info():
+async def get_personal_info(request: Request, lang: Optional[str] = LANG_QUERY):
     """Get personal information"""
     try:
-        personal_info = await db.personal_info.find_one()
-        if not personal_info:
-            raise HTTPException(status_code=404, detail="Personal info not found")
-        personal_info = object_id_str(personal_info)
-        return PersonalInfo(**personal_info)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        lang = resolve_language(request, lang)
+        return await cached_response(
+            request, ("personal_info", lang), ["personal_info"], lambda: _load_personal_info(lang)
+        )
+    except Exception as e:
+        raise database_error(e)
 
 @router.put("/personal-info", response_model=PersonalInfo)
 async def update_personal_info(personal_info_update: PersonalInfoUpdate):
@@ -68,205 +370,341 @@ async def update_personal_info(personal_info_update: PersonalInfoUpdate):
     try:
         update_data = personal_info_update.dict(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow()
-        result = await db.personal_info.update_one(
-            {},
-            {"$set": update_data}
+        updated_info = await mongo.db.personal_info.find_one_and_update(
+            scoped({}),
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
         )
-        if result.matched_count == 0:
+        if updated_info is None:
             raise HTTPException(status_code=404, detail="Personal info not found")
-        updated_info = await db.personal_info.find_one()
-        updated_info = object_id_str(updated_info)
-        return PersonalInfo(**updated_info)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        collection_changed("personal_info")
+        return PersonalInfo(**object_id_str(updated_info))
+    except Exception as e:
+        raise database_error(e)
 
 # Skills Routes
+async def _load_skills(lang=None):
+    skills = await fetch_ordered(mongo.read_db.skills, {"is_active": True}, lang)
+    return to_response_items(skills, Skill, plain=lang is not None)
+
 @router.get("/skills", response_model=List[Skill])
-async def get_skills():
+async def get_skills(
+    request: Request, lang: Optional[str] = LANG_QUERY, page: ListParams = Depends(list_params)
+):
     """Get all active skills ordered"""
     try:
-        skills_cursor = db.skills.find({"is_active": True}).sort("order", 1)
-        skills = await skills_cursor.to_list(length=None)
-        return [Skill(**object_id_str(skill)) for skill in skills]
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        lang = resolve_language(request, lang)
+        if page.requested:
+            return await list_page(request, mongo.read_db.skills, {"is_active": True}, Skill, lang, page)
+        return await cached_response(request, ("skills", lang), ["skills"], lambda: _load_skills(lang))
+    except Exception as e:
+        raise database_error(e)
 
 @router.post("/skills", response_model=Skill)
 async def create_skill(skill_data: SkillCreate):
     """Create new skill"""
     try:
-        skill = Skill(**skill_data.dict())
-        result = await db.skills.insert_one(skill.dict(by_alias=True, exclude={"id"}))
-        created_skill = await db.skills.find_one({"_id": result.inserted_id})
-        created_skill = object_id_str(created_skill)
-        return Skill(**created_skill)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        return await insert_document("skills", Skill(**skill_data.dict()))
+    except Exception as e:
+        raise database_error(e)
 
 @router.put("/skills/{skill_id}", response_model=Skill)
 async def update_skill(skill_id: str, skill_update: SkillUpdate):
     """Update skill"""
     try:
-        if not ObjectId.is_valid(skill_id):
-            raise HTTPException(status_code=400, detail="Invalid skill ID")
-        update_data = skill_update.dict(exclude_unset=True)
-        update_data["updated_at"] = datetime.utcnow()
-        result = await db.skills.update_one(
-            {"_id": ObjectId(skill_id)},
-            {"$set": update_data}
-        )
-        if result.matched_count == 0:
-            raise HTTPException(status_code=404, detail="Skill not found")
-        updated_skill = await db.skills.find_one({"_id": ObjectId(skill_id)})
-        updated_skill = object_id_str(updated_skill)
-        return Skill(**updated_skill)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        return await update_document("skills", skill_id, skill_update, Skill, "Skill")
+    except Exception as e:
+        raise database_error(e)
 
 @router.delete("/skills/{skill_id}")
 async def delete_skill(skill_id: str):
     """Delete skill"""
     try:
-        if not ObjectId.is_valid(skill_id):
-            raise HTTPException(status_code=400, detail="Invalid skill ID")
-        result = await db.skills.delete_one({"_id": ObjectId(skill_id)})
-        if result.deleted_count == 0:
-            raise HTTPException(status_code=404, detail="Skill not found")
-        return {"message": "Skill deleted successfully"}
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        return await delete_document("skills", skill_id, "Skill")
+    except Exception as e:
+        raise database_error(e)
 
 # Education Routes
+async def _load_education(lang=None):
+    education = await fetch_ordered(mongo.read_db.education, {"is_active": True}, lang)
+    return to_response_items(education, Education, plain=lang is not None)
+
 @router.get("/education", response_model=List[Education])
-async def get_education():
+async def get_education(
+    request: Request, lang: Optional[str] = LANG_QUERY, page: ListParams = Depends(list_params)
+):
     """Get all active education ordered"""
     try:
-        education_cursor = db.education.find({"is_active": True}).sort("order", 1)
-        education = await education_cursor.to_list(length=None)
-        return [Education(**object_id_str(edu)) for edu in education]
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        lang = resolve_language(request, lang)
+        if page.requested:
+            return await list_page(request, mongo.read_db.education, {"is_active": True}, Education, lang, page)
+        return await cached_response(request, ("education", lang), ["education"], lambda: _load_education(lang))
+    except Exception as e:
+        raise database_error(e)
 
 @router.post("/education", response_model=Education)
 async def create_education(education_data: EducationCreate):
     """Create new education"""
     try:
-        education = Education(**education_data.dict())
-        result = await db.education.insert_one(education.dict(by_alias=True, exclude={"id"}))
-        created_education = await db.education.find_one({"_id": result.inserted_id})
-        created_education = object_id_str(created_education)
-        return Education(**created_education)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        return await insert_document("education", Education(**education_data.dict()))
+    except Exception as e:
+        raise database_error(e)
+
+@router.put("/education/{education_id}", response_model=Education)
+async def update_education(education_id: str, education_update: EducationUpdate):
+    """Update education"""
+    try:
+        return await update_document("education", education_id, education_update, Education, "Education")
+    except Exception as e:
+        raise database_error(e)
+
+@router.delete("/education/{education_id}")
+async def delete_education(education_id: str):
+    """Delete education"""
+    try:
+        return await delete_document("education", education_id, "Education")
+    except Exception as e:
+        raise database_error(e)
 
 # Projects Routes
+async def _load_projects(lang=None):
+    projects = await fetch_ordered(mongo.read_db.projects, {}, lang)
+    return to_response_items(projects, Project, plain=lang is not None)
+
 @router.get("/projects", response_model=List[Project])
-async def get_projects():
+async def get_projects(
+    request: Request, lang: Optional[str] = LANG_QUERY, page: ListParams = Depends(list_params)
+):
     """Get all projects ordered"""
     try:
-        projects_cursor = db.projects.find().sort("order", 1)
-        projects = await projects_cursor.to_list(length=None)
-        return [Project(**object_id_str(project)) for project in projects]
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        lang = resolve_language(request, lang)
+        if page.requested:
+            return await list_page(request, mongo.read_db.projects, {}, Project, lang, page)
+        return await cached_response(request, ("projects", lang), ["projects"], lambda: _load_projects(lang))
+    except Exception as e:
+        raise database_error(e)
+
+async def _load_featured_projects(lang=None):
+    featured_projects = await fetch_ordered(mongo.read_db.projects, {"featured": True}, lang)
+    return to_response_items(featured_projects, Project, plain=lang is not None)
 
 @router.get("/projects/featured", response_model=List[Project])
-async def get_featured_projects():
+async def get_featured_projects(
+    request: Request, lang: Optional[str] = LANG_QUERY, page: ListParams = Depends(list_params)
+):
     """Get featured projects"""
     try:
-        projects_cursor = db.projects.find({"featured": True}).sort("order", 1)
-        projects = await projects_cursor.to_list(length=None)
-        return [Project(**object_id_str(project)) for project in projects]
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        lang = resolve_language(request, lang)
+        if page.requested:
+            return await list_page(request, mongo.read_db.projects, {"featured": True}, Project, lang, page)
+        return await cached_response(request, ("featured_projects", lang), ["projects"], lambda: _load_featured_projects(lang))
+    except Exception as e:
+        raise database_error(e)
 
 @router.post("/projects", response_model=Project)
 async def create_project(project_data: ProjectCreate):
     """Create new project"""
     try:
-        project = Project(**project_data.dict())
-        result = await db.projects.insert_one(project.dict(by_alias=True, exclude={"id"}))
-        created_project = await db.projects.find_one({"_id": result.inserted_id})
-        created_project = object_id_str(created_project)
-        return Project(**created_project)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        return await insert_document("projects", Project(**project_data.dict()))
+    except Exception as e:
+        raise database_error(e)
+
+@router.put("/projects/{project_id}", response_model=Project)
+async def update_project(project_id: str, project_update: ProjectUpdate):
+    """Update project"""
+    try:
+        return await update_document("projects", project_id, project_update, Project, "Project")
+    except Exception as e:
+        raise database_error(e)
+
+@router.delete("/projects/{project_id}")
+async def delete_project(project_id: str):
+    """Delete project"""
+    try:
+        return await delete_document("projects", project_id, "Project")
+    except Exception as e:
+        raise database_error(e)
 
 # Goals Routes
+async def _load_goals(lang=None):
+    goals = await fetch_ordered(mongo.read_db.goals, {"is_active": True}, lang)
+    return to_response_items(goals, Goal, plain=lang is not None)
+
 @router.get("/goals", response_model=List[Goal])
-async def get_goals():
+async def get_goals(
+    request: Request, lang: Optional[str] = LANG_QUERY, page: ListParams = Depends(list_params)
+):
     """Get all active goals ordered"""
     try:
-        goals_cursor = db.goals.find({"is_active": True}).sort("order", 1)
-        goals = await goals_cursor.to_list(length=None)
-        return [Goal(**object_id_str(goal)) for goal in goals]
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        lang = resolve_language(request, lang)
+        if page.requested:
+            return await list_page(request, mongo.read_db.goals, {"is_active": True}, Goal, lang, page)
+        return await cached_response(request, ("goals", lang), ["goals"], lambda: _load_goals(lang))
+    except Exception as e:
+        raise database_error(e)
 
 @router.post("/goals", response_model=Goal)
 async def create_goal(goal_data: GoalCreate):
     """Create new goal"""
     try:
-        goal = Goal(**goal_data.dict())
-        result = await db.goals.insert_one(goal.dict(by_alias=True, exclude={"id"}))
-        created_goal = await db.goals.find_one({"_id": result.inserted_id})
-        created_goal = object_id_str(created_goal)
-        return Goal(**created_goal)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        return await insert_document("goals", Goal(**goal_data.dict()))
+    except Exception as e:
+        raise database_error(e)
+
+@router.put("/goals/{goal_id}", response_model=Goal)
+async def update_goal(goal_id: str, goal_update: GoalUpdate):
+    """Update goal"""
+    try:
+        return await update_document("goals", goal_id, goal_update, Goal, "Goal")
+    except Exception as e:
+        raise database_error(e)
+
+@router.delete("/goals/{goal_id}")
+async def delete_goal(goal_id: str):
+    """Delete goal"""
+    try:
+        return await delete_document("goals", goal_id, "Goal")
+    except Exception as e:
+        raise database_error(e)
 
 # Current Learning Routes
+async def _load_current_learning(lang=None):
+    current_learning = await fetch_ordered(mongo.read_db.current_learning, {"is_active": True}, lang)
+    return to_response_items(current_learning, CurrentLearning, plain=lang is not None)
+
 @router.get("/current-learning", response_model=List[CurrentLearning])
-async def get_current_learning():
+async def get_current_learning(
+    request: Request, lang: Optional[str] = LANG_QUERY, page: ListParams = Depends(list_params)
+):
     """Get all active current learning items ordered"""
     try:
-        learning_cursor = db.current_learning.find({"is_active": True}).sort("order", 1)
-        learning = await learning_cursor.to_list(length=None)
-        return [CurrentLearning(**object_id_str(item)) for item in learning]
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        lang = resolve_language(request, lang)
+        if page.requested:
+            return await list_page(request, mongo.read_db.current_learning, {"is_active": True}, CurrentLearning, lang, page)
+        return await cached_response(request, ("current_learning", lang), ["current_learning"], lambda: _load_current_learning(lang))
+    except Exception as e:
+        raise database_error(e)
 
 @router.post("/current-learning", response_model=CurrentLearning)
 async def create_current_learning(learning_data: CurrentLearningCreate):
     """Create new current learning item"""
     try:
-        learning = CurrentLearning(**learning_data.dict())
-        result = await db.current_learning.insert_one(learning.dict(by_alias=True, exclude={"id"}))
-        created_learning = await db.current_learning.find_one({"_id": result.inserted_id})
-        created_learning = object_id_str(created_learning)
-        return CurrentLearning(**created_learning)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
+        return await insert_document("current_learning", CurrentLearning(**learning_data.dict()))
+    except Exception as e:
+        raise database_error(e)
+
+@router.put("/current-learning/{learning_id}", response_model=CurrentLearning)
+async def update_current_learning(learning_id: str, learning_update: CurrentLearningUpdate):
+    """Update current learning item"""
+    try:
+        return await update_document("current_learning", learning_id, learning_update, CurrentLearning, "Current learning item")
+    except Exception as e:
+        raise database_error(e)
+
+@router.delete("/current-learning/{learning_id}")
+async def delete_current_learning(learning_id: str):
+    """Delete current learning item"""
+    try:
+        return await delete_document("current_learning", learning_id, "Current learning item")
+    except Exception as e:
+        raise database_error(e)
 
 # Portfolio Data (Aggregate)
-@router.get("/portfolio")
-async def get_portfolio_data():
-    """Get all portfolio data in one call"""
+def _bounded(section, coroutine):
+    """Schedule one timed /portfolio sub-query, bounded by the sub-query timeout"""
+    return asyncio.ensure_future(
+        asyncio.wait_for(timed(f"portfolio.{section}", coroutine), PORTFOLIO_QUERY_TIMEOUT)
+    )
+
+async def _load_portfolio(lang=None):
+    # All six reads are started at once so the latency is the slowest query,
+    # not the sum of them.
+    personal_info_task = _bounded("personal_info", fetch_personal_info(lang))
+    section_tasks = {
+        section: _bounded(section, fetch_ordered(mongo.read_db[section], query, lang))
+        for section, query in PORTFOLIO_SECTIONS.items()
+    }
     try:
-        personal_info = await db.personal_info.find_one()
-        skills_cursor = db.skills.find({"is_active": True}).sort("order", 1)
-        skills = await skills_cursor.to_list(length=None)
-        education_cursor = db.education.find({"is_active": True}).sort("order", 1)
-        education = await education_cursor.to_list(length=None)
-        projects_cursor = db.projects.find().sort("order", 1)
-        projects = await projects_cursor.to_list(length=None)
-        goals_cursor = db.goals.find({"is_active": True}).sort("order", 1)
-        goals = await goals_cursor.to_list(length=None)
-        learning_cursor = db.current_learning.find({"is_active": True}).sort("order", 1)
-        current_learning = await learning_cursor.to_list(length=None)
+        personal_info = await personal_info_task
         if not personal_info:
+            # Nothing to render without personal info. The section queries
+            # were sent with it: cancelling them only stops waiting for their
+            # results, the server still runs them to completion.
             raise HTTPException(status_code=404, detail="Personal info not found")
-        portfolio_data = {
-            "personal_info": object_id_str(personal_info),
-            "skills": [object_id_str(skill) for skill in skills],
-            "education": [object_id_str(edu) for edu in education],
-            "projects": [object_id_str(project) for project in projects],
-            "goals": [object_id_str(goal) for goal in goals],
-            "current_learning": [object_id_str(item) for item in current_learning]
-        }
-        return {
-            "success": True,
-            "data": portfolio_data
-        }
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error")
\ No newline at end of file
+
+        results = await asyncio.gather(*section_tasks.values(), return_exceptions=True)
+    finally:
+        for task in section_tasks.values():
+            task.cancel()
+
+    if not FAST_JSON:
+        personal_info = object_id_str(personal_info)
+    portfolio_data = {"personal_info": personal_info}
+    errors = []
+    for section, result in zip(section_tasks, results):
+        if isinstance(result, BaseException):
+            if PORTFOLIO_PARTIAL_FAILURE != "empty":
+                raise result
+            logger.warning("Portfolio section %s failed: %r", section, result)
+            errors.append(section)
+            result = []
+        portfolio_data[section] = result if FAST_JSON else [object_id_str(doc) for doc in result]
+
+    response = {
+        "success": True,
+        "data": portfolio_data
+    }
+    if errors:
+        # A degraded aggregate is served as is but never cached
+        response["errors"] = errors
+        return Response(content=serialize(response), media_type="application/json")
+    return response
+
+async def load_portfolio_section(section: str, lang=None, db=None):
+    """One section of the /portfolio payload, ready for serialize() (used by static_export.py)"""
+    if section == "personal_info":
+        personal_info = await fetch_personal_info(lang, db)
+        if not personal_info:
+            raise HTTPException(status_code=404, detail="Personal info not found")
+        return personal_info if FAST_JSON else object_id_str(personal_info)
+    db = db if db is not None else mongo.read_db
+    documents = await fetch_ordered(db[section], PORTFOLIO_SECTIONS[section], lang)
+    return documents if FAST_JSON else [object_id_str(doc) for doc in documents]
+
+def cached_reads(lang=None):
+    """(cache key, collections, loader) of every cached GET route, as the routes use them"""
+    return [
+        (("portfolio", lang), PORTFOLIO_COLLECTIONS, lambda: _load_portfolio(lang)),
+        (("personal_info", lang), ["personal_info"], lambda: _load_personal_info(lang)),
+        (("skills", lang), ["skills"], lambda: _load_skills(lang)),
+        (("education", lang), ["education"], lambda: _load_education(lang)),
+        (("projects", lang), ["projects"], lambda: _load_projects(lang)),
+        (("featured_projects", lang), ["projects"], lambda: _load_featured_projects(lang)),
+        (("goals", lang), ["goals"], lambda: _load_goals(lang)),
+        (("current_learning", lang), ["current_learning"], lambda: _load_current_learning(lang)),
+    ]
+
+async def prewarm(languages=(None, *SUPPORTED_LANGUAGES)) -> int:
+    """Build the snapshot of every cached GET route up front; returns how many were cached"""
+    loads = []
+    for lang in languages:
+        for key, collections, load in cached_reads(lang):
+            versions = cache.versions(collections)
+            loads.append(flights.do((current_tenant(), key, versions), _snapshot_loader(key, versions, load)))
+    results = await asyncio.gather(*loads, return_exceptions=True)
+    for result in results:
+        # A 404 (e.g. no personal info yet) is an answer, not a failure
+        if isinstance(result, BaseException) and not isinstance(result, HTTPException):
+            logger.warning("Cache warm-up load failed: %r", result)
+    return sum(1 for result in results if isinstance(result, Snapshot))
+
+@router.get("/portfolio")
+async def get_portfolio_data(request: Request, lang: Optional[str] = LANG_QUERY):
+    """Get all portfolio data in one call"""
+    try:
+        lang = resolve_language(request, lang)
+        return await cached_response(
+            request, ("portfolio", lang), PORTFOLIO_COLLECTIONS, lambda: _load_portfolio(lang)
+        )
+    except Exception as e:
+        raise database_error(e)
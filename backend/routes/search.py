@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import Response
+from typing import List, Literal, Optional
+import asyncio
+import os
+
+from database import database_error, mongo
+from routes.portfolio import (
+    LANG_QUERY, ORDER_SORT, language_projection, object_id_str, resolve_language, serialize
+)
+from search_index import FACET_COLLECTIONS, TechnologyIndex
+from tenancy import response_fields, scoped
+
+router = APIRouter()
+
+MAX_SEARCH_RESULTS = 100
+
+# Technology facets, answered from memory. The write routes update the index
+# per document, CacheSync reloads what other workers write, and the periodic
+# reload catches the rest.
+tech_index = TechnologyIndex(
+    refresh_interval=float(os.environ.get('SEARCH_INDEX_REFRESH_SECONDS', '300')),
+)
+
+SearchCollection = Literal["projects", "skills"]
+
+def search_pipeline(collection_name: str, q: Optional[str], technologies: List[str], lang: Optional[str], limit: int) -> list:
+    """Text matches by relevance, or the list order without `q`; both use an index (see indexes.py)"""
+    query = scoped(dict(FACET_COLLECTIONS[collection_name]))
+    if technologies:
+        query["technologies"] = {"$all": technologies}
+    if q:
+        # $text must be in the first $match stage
+        query["$text"] = {"$search": q}
+        pipeline = [
+            {"$match": query},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            {"$sort": {"score": -1, **dict(ORDER_SORT)}},
+        ]
+    else:
+        pipeline = [{"$match": query}, {"$sort": dict(ORDER_SORT)}]
+    pipeline.append({"$limit": limit})
+    if response_fields(None):
+        pipeline.append({"$project": response_fields(None)})
+    if lang:
+        pipeline.append({"$addFields": language_projection(collection_name, lang)})
+    return pipeline
+
+async def _search(collection_name: str, q, technologies, lang, limit):
+    pipeline = search_pipeline(collection_name, q, technologies, lang, limit)
+    documents = await mongo.read_db[collection_name].aggregate(pipeline).to_list(length=limit)
+    # Scored and language-projected documents no longer fit the models
+    return object_id_str(documents)
+
+@router.get("/search")
+async def search(
+    request: Request,
+    q: Optional[str] = Query(None, max_length=200, description="Words to find in titles, descriptions and technologies"),
+    tech: List[str] = Query([], description="Only documents listing every one of these technologies"),
+    lang: Optional[str] = LANG_QUERY,
+    collection: Optional[SearchCollection] = Query(None, alias="type"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+):
+    """Search projects and skills by text and technology"""
+    try:
+        lang = resolve_language(request, lang)
+        technologies = tech_index.canonical(tech)
+        names = [collection] if collection else list(FACET_COLLECTIONS)
+        results = await asyncio.gather(*(_search(name, q, technologies, lang, limit) for name in names))
+        payload = {"query": q, "technologies": technologies, **dict(zip(names, results))}
+        return Response(content=serialize(payload), media_type="application/json")
+    except Exception as e:
+        raise database_error(e)
+
+@router.get("/search/facets")
+async def get_facets(
+    tech: List[str] = Query([], description="Count among the documents listing every one of these technologies"),
+    collection: Optional[SearchCollection] = Query(None, alias="type"),
+):
+    """Per-technology document counts, from the in-memory index"""
+    try:
+        if not tech_index.loaded:
+            await tech_index.load(mongo.read_db)
+        technologies = tech_index.canonical(tech)
+        names = [collection] if collection else list(FACET_COLLECTIONS)
+        return {"technologies": technologies, **{name: tech_index.facets(name, technologies) for name in names}}
+    except Exception as e:
+        raise database_error(e)
+
+@router.get("/search/stats")
+async def get_search_index_stats():
+    """Get technology index size and update counters"""
+    return tech_index.stats()
@@ -0,0 +1,190 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from pymongo.errors import CollectionInvalid, OperationFailure
+from typing import List, Literal, Optional
+from datetime import datetime
+import asyncio
+import logging
+import orjson
+import os
+import uuid
+
+from database import database_error, mongo
+from pagination import (
+    MAX_PAGE_SIZE, ListParams, decode_cursor, keyset_filter, list_params,
+    ndjson_lines, next_page_headers, projection
+)
+from status_ingest import IngestClosed, StatusIngestBuffer
+from status_rollup import ROLLUP_COLLECTION, RollupBuffer, record_status_checks, rollup_query
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+# STATUS_INGEST_MODE:
+#   "direct" -> one insert_one per request (default)
+#   "ack"    -> batched with insert_many, the request returns once its batch is written
+#   "fire"   -> batched, the request returns as soon as the record is queued
+STATUS_INGEST_MODE = os.environ.get('STATUS_INGEST_MODE', 'direct')
+
+async def _record_rollups(documents: List[dict]) -> None:
+    await record_status_checks(mongo.db, documents)
+
+status_buffer = StatusIngestBuffer(
+    durability=STATUS_INGEST_MODE,
+    batch_size=int(os.environ.get('STATUS_BATCH_SIZE', '500')),
+    flush_interval=float(os.environ.get('STATUS_FLUSH_INTERVAL_MS', '50')) / 1000,
+    max_queue=int(os.environ.get('STATUS_QUEUE_SIZE', '10000')),
+    enqueue_timeout=float(os.environ.get('STATUS_ENQUEUE_TIMEOUT_MS', '100')) / 1000,
+    on_flush=_record_rollups,
+)
+
+# Rollups of the checks stored in direct mode, written in batches instead of per request
+rollup_buffer = RollupBuffer(
+    flush_interval=float(os.environ.get('STATUS_ROLLUP_FLUSH_MS', '1000')) / 1000,
+    batch_size=int(os.environ.get('STATUS_BATCH_SIZE', '500')),
+)
+
+# Retention: STATUS_CAPPED_BYTES makes status_checks a capped collection;
+# the STATUS_TTL_SECONDS alternative lives with the other indexes in indexes.py
+STATUS_CAPPED_BYTES = int(os.environ.get('STATUS_CAPPED_BYTES', '0'))
+
+class StatusCheck(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    client_name: str
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+class StatusCheckCreate(BaseModel):
+    client_name: str
+
+class StatusRollup(BaseModel):
+    client_name: str
+    bucket: datetime
+    count: int
+    first: datetime
+    last: datetime
+
+# A year of daily buckets for a few dozen clients fits; finer requests must narrow the range
+MAX_ROLLUP_BUCKETS = 10000
+
+async def start_status_ingest(db) -> None:
+    """Create the capped collection if configured, then start the write buffer.
+
+    Must finish before ensure_indexes(): createIndexes on a missing
+    status_checks creates it, uncapped.
+    """
+    if STATUS_CAPPED_BYTES:
+        created = False
+        if "status_checks" not in await db.list_collection_names():
+            try:
+                await db.create_collection("status_checks", capped=True, size=STATUS_CAPPED_BYTES)
+                created = True
+            except (CollectionInvalid, OperationFailure) as e:
+                # Another worker got there first (NamespaceExists)
+                if isinstance(e, OperationFailure) and e.code != 48:
+                    raise
+        if not created:
+            options = await db.status_checks.options()
+            if not options.get("capped"):
+                # convertToCapped rewrites the whole collection: leave it to an operator
+                logger.warning(
+                    "status_checks exists and is not capped; run convertToCapped to enable STATUS_CAPPED_BYTES"
+                )
+    if STATUS_INGEST_MODE != "direct":
+        status_buffer.start(db.status_checks)
+    else:
+        rollup_buffer.start(db)
+
+@router.post("/status", response_model=StatusCheck)
+async def create_status_check(input: StatusCheckCreate):
+    status_dict = input.dict()
+    status_obj = StatusCheck(**status_dict)
+    try:
+        if STATUS_INGEST_MODE == "direct":
+            document = status_obj.dict()
+            _ = await mongo.db.status_checks.insert_one(document)
+            rollup_buffer.add(document)
+        else:
+            await status_buffer.submit(status_obj.dict())
+    except (asyncio.QueueFull, IngestClosed):
+        raise HTTPException(status_code=503, detail="Status ingestion is busy", headers={"Retry-After": "1"})
+    except Exception as e:
+        raise database_error(e)
+    return status_obj
+
+@router.get("/status/ingest")
+async def get_status_ingest_stats():
+    """Get status check write buffer counters"""
+    return {"mode": STATUS_INGEST_MODE, **status_buffer.stats(), "rollups": rollup_buffer.stats()}
+
+@router.get("/status/rollup", response_model=List[StatusRollup])
+async def get_status_rollup(
+    granularity: Literal["minute", "hour", "day"] = "hour",
+    client_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Get status check counts per client and time bucket, oldest first"""
+    try:
+        buckets = await mongo.read_db[ROLLUP_COLLECTION].find(
+            rollup_query(granularity, client_name, since, until), {"_id": 0, "granularity": 0}
+        ).sort([("bucket", 1), ("client_name", 1)]).to_list(length=MAX_ROLLUP_BUCKETS + 1)
+    except Exception as e:
+        raise database_error(e)
+    if len(buckets) > MAX_ROLLUP_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"More than {MAX_ROLLUP_BUCKETS} buckets: narrow since/until or use a coarser granularity",
+        )
+    return [StatusRollup(**bucket) for bucket in buckets]
+
+# Status checks are paged in insertion order; _id breaks timestamp ties
+STATUS_KEYS = ["timestamp", "_id"]
+
+def status_filter(client_name: Optional[str], since: Optional[datetime], until: Optional[datetime]) -> dict:
+    query = {}
+    if client_name is not None:
+        query["client_name"] = client_name
+    time_range = {}
+    if since is not None:
+        time_range["$gte"] = since
+    if until is not None:
+        time_range["$lt"] = until
+    if time_range:
+        query["timestamp"] = time_range
+    return query
+
+@router.get("/status", response_model=List[StatusCheck])
+async def get_status_checks(
+    request: Request,
+    response: Response,
+    page: ListParams = Depends(list_params),
+    client_name: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Only checks at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only checks before this time"),
+):
+    query = status_filter(client_name, since, until)
+    if page.after:
+        query = {"$and": [query, keyset_filter(STATUS_KEYS, decode_cursor(page.after, STATUS_KEYS))]}
+    limit = page.limit or (None if page.stream else MAX_PAGE_SIZE)
+    cursor = mongo.read_db.status_checks.find(query, projection(page.fields, STATUS_KEYS)).sort(
+        [(key, 1) for key in STATUS_KEYS]
+    )
+    if limit:
+        cursor = cursor.limit(limit)
+    if page.stream:
+        return StreamingResponse(
+            ndjson_lines(cursor, lambda doc: orjson.dumps(doc, default=str)),
+            media_type="application/x-ndjson",
+        )
+
+    status_checks = await cursor.to_list(length=limit)
+    # A full page means there may be more: say so instead of truncating silently
+    response.headers.update(next_page_headers(request.url, status_checks, limit, STATUS_KEYS))
+    if page.fields:
+        return JSONResponse(
+            jsonable_encoder([{k: v for k, v in doc.items() if k != "_id"} for doc in status_checks])
+        )
+    return [StatusCheck(**status_check) for status_check in status_checks]
@@ -0,0 +1,233 @@
+"""In-memory technology facets over projects and skills.
+
+An inverted index, technology -> ids of the documents listing it, per
+collection. Facet counts, with or without technologies already selected, are
+set intersections and a count over the matching documents, so they take
+microseconds whatever the size of the collections and never reach MongoDB.
+
+The index is loaded once at startup and then kept current by the write
+routes, which report every document they insert, update or delete
+(`apply()`, through routes.portfolio.document_hooks). Writes made by other
+workers reach it through CacheSync, whose invalidations reload the collections
+they name (`refresh()`, see server.py). Anything else that bypasses this API
+(seed_data.py, manual changes with CACHE_SYNC_MODE=off) is picked up by a full
+reload every `refresh_interval` seconds.
+
+Everything is partitioned by tenant (tenancy.py): counts only ever cover the
+current tenant's documents.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from tenancy import TENANT_FIELD, current_tenant
+
+logger = logging.getLogger(__name__)
+
+# Collection -> filter of the documents that are counted, as the list routes show them
+FACET_COLLECTIONS = {
+    'projects': {},
+    'skills': {"is_active": True},
+}
+
+
+class TechnologyIndex:
+    def __init__(self, collections: Dict[str, dict] = FACET_COLLECTIONS, refresh_interval: float = 300.0):
+        self.collections = collections
+        self.refresh_interval = refresh_interval
+        self.db = None
+        # collection -> tenant -> document id -> its technologies
+        self._documents: Dict[str, Dict[Optional[str], Dict[Hashable, Tuple[str, ...]]]] = {}
+        # collection -> tenant -> technology -> ids of the documents listing it
+        self._postings: Dict[str, Dict[Optional[str], Dict[str, Set[Hashable]]]] = {}
+        # collection -> document id -> its tenant
+        self._owners: Dict[str, Dict[Hashable, Optional[str]]] = {}
+        # tenant -> casefolded name -> name as stored, so filters are case-insensitive
+        self._names: Dict[Optional[str], Dict[str, str]] = {}
+        for name in collections:
+            self._clear(name)
+        self.loaded = False
+        self.loads = 0
+        self.updates = 0
+        self.last_load_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+        # collection -> its background reload; collections written again while it runs
+        self._reloading: Dict[str, asyncio.Task] = {}
+        self._reload_again: Set[str] = set()
+
+    def start(self, db) -> None:
+        """Reload periodically in the background (the first load is awaited separately)"""
+        self.db = db
+        if self._task is None and self.refresh_interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = [task for task in (self._task, *self._reloading.values()) if task is not None]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.load(self.db)
+            except Exception as e:
+                # The previous index keeps serving
+                logger.warning("Technology index reload failed: %r", e)
+
+    def _clear(self, collection: str) -> None:
+        self._documents[collection] = {}
+        self._postings[collection] = {}
+        self._owners[collection] = {}
+
+    async def load(self, db, collections: Optional[Iterable[str]] = None) -> None:
+        """Rebuild the index of `collections` (default all) from the database, for every tenant"""
+        started = time.perf_counter()
+        names = list(collections or self.collections)
+        contents = await asyncio.gather(*(
+            db[name].find(self.collections[name], {"technologies": 1, TENANT_FIELD: 1}).to_list(length=None)
+            for name in names
+        ))
+        for name, documents in zip(names, contents):
+            self._clear(name)
+            for document in documents:
+                self._add(name, document.get(TENANT_FIELD), document["_id"], document.get("technologies") or [])
+        self.loaded = True
+        self.loads += 1
+        self.last_load_ms = (time.perf_counter() - started) * 1000
+
+    def _add(self, collection: str, tenant: Optional[str], document_id: Hashable, technologies: Iterable[str]) -> None:
+        technologies = tuple(dict.fromkeys(technologies))
+        self._documents[collection].setdefault(tenant, {})[document_id] = technologies
+        self._owners[collection][document_id] = tenant
+        postings = self._postings[collection].setdefault(tenant, {})
+        names = self._names.setdefault(tenant, {})
+        for technology in technologies:
+            postings.setdefault(technology, set()).add(document_id)
+            names.setdefault(technology.casefold(), technology)
+
+    def _remove(self, collection: str, document_id: Hashable) -> Optional[Tuple[str, ...]]:
+        if document_id not in self._owners[collection]:
+            return None
+        tenant = self._owners[collection].pop(document_id)
+        technologies = self._documents[collection][tenant].pop(document_id)
+        postings = self._postings[collection][tenant]
+        for technology in technologies:
+            ids = postings.get(technology)
+            if ids is not None:
+                ids.discard(document_id)
+                if not ids:
+                    del postings[technology]
+        return technologies
+
+    def apply(self, collection: str, changes: Iterable[Tuple[Hashable, Optional[dict]]], partial: bool = False) -> None:
+        """Apply written documents: (id, stored fields) after an insert or update, (id, None) after a delete.
+
+        `partial` fields only hold what an update set (batch updates), and the
+        document may not exist: technologies missing from them are kept from
+        the indexed document, and a document that isn't indexed is left to a
+        reload rather than added.
+        """
+        if collection not in self.collections:
+            return
+        query = self.collections[collection]
+        stale = False
+        for document_id, fields in changes:
+            self.updates += 1
+            tenant = self._owners[collection].get(document_id, current_tenant())
+            known = self._remove(collection, document_id)
+            if fields is None or any(key in fields and fields[key] != value for key, value in query.items()):
+                continue
+            technologies = fields.get("technologies", known)
+            if technologies is None or (known is None and partial):
+                # A partial update of a document that was not indexed: only a reload can tell
+                stale = True
+                continue
+            self._add(collection, fields.get(TENANT_FIELD, tenant), document_id, technologies)
+        if stale:
+            self.refresh(collection)
+
+    def refresh(self, *collections: str) -> None:
+        """Reload `collections` in the background, e.g. after another worker wrote to them.
+
+        One reload runs per collection at a time; changes arriving meanwhile
+        cause a single further reload once it finishes.
+        """
+        if self.db is None:
+            return
+        for name in collections:
+            if name not in self.collections:
+                continue
+            if name in self._reloading:
+                self._reload_again.add(name)
+            else:
+                self._reloading[name] = asyncio.get_running_loop().create_task(self._reload(name))
+
+    async def _reload(self, collection: str) -> None:
+        try:
+            while True:
+                self._reload_again.discard(collection)
+                try:
+                    await self.load(self.db, [collection])
+                except Exception as e:
+                    logger.warning("Technology index reload of %s failed: %r", collection, e)
+                if collection not in self._reload_again:
+                    return
+        finally:
+            del self._reloading[collection]
+
+    def canonical(self, technologies: Iterable[str]) -> List[str]:
+        """Technology names as the current tenant stored them, matched case-insensitively (unknown names are kept as given)"""
+        names = self._names.get(current_tenant(), {})
+        return [names.get(name.casefold(), name) for name in technologies]
+
+    def matching(self, collection: str, technologies: Iterable[str]) -> Set[Hashable]:
+        """Ids of the current tenant's documents listing every one of `technologies`"""
+        tenant = current_tenant()
+        postings = self._postings[collection].get(tenant, {})
+        selected = sorted((postings.get(name, set()) for name in technologies), key=len)
+        if not selected:
+            return set(self._documents[collection].get(tenant, ()))
+        return set.intersection(*selected)
+
+    def facets(self, collection: str, technologies: Iterable[str] = ()) -> dict:
+        """The current tenant's matching documents and per-technology counts among them, most frequent first"""
+        tenant = current_tenant()
+        technologies = list(technologies)
+        documents = self._documents[collection].get(tenant, {})
+        if technologies:
+            ids = self.matching(collection, technologies)
+            counts = Counter(name for document_id in ids for name in documents[document_id])
+            total = len(ids)
+        else:
+            counts = {name: len(ids) for name, ids in self._postings[collection].get(tenant, {}).items()}
+            total = len(documents)
+        return {
+            "total": total,
+            "technologies": [
+                {"name": name, "count": count}
+                for name, count in sorted(counts.items(), key=lambda item: (-item[1], item[0].casefold()))
+            ],
+        }
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "loads": self.loads,
+            "updates": self.updates,
+            "last_load_ms": round(self.last_load_ms, 3),
+            "tenants": len(self._names),
+            **{f"{name}_documents": len(owners) for name, owners in self._owners.items()},
+            **{
+                f"{name}_technologies": sum(len(postings) for postings in tenants.values())
+                for name, tenants in self._postings.items()
+            },
+        }
@@ -1,36 +1,21 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from database import mongo
 from models.portfolio import (
     PersonalInfo, Skill, Education, Project, Goal, CurrentLearning,
     MultiLanguageField, ContactInfo
 )
-import os
 import asyncio
-from datetime import datetime
-from dotenv import load_dotenv
-from pathlib import Path
+import time
+from typing import Dict, List
 
-async def seed_database():
-    """Seed database with initial portfolio data"""
-    
-    # Load environment variables
-    ROOT_DIR = Path(__file__).parent
-    load_dotenv(ROOT_DIR / '.env')
-    
-    # Database connection
-    mongo_url = os.environ['MONGO_URL']
-    db_name = os.environ['DB_NAME']
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[db_name]
-    
-    print("🌱 Starting database seeding...")
-    
-    # Clear existing data
-    collections = ['personal_info', 'skills', 'education', 'projects', 'goals', 'current_learning']
-    for collection in collections:
-        await db[collection].delete_many({})
-        print(f"Cleared {collection} collection")
-    
-    # Seed Personal Info
+from tenancy import scoped, stamp
+
+COLLECTIONS = ['personal_info', 'skills', 'education', 'projects', 'goals', 'current_learning']
+
+def build_seed_documents() -> Dict[str, List[dict]]:
+    """Initial portfolio data, as insert-ready documents per collection"""
+    documents = {}
+
+    # Personal Info
     personal_info = PersonalInfo(
         name="Pedro Gomes",
         title=MultiLanguageField(
@@ -57,8 +42,7 @@ async def seed_database():
         )
     )
     
-    await db.personal_info.insert_one(personal_info.dict(by_alias=True, exclude={"id"}))
-    print("✅ Personal info seeded")
+    documents["personal_info"] = [personal_info.dict(by_alias=True, exclude={"id"})]
     
     # Seed Skills
     skills_data = [
@@ -84,11 +68,9 @@ async def seed_database():
         }
     ]
     
-    for skill_data in skills_data:
-        skill = Skill(**skill_data)
-        await db.skills.insert_one(skill.dict(by_alias=True, exclude={"id"}))
-    
-    print("✅ Skills seeded")
+    documents["skills"] = [
+        Skill(**skill_data).dict(by_alias=True, exclude={"id"}) for skill_data in skills_data
+    ]
     
     # Seed Education
     education_data = [
@@ -120,11 +102,9 @@ async def seed_database():
         }
     ]
     
-    for edu_data in education_data:
-        education = Education(**edu_data)
-        await db.education.insert_one(education.dict(by_alias=True, exclude={"id"}))
-    
-    print("✅ Education seeded")
+    documents["education"] = [
+        Education(**edu_data).dict(by_alias=True, exclude={"id"}) for edu_data in education_data
+    ]
     
     # Seed Projects (placeholder)
     project_data = {
@@ -142,8 +122,7 @@ async def seed_database():
     }
     
     project = Project(**project_data)
-    await db.projects.insert_one(project.dict(by_alias=True, exclude={"id"}))
-    print("✅ Projects seeded")
+    documents["projects"] = [project.dict(by_alias=True, exclude={"id"})]
     
     # Seed Goals
     goals_data = [
@@ -177,11 +156,9 @@ async def seed_database():
         }
     ]
     
-    for goal_data in goals_data:
-        goal = Goal(**goal_data)
-        await db.goals.insert_one(goal.dict(by_alias=True, exclude={"id"}))
-    
-    print("✅ Goals seeded")
+    documents["goals"] = [
+        Goal(**goal_data).dict(by_alias=True, exclude={"id"}) for goal_data in goals_data
+    ]
     
     # Seed Current Learning
     learning_data = [
@@ -222,14 +199,42 @@ async def seed_database():
         }
     ]
     
-    for learning_item in learning_data:
-        current_learning = CurrentLearning(**learning_item)
-        await db.current_learning.insert_one(current_learning.dict(by_alias=True, exclude={"id"}))
-    
-    print("✅ Current learning seeded")
-    
-    client.close()
-    print("🎉 Database seeding completed successfully!")
+    documents["current_learning"] = [
+        CurrentLearning(**learning_item).dict(by_alias=True, exclude={"id"}) for learning_item in learning_data
+    ]
+
+    return documents
+
+async def reseed_collection(db, name: str, documents: List[dict]) -> int:
+    """Replace the contents of one collection (the current tenant's part of it) with a single unordered bulk insert"""
+    await db[name].delete_many(scoped({}))
+    if documents:
+        await db[name].insert_many([stamp(document) for document in documents], ordered=False)
+    return len(documents)
+
+async def seed_database(db=None):
+    """Seed database with initial portfolio data"""
+    # Only close the shared client if this call is the one that opened it
+    own_client = db is None and mongo.client is None
+    if db is None:
+        db = mongo.db
+
+    print("🌱 Starting database seeding...")
+    started = time.perf_counter()
+
+    # Every collection is cleared and bulk inserted concurrently
+    documents = build_seed_documents()
+    counts = await asyncio.gather(*(
+        reseed_collection(db, name, documents[name]) for name in COLLECTIONS
+    ))
+    for name, count in zip(COLLECTIONS, counts):
+        print(f"✅ {name} seeded ({count} documents)")
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts)
+    print(f"🎉 Database seeding completed successfully! {total} documents in {elapsed:.3f}s ({total / elapsed:.0f} docs/s)")
+    if own_client:
+        mongo.close()
 
 if __name__ == "__main__":
-    asyncio.run(seed_database())
\ No newline at end of file
+    asyncio.run(seed_database())
@@ -1,82 +1,271 @@
-from fastapi import FastAPI, APIRouter
-from dotenv import load_dotenv
-from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import logging
-from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List
-import uuid
-from datetime import datetime
+import time
+
+# First: loads .env before the modules below read their settings
+from database import mongo
+from fastapi import FastAPI, APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.middleware.cors import CORSMiddleware
 
 # Import portfolio routes
-from routes.portfolio import router as portfolio_router
+from routes.portfolio import (
+    router as portfolio_router, cache as portfolio_cache, document_hooks, flights, prewarm,
+    PORTFOLIO_COLLECTIONS, write_hooks
+)
+from routes.batch import router as batch_router
+from routes.search import router as search_router, tech_index
+from routes.status import router as status_router, rollup_buffer, start_status_ingest, status_buffer
+from cache_sync import CacheSync
+from health import HealthChecker
+from indexes import ensure_indexes
+from compression import COMPRESSION, CompressionMiddleware
+from admission import ADMISSION_CONTROL, AdmissionController, AdmissionMiddleware
+from metrics import METRICS_ENABLED, SERVER_TIMING, MetricsMiddleware, metrics
+from tenancy import TENANCY, KnownTenants, TenantMiddleware
+
+# Build every cached read before the worker reports ready ("off" leaves the
+# first request of each route to build it)
+CACHE_PREWARM = os.environ.get('CACHE_PREWARM', 'on').lower() not in ('0', 'off', 'false', 'no')
+# Upper bound on index checks + warm-up; past it the worker starts with a cold cache
+STARTUP_WARMUP_TIMEOUT = float(os.environ.get('STARTUP_WARMUP_TIMEOUT', '30'))
+STATIC_EXPORT_DIR = os.environ.get('STATIC_EXPORT_DIR')
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# Keeps this worker's portfolio cache in step with writes made by other workers
+# CACHE_SYNC_MODE: "auto" (change streams, polling on a standalone mongod),
+# "change_stream", "poll" or "off"
+cache_sync = CacheSync(
+    portfolio_cache,
+    mode=os.environ.get('CACHE_SYNC_MODE', 'auto'),
+    poll_interval=float(os.environ.get('CACHE_SYNC_POLL_INTERVAL', '5')),
+)
+
+# Static /portfolio snapshots for nginx or a CDN, rebuilt after every write
+static_exporter = None
+if STATIC_EXPORT_DIR and TENANCY != "off":
+    # The export holds a single portfolio
+    logger.warning("STATIC_EXPORT_DIR is ignored with TENANCY=%s", TENANCY)
+elif STATIC_EXPORT_DIR:
+    # Only imported when enabled
+    from static_export import StaticExporter
+
+    static_exporter = StaticExporter(STATIC_EXPORT_DIR)
+    write_hooks.append(static_exporter.schedule)
+
+# Requests for tenants without a personal_info are 404s before reaching the routes
+known_tenants = KnownTenants()
+
+# Concurrency budgets per route class and per-client rate limits (see admission.py)
+admission = AdmissionController.from_env()
+
+# Technology facets follow every document the routes write, and reload the
+# collections other workers write
+document_hooks.append(tech_index.apply)
+cache_sync.listeners.append(tech_index.refresh)
+
+# Health probes read the result of a background ping instead of pinging per call
+health = HealthChecker(
+    interval=float(os.environ.get('HEALTH_CHECK_INTERVAL', '5')),
+    timeout=float(os.environ.get('HEALTH_CHECK_TIMEOUT', '2')),
+)
+
+async def _ensure_indexes():
+    try:
+        await ensure_indexes(mongo.db)
+    except Exception as e:
+        # Queries still work without indexes, only slower: don't keep the worker down
+        logger.error(f"Could not ensure indexes: {e}")
+
+async def _prewarm():
+    if not CACHE_PREWARM:
+        return
+    if TENANCY != "off":
+        # Which tenants will be asked for is unknown; each one warms on its first request
+        logger.info("Cache warm-up skipped: TENANCY is on")
+        return
+    started = time.perf_counter()
+    try:
+        cached = await prewarm()
+    except Exception as e:
+        logger.error(f"Cache warm-up failed: {e}")
+        return
+    logger.info(f"Cache warm-up: {cached} snapshots in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+async def _load_tech_index():
+    try:
+        await tech_index.load(mongo.db)
+    except Exception as e:
+        # /search/facets loads it on first use instead
+        logger.error(f"Could not load the technology index: {e}")
+
+async def warm_up():
+    """The status setup, then index checks and cache and facet warm-up, concurrently"""
+    # First: creating the indexes would create status_checks uncapped
+    await start_status_ingest(mongo.db)
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(_ensure_indexes(), _prewarm(), _load_tech_index()), STARTUP_WARMUP_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"Warm-up still running after {STARTUP_WARMUP_TIMEOUT}s, starting anyway")
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    logger.info("Starting Pedro Gomes Portfolio API")
+    logger.info(f"Database: {os.environ['DB_NAME']}")
+    mongo.connect()
+    known_tenants.db = mongo.db
+    health.start(mongo.db)
+    # Before the warm-up, so a write made by another worker meanwhile still
+    # invalidates what the warm-up caches
+    cache_sync.start(mongo.db)
+    # Also before: the reloads those writes trigger need the database
+    tech_index.start(mongo.db)
+    await warm_up()
+    if static_exporter is not None:
+        # Rebuilt from the primary so a write is always in the export that follows it
+        static_exporter.db = mongo.db
+        static_exporter.schedule(*PORTFOLIO_COLLECTIONS)
+    # Ready only now: the load balancer sends traffic to a warm worker
+    health.started = True
+    logger.info(f"Ready in {(time.perf_counter() - started) * 1000:.1f}ms")
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+    yield
+
+    # Not ready from here on, so the load balancer stops routing to this worker
+    health.started = False
+    # Queued status checks and pending rollups are written before the client goes away
+    steps = [health.stop, cache_sync.stop, tech_index.stop, status_buffer.drain, rollup_buffer.stop]
+    if static_exporter is not None:
+        steps.append(static_exporter.stop)
+    for step in steps:
+        # One failing step must not skip the ones after it
+        try:
+            await step()
+        except Exception as e:
+            logger.error(f"Shutdown step {step.__qualname__} failed: {e!r}")
+    mongo.close()
+    logger.info("Database connection closed")
 
 # Create the main app without a prefix
-app = FastAPI(title="Pedro Gomes Portfolio API", version="1.0.0")
+app = FastAPI(title="Pedro Gomes Portfolio API", version="1.0.0", lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Define Models for existing routes
-class StatusCheck(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    client_name: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-
-class StatusCheckCreate(BaseModel):
-    client_name: str
-
 # Add existing routes to the router
 @api_router.get("/")
 async def root():
     return {"message": "Pedro Gomes Portfolio API", "version": "1.0.0"}
 
-@api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
-    status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
-    return status_obj
+def readiness_report(ready: bool) -> dict:
+    pool = mongo.pool_stats()
+    cache_stats = portfolio_cache.stats()
+    return {
+        "status": "ready" if ready else "not_ready",
+        "started": health.started,
+        "database": health.database(),
+        "pool": {
+            "saturation": pool.get("saturation"),
+            "checked_out": pool.get("checked_out"),
+            "max_pool_size": pool.get("max_pool_size"),
+            "wait_ms_max": pool.get("wait_ms_max"),
+        },
+        "cache": {
+            "warm": cache_stats["entries"] > 0,
+            "entries": cache_stats["entries"],
+            "hit_ratio": cache_stats["hit_ratio"],
+        },
+    }
+
+# Liveness: the process and its event loop respond; no dependency is checked
+@api_router.get("/health/live")
+async def liveness_probe():
+    return {"status": "alive"}
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+# Readiness: 503 until startup is done and while MongoDB is unreachable
+@api_router.get("/health/ready")
+async def readiness_probe():
+    ready = health.ready()
+    return JSONResponse(readiness_report(ready), status_code=200 if ready else 503)
 
-# Health check endpoint
+# Health check endpoint (same shape as before, now a 503 when unhealthy)
 @api_router.get("/health")
 async def health_check():
-    try:
-        # Test database connection
-        await db.command("ping")
-        return {
-            "status": "healthy",
-            "database": "connected",
-            "message": "Portfolio API is running"
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "database": "disconnected",
-            "error": str(e)
-        }
+    ready = health.ready()
+    body = {
+        **readiness_report(ready),
+        "status": "healthy" if ready else "unhealthy",
+        "database": "connected" if health.ok else "disconnected",
+        "pool": mongo.pool_stats(),
+        "message": "Portfolio API is running" if ready else "Portfolio API is not ready",
+    }
+    if health.error:
+        body["error"] = health.error
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@api_router.get("/admission/stats")
+async def get_admission_stats():
+    """Get concurrency budget and rate limit counters"""
+    return {"enabled": ADMISSION_CONTROL, **admission.stats()}
 
 # Include portfolio routes
 api_router.include_router(portfolio_router, tags=["Portfolio"])
+api_router.include_router(batch_router, tags=["Portfolio"])
+api_router.include_router(status_router, tags=["Status"])
+api_router.include_router(search_router, tags=["Search"])
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Prometheus scrape endpoint, outside /api like the usual /metrics
+def _gauges(prefix: str, stats: dict) -> dict:
+    # bool is an int too: exported as 0/1
+    return {f"{prefix}_{name}": int(value) if isinstance(value, bool) else value
+            for name, value in stats.items() if isinstance(value, (int, float))}
+
+async def get_metrics():
+    gauges = {
+        **_gauges("portfolio_cache", portfolio_cache.stats()),
+        **_gauges("single_flight", flights.stats()),
+        **_gauges("mongodb_pool", mongo.pool_stats()),
+        **_gauges("status_ingest", status_buffer.stats()),
+        **_gauges("status_rollups", rollup_buffer.stats()),
+        **_gauges("search_index", tech_index.stats()),
+        "health_ready": int(health.ready()),
+        "health_database_up": int(health.ok),
+        "health_last_latency_ms": health.latency_ms or 0.0,
+    }
+    if static_exporter is not None:
+        gauges.update(_gauges("static_export", static_exporter.stats()))
+    if TENANCY != "off":
+        gauges.update(_gauges("tenants", known_tenants.stats()))
+    if ADMISSION_CONTROL:
+        for name, budget in admission.budgets.items():
+            gauges.update(_gauges(f"admission_{name}", budget.stats()))
+        for name, bucket in admission.rate_limits.items():
+            gauges.update(_gauges(f"rate_limit_{name}", bucket.stats()))
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+if METRICS_ENABLED:
+    app.add_api_route("/metrics", get_metrics, methods=["GET"], include_in_schema=False)
+
+# Innermost: shed requests before they reach the routes, inside CORS so that
+# browsers can read the 503/429 and its Retry-After
+if ADMISSION_CONTROL:
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -85,19 +274,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+# Compresses what the snapshot cache has not already compressed
+if COMPRESSION:
+    app.add_middleware(CompressionMiddleware)
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Starting Pedro Gomes Portfolio API")
-    logger.info(f"Database: {os.environ['DB_NAME']}")
+# Added last so it wraps everything, CORS and compression included
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=SERVER_TIMING)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
-    logger.info("Database connection closed")
\ No newline at end of file
+# Outermost: every layer below, admission included, sees the tenant's root_path
+if TENANCY != "off":
+    app.add_middleware(TenantMiddleware, mode=TENANCY, known=known_tenants)
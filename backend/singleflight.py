@@ -0,0 +1,67 @@
+"""Request coalescing for the cached read routes.
+
+When a snapshot is missing or stale, every concurrent request for it would run
+the same queries. SingleFlight runs the load once per key and hands the result
+(or the exception) to every request that asked for the key meanwhile.
+
+The load runs in its own task and callers await it through asyncio.shield, so
+a client disconnecting cancels its own wait, not the query everyone else is
+waiting for.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        self.flights = 0
+        self.coalesced = 0
+        self.background = 0
+        self.failures = 0
+
+    def _start(self, key: Hashable, load: Callable[[], Awaitable]) -> asyncio.Task:
+        task = self._flights.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        self.flights += 1
+        task = asyncio.ensure_future(load())
+        self._flights[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable]):
+        """Run `load()` for key, or join the run already in flight"""
+        return await asyncio.shield(self._start(key, load))
+
+    def spawn(self, key: Hashable, load: Callable[[], Awaitable]) -> None:
+        """Run `load()` for key in the background unless it is already in flight"""
+        if key in self._flights:
+            self.coalesced += 1
+            return
+        self.background += 1
+        self._start(key, load).add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background refresh failed: %r", task.exception())
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "flights": self.flights,
+            "coalesced": self.coalesced,
+            "background_refreshes": self.background,
+            "failures": self.failures,
+        }
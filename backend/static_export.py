@@ -0,0 +1,208 @@
+"""Pre-rendered /api/portfolio snapshots as static files.
+
+The portfolio only changes when it is edited, so the full /api/portfolio
+response can be served by nginx or a CDN straight from disk, with the API as
+the fallback. For each language ("all" is the dual-language payload of
+/api/portfolio without `lang`) the export directory holds:
+
+    portfolio.<lang>.<hash>.json   immutable, content-addressed (+ .gz, .br)
+    portfolio.<lang>.json          stable name, always the latest (+ .gz, .br)
+    index.<lang>.html              optional HTML shell with the payload inlined
+    manifest.json                  latest file, ETag and build time per language
+    sections/                      serialized sections the payloads are spliced from
+
+Every file is written to a temporary name and moved into place with
+os.replace, so readers see either the old or the new file, never half of one.
+Builds are incremental: only the sections of the collections that changed are
+queried and serialized again, the others are read back from sections/. The
+sections live on disk rather than in memory so that several workers exporting
+into the same directory see each other's updates.
+
+Build everything with `python cli.py export-static <dir>`. With
+STATIC_EXPORT_DIR set the API also rebuilds after every write, a
+STATIC_EXPORT_DELAY seconds after the first change so bursts of writes
+coalesce into one build.
+"""
+import asyncio
+import html
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from cache import make_etag
+from compression import ENCODINGS, compress
+from routes.portfolio import PORTFOLIO_COLLECTIONS, load_portfolio_section, serialize
+
+logger = logging.getLogger(__name__)
+
+STATIC_EXPORT_DELAY = float(os.environ.get('STATIC_EXPORT_DELAY', '1'))
+# Content-addressed versions kept per language, for clients still holding an old manifest
+STATIC_EXPORT_KEEP = int(os.environ.get('STATIC_EXPORT_KEEP', '5'))
+STATIC_EXPORT_HTML_TEMPLATE = os.environ.get('STATIC_EXPORT_HTML_TEMPLATE')
+
+# Language key -> `lang` of the section loaders (None keeps both languages)
+LANGUAGES = {"all": None, "pt": "pt", "en": "en"}
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", delete=False) as tmp:
+        tmp.write(data)
+    os.replace(tmp.name, path)
+
+
+def splice_portfolio(sections: Dict[str, bytes]) -> bytes:
+    """The /api/portfolio body from already serialized sections, byte for byte"""
+    data = b",".join(b'"%s":%s' % (name.encode(), sections[name]) for name in PORTFOLIO_COLLECTIONS)
+    return b'{"success":true,"data":{' + data + b"}}"
+
+
+def render_html(template: str, body: bytes, lang: str) -> str:
+    """Inline the payload and the page metadata into the frontend's index.html"""
+    personal_info = json.loads(body)["data"]["personal_info"]
+    title = html.escape(f"{personal_info.get('name', '')} - {personal_info.get('title', '')}")
+    description = html.escape(str(personal_info.get("description", "")))
+    # "</" would end the script element early
+    payload = body.decode("utf-8").replace("</", "<\\/")
+    head = (
+        f'<meta name="description" content="{description}">\n'
+        f'<script id="portfolio-data" type="application/json">{payload}</script>\n'
+    )
+    page = template.replace('lang="pt-br"', f'lang="{"en" if lang == "en" else "pt-br"}"')
+    if "<title>" in page:
+        start, end = page.index("<title>"), page.index("</title>") + len("</title>")
+        page = page[:start] + f"<title>{title}</title>" + page[end:]
+    return page.replace("</head>", head + "</head>", 1)
+
+
+class StaticExporter:
+    def __init__(
+        self,
+        directory,
+        delay: float = STATIC_EXPORT_DELAY,
+        keep: int = STATIC_EXPORT_KEEP,
+        html_template=STATIC_EXPORT_HTML_TEMPLATE,
+    ):
+        self.directory = Path(directory)
+        self.delay = delay
+        self.keep = keep
+        self.html_template = Path(html_template) if html_template else None
+        self.db = None
+        self.builds = 0
+        self.failures = 0
+        self.last_build_ms = 0.0
+        self._pending: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, *collections: str) -> None:
+        """Rebuild after a write; called from the write routes through write_hooks"""
+        changed = {name for name in collections if name in PORTFOLIO_COLLECTIONS}
+        if not changed:
+            return
+        self._pending |= changed
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Finish the scheduled build, if any"""
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.delay)
+            changed, self._pending = self._pending, set()
+            try:
+                await self.build(changed)
+            except Exception as e:
+                # The previous files stay in place and the API keeps serving
+                self.failures += 1
+                logger.error("Static export of %s failed: %r", sorted(changed), e)
+
+    async def build(self, changed: Optional[Iterable[str]] = None, db=None) -> Dict[str, dict]:
+        """Rebuild the payloads of every language; `changed=None` rebuilds every section"""
+        started = time.perf_counter()
+        changed = set(PORTFOLIO_COLLECTIONS if changed is None else changed)
+        db = db if db is not None else self.db
+        sections_dir = self.directory / "sections"
+        await asyncio.to_thread(sections_dir.mkdir, parents=True, exist_ok=True)
+
+        async def section_body(name: str, lang_key: str) -> bytes:
+            path = sections_dir / f"{name}.{lang_key}.json"
+            if name not in changed:
+                try:
+                    return await asyncio.to_thread(path.read_bytes)
+                except FileNotFoundError:
+                    pass
+            body = serialize(await load_portfolio_section(name, LANGUAGES[lang_key], db))
+            await asyncio.to_thread(atomic_write, path, body)
+            return body
+
+        bodies = {}
+        for lang_key in LANGUAGES:
+            sections = await asyncio.gather(*(section_body(name, lang_key) for name in PORTFOLIO_COLLECTIONS))
+            bodies[lang_key] = splice_portfolio(dict(zip(PORTFOLIO_COLLECTIONS, sections)))
+
+        manifest = await asyncio.to_thread(self._write_payloads, bodies)
+        self.builds += 1
+        self.last_build_ms = (time.perf_counter() - started) * 1000
+        logger.info("Static export of %s done in %.1fms", sorted(changed), self.last_build_ms)
+        return manifest
+
+    def _write_payloads(self, bodies: Dict[str, bytes]) -> Dict[str, dict]:
+        manifest_path = self.directory / "manifest.json"
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (FileNotFoundError, ValueError):
+            manifest = {}
+        template = self.html_template.read_text(encoding="utf-8") if self.html_template else None
+
+        for lang_key, body in bodies.items():
+            etag = make_etag(body)
+            digest = etag.strip('"')[:16]
+            name = f"portfolio.{lang_key}.{digest}.json"
+            if manifest.get(lang_key, {}).get("file") == name and (self.directory / name).exists():
+                continue  # Nothing changed for this language
+            variants = {"": body, **{SUFFIXES[encoding]: compress(body, encoding, static=True) for encoding in ENCODINGS}}
+            # Versioned files first, then the stable names that point readers at them
+            for suffix, data in variants.items():
+                atomic_write(self.directory / f"{name}{suffix}", data)
+            for suffix, data in variants.items():
+                atomic_write(self.directory / f"portfolio.{lang_key}.json{suffix}", data)
+            if template is not None and lang_key != "all":
+                atomic_write(self.directory / f"index.{lang_key}.html", render_html(template, body, lang_key).encode("utf-8"))
+            manifest[lang_key] = {
+                "file": name,
+                "etag": etag,
+                "bytes": len(body),
+                "built_at": datetime.utcnow().isoformat() + "Z",
+            }
+            self._prune(lang_key)
+
+        atomic_write(manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+        return manifest
+
+    def _prune(self, lang_key: str) -> None:
+        versions: List[Path] = sorted(
+            self.directory.glob(f"portfolio.{lang_key}.*.json"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        for old in versions[self.keep:]:
+            for suffix in ("", *SUFFIXES.values()):
+                Path(f"{old}{suffix}").unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        return {
+            "directory": str(self.directory),
+            "builds": self.builds,
+            "failures": self.failures,
+            "pending": sorted(self._pending),
+            "last_build_ms": round(self.last_build_ms, 3),
+        }
@@ -0,0 +1,184 @@
+"""Write batching for POST /api/status.
+
+Status checks arrive thousands of times per minute, so instead of one
+insert_one per request they are queued and written with insert_many once
+`batch_size` records are waiting or `flush_interval` seconds have passed since
+the first one was queued.
+
+Durability modes:
+    "ack"  - the request waits until its record has been flushed, so a 200
+             still means "stored" (default when batching is enabled)
+    "fire" - the request returns as soon as the record is queued; records still
+             queued when the process dies are lost
+
+When the queue is full, callers wait at most `enqueue_timeout` seconds for room
+and then get QueueFull, which the route turns into a 503 with Retry-After.
+`drain()` stops accepting records and flushes everything still queued; it runs
+on shutdown. A request that got past the closed check just before and only
+queues its record after the final flush gets IngestClosed instead of a reply
+that never comes.
+
+`on_flush`, if given, is awaited with the documents of each batch that were
+stored (e.g. to update pre-aggregated counts); its failures are logged and
+never fail the requests, whose records are already written.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class IngestClosed(Exception):
+    pass
+
+
+class StatusIngestBuffer:
+    def __init__(
+        self,
+        durability: str = "ack",
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        max_queue: int = 10_000,
+        enqueue_timeout: float = 0.1,
+        on_flush: Optional[Callable[[List[dict]], Awaitable[None]]] = None,
+    ):
+        self.durability = durability
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.enqueue_timeout = enqueue_timeout
+        self.on_flush = on_flush
+        self.collection = None
+        self.flushes = 0
+        self.flushed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.last_flush_ms = 0.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = True
+        # Futures of the "ack" requests not answered yet
+        self._pending: Set[asyncio.Future] = set()
+
+    def start(self, collection) -> None:
+        if self._task is not None:
+            return
+        self.collection = collection
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, document: dict) -> None:
+        """Queue one record; in "ack" mode, return once it has been written"""
+        if self._closed:
+            raise IngestClosed("Status ingestion is shutting down")
+        future = asyncio.get_running_loop().create_future() if self.durability == "ack" else None
+        if future is not None:
+            self._pending.add(future)
+            future.add_done_callback(self._pending.discard)
+        try:
+            await asyncio.wait_for(self._queue.put((document, future)), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self._pending.discard(future)
+            self.rejected += 1
+            raise asyncio.QueueFull()
+        if future is not None:
+            await future
+
+    async def drain(self) -> None:
+        """Stop accepting records and flush everything still queued"""
+        if self._task is None:
+            return
+        self._closed = True
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        # A submit() that passed the closed check before it was set may queue
+        # its record after the final flush: nothing will write it any more
+        late = 0
+        while not self._queue.empty():
+            if self._queue.get_nowait() is not None:
+                late += 1
+        for future in list(self._pending):
+            if not future.done():
+                future.set_exception(IngestClosed("Status ingestion shut down before the record was written"))
+        if late:
+            logger.warning("%d status checks queued after the final flush were dropped", late)
+
+    def stats(self) -> dict:
+        return {
+            "durability": self.durability,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "flushes": self.flushes,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_batch": round(self.flushed / self.flushes, 1) if self.flushes else 0.0,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+        # Shutdown: whatever is left goes out in full batches
+        leftover = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.batch_size):
+            await self._flush(leftover[start:start + self.batch_size])
+
+    async def _flush(self, batch: List[Tuple[dict, Optional[asyncio.Future]]]) -> None:
+        documents = [document for document, _ in batch]
+        errors = {}
+        started = time.perf_counter()
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = {error["index"]: e for error in e.details.get("writeErrors", [])}
+        except Exception as e:
+            errors = {index: e for index in range(len(batch))}
+            logger.error("Status check flush of %d records failed: %s", len(batch), e)
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.failed += len(errors)
+        self.flushed += len(batch) - len(errors)
+
+        for index, (_, future) in enumerate(batch):
+            if future is None or future.done():
+                continue
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(None)
+
+        if self.on_flush is not None and len(errors) < len(batch):
+            try:
+                await self.on_flush([document for index, document in enumerate(documents) if index not in errors])
+            except Exception as e:
+                logger.error("Status check flush hook failed for %d records: %s", len(batch) - len(errors), e)
@@ -0,0 +1,210 @@
+"""Pre-aggregated status check counts.
+
+Every stored status check also increments one bucket per granularity in
+`status_rollups`:
+
+    {"granularity": "hour", "client_name": "web", "bucket": 2024-05-01T13:00,
+     "count": 412, "first": <timestamp>, "last": <timestamp>}
+
+so dashboards read hundreds of bucket documents instead of millions of raw
+checks. Buckets are upserted on (granularity, client_name, bucket), which is
+unique, and a whole insert batch is summed in memory first, so a flush of 500
+checks from one client costs three upserts. Checks stored one by one
+(STATUS_INGEST_MODE=direct) go through a `RollupBuffer`, so their requests
+pay for the insert only.
+
+Raw checks are the source of truth: `rebuild_rollups()` recomputes buckets
+from them with an aggregation pipeline, for data ingested before rollups
+existed or after an outage of the rollup writes. Buckets outlive a
+STATUS_TTL_SECONDS expiry of the raw checks, which is the point, but they
+also mean a rebuild only sees the checks still stored.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "status_rollups"
+
+GRANULARITIES = ("minute", "hour", "day")
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Start of the bucket holding `timestamp` (UTC, like the stored timestamps)"""
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def rollup_updates(documents: Iterable[dict], granularities: Iterable[str] = GRANULARITIES) -> List[UpdateOne]:
+    """One upsert per touched bucket, with the batch already summed"""
+    buckets: Dict[Tuple[str, str, datetime], list] = defaultdict(lambda: [0, None, None])
+    for document in documents:
+        timestamp = document["timestamp"]
+        for granularity in granularities:
+            totals = buckets[(granularity, document["client_name"], bucket_start(timestamp, granularity))]
+            totals[0] += 1
+            totals[1] = timestamp if totals[1] is None else min(totals[1], timestamp)
+            totals[2] = timestamp if totals[2] is None else max(totals[2], timestamp)
+    return [
+        UpdateOne(
+            {"granularity": granularity, "client_name": client_name, "bucket": bucket},
+            {"$inc": {"count": count}, "$min": {"first": first}, "$max": {"last": last}},
+            upsert=True,
+        )
+        for (granularity, client_name, bucket), (count, first, last) in buckets.items()
+    ]
+
+
+async def record_status_checks(db, documents: List[dict]) -> None:
+    """Add stored status checks to their buckets"""
+    updates = rollup_updates(documents)
+    if updates:
+        await db[ROLLUP_COLLECTION].bulk_write(updates, ordered=False)
+
+
+class RollupBuffer:
+    """Rollup increments of individually stored checks, written every `flush_interval`
+    seconds or `batch_size` checks.
+
+    Each worker only counts the checks it stored itself, so nothing is counted
+    twice. A crash loses the pending increments; rebuild_rollups() repairs them.
+    """
+
+    def __init__(self, flush_interval: float = 1.0, batch_size: int = 500):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.db = None
+        self._pending: List[dict] = []
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.recorded = 0
+        self.failures = 0
+
+    def start(self, db) -> None:
+        self.db = db
+        if self._task is None:
+            self._full = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def add(self, document: dict) -> None:
+        self._pending.append({"client_name": document["client_name"], "timestamp": document["timestamp"]})
+        if len(self._pending) >= self.batch_size and self._full is not None:
+            self._full.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending or self.db is None:
+            return
+        documents, self._pending = self._pending, []
+        try:
+            await record_status_checks(self.db, documents)
+        except Exception as e:
+            # The checks themselves are stored; a rebuild from status_checks repairs the counts
+            self.failures += 1
+            logger.error("Could not update status rollups for %d checks: %s", len(documents), e)
+            return
+        self.flushes += 1
+        self.recorded += len(documents)
+
+    async def stop(self) -> None:
+        """Stop the timer and write what is pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "recorded": self.recorded,
+            "failures": self.failures,
+        }
+
+
+def rollup_query(
+    granularity: str,
+    client_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict:
+    """Filter for the buckets overlapping [since, until)"""
+    query = {"granularity": granularity}
+    if client_name is not None:
+        query["client_name"] = client_name
+    bucket_range = {}
+    if since is not None:
+        # The bucket holding `since` starts before it but still counts
+        bucket_range["$gte"] = bucket_start(since, granularity)
+    if until is not None:
+        bucket_range["$lt"] = until
+    if bucket_range:
+        query["bucket"] = bucket_range
+    return query
+
+
+def rebuild_pipeline(granularity: str, match: Optional[dict] = None) -> List[dict]:
+    """Recompute `granularity` buckets from the raw checks and merge them over the stored ones"""
+    return [
+        {"$match": match or {}},
+        {"$group": {
+            "_id": {
+                "client_name": "$client_name",
+                "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": granularity}},
+            },
+            "count": {"$sum": 1},
+            "first": {"$min": "$timestamp"},
+            "last": {"$max": "$timestamp"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "granularity": {"$literal": granularity},
+            "client_name": "$_id.client_name",
+            "bucket": "$_id.bucket",
+            "count": 1,
+            "first": 1,
+            "last": 1,
+        }},
+        {"$merge": {
+            "into": ROLLUP_COLLECTION,
+            "on": ["granularity", "client_name", "bucket"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert",
+        }},
+    ]
+
+
+async def rebuild_rollups(db, since: Optional[datetime] = None, granularities: Iterable[str] = GRANULARITIES) -> None:
+    """Rebuild buckets from status_checks (MongoDB 5.0+ for $dateTrunc).
+
+    Checks written while this runs may be counted twice; run it with
+    ingestion stopped, or accept a transient over-count in the newest buckets.
+    """
+    for granularity in granularities:
+        match = {"timestamp": {"$gte": bucket_start(since, granularity)}} if since else {}
+        async for _ in db.status_checks.aggregate(rebuild_pipeline(granularity, match)):
+            pass
+        logger.info("Rebuilt %s status rollups", granularity)
@@ -0,0 +1,181 @@
+"""Multi-tenant hosting: many portfolios served by one deployment.
+
+TENANCY selects how a request is mapped to a tenant:
+
+    off    (default) one portfolio per database; documents carry no tenant_id
+    host   the Host header. With TENANT_HOST_SUFFIX=.portfolio.example.com,
+           alice.portfolio.example.com is tenant "alice"; any other host (a
+           custom domain) is the tenant named after the whole host
+    path   a /t/<tenant> prefix (TENANT_PATH_PREFIX): /t/alice/api/skills is
+           /api/skills of tenant "alice". The prefix becomes the root_path, so
+           links the API builds (X-Next-Cursor pages) keep it
+
+`TenantMiddleware` resolves the tenant once per request into a context
+variable; the routes restrict every query with `scoped()` and stamp every
+insert with `stamp()`. With TENANCY off both leave their argument unchanged,
+so single-tenant databases keep working as they are. Documents without a
+tenant_id belong to no tenant, which is also what code running outside a
+request (scripts, background tasks) sees unless it sets one with
+`tenant_context()`.
+
+A tenant exists once it has a personal_info document (provision one with
+`cli.py import --tenant`). `KnownTenants` checks that before a request
+reaches the routes, so an unknown tenant is a 404 and never gets a snapshot
+cache of its own; answers are remembered for TENANT_CHECK_SECONDS (default
+30), which is also how long a new tenant may keep getting 404s.
+
+With tenancy on, the portfolio collections get tenant-leading indexes
+(indexes.py) and every tenant its own snapshot cache (cache.TenantCaches).
+"""
+import os
+import re
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Tuple
+
+from pymongo.errors import PyMongoError
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from singleflight import SingleFlight
+
+TENANT_FIELD = "tenant_id"
+TENANCY = os.environ.get('TENANCY', 'off').lower()
+if TENANCY not in ("off", "host", "path"):
+    raise ValueError(f"TENANCY must be off, host or path, not {TENANCY!r}")
+TENANT_HOST_SUFFIX = os.environ.get('TENANT_HOST_SUFFIX', '').lower()
+TENANT_PATH_PREFIX = os.environ.get('TENANT_PATH_PREFIX', '/t').rstrip('/')
+TENANT_CHECK_SECONDS = float(os.environ.get('TENANT_CHECK_SECONDS', '30'))
+
+# Host names, subdomain labels and path segments alike
+TENANT_ID_PATTERN = re.compile(r"^[a-z0-9](?:[a-z0-9.-]{0,251}[a-z0-9])?$")
+# Served without a tenant: probes, process-wide stats, the API docs
+GLOBAL_PATHS = ("/api/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+_tenant: ContextVar[Optional[str]] = ContextVar("tenant", default=None)
+
+
+def current_tenant() -> Optional[str]:
+    return _tenant.get()
+
+
+@contextmanager
+def tenant_context(tenant: Optional[str]):
+    token = _tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _tenant.reset(token)
+
+
+def scoped(query: dict) -> dict:
+    """`query` restricted to the current tenant's documents"""
+    if TENANCY == "off":
+        return query
+    return {TENANT_FIELD: _tenant.get(), **query}
+
+
+def stamp(document: dict) -> dict:
+    """Tag a document about to be inserted with the current tenant"""
+    if TENANCY != "off":
+        document[TENANT_FIELD] = _tenant.get()
+    return document
+
+
+def response_fields(fields: Optional[dict]) -> Optional[dict]:
+    """Projection for documents sent to clients: tenant_id stays internal"""
+    if fields or TENANCY == "off":
+        return fields
+    return {TENANT_FIELD: 0}
+
+
+def tenant_from_host(host: str) -> Optional[str]:
+    host = host.rsplit(":", 1)[0].strip().lower().rstrip(".")
+    if TENANT_HOST_SUFFIX and host.endswith(TENANT_HOST_SUFFIX) and len(host) > len(TENANT_HOST_SUFFIX):
+        host = host[:-len(TENANT_HOST_SUFFIX)]
+    return host or None
+
+
+class KnownTenants:
+    """Whether a tenant exists (has a personal_info document), remembered for `ttl` seconds.
+
+    At most `max_tenants` answers are kept, the oldest forgotten first, so
+    requests for made-up tenants can't grow it without bound. Concurrent
+    checks of one tenant share a single query.
+    """
+
+    def __init__(self, ttl: float = TENANT_CHECK_SECONDS, max_tenants: int = 10_000):
+        self.ttl = ttl
+        self.max_tenants = max_tenants
+        self.db = None
+        self._answers: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+        self._flights = SingleFlight()
+        self.lookups = 0
+        self.unknown = 0
+
+    async def exists(self, tenant: str) -> bool:
+        answer = self._answers.get(tenant)
+        if answer is not None and time.monotonic() - answer[1] < self.ttl:
+            found = answer[0]
+        else:
+            found = await self._flights.do(tenant, lambda: self._lookup(tenant))
+        if not found:
+            self.unknown += 1
+        return found
+
+    async def _lookup(self, tenant: str) -> bool:
+        self.lookups += 1
+        found = await self.db.personal_info.find_one({TENANT_FIELD: tenant}, {"_id": 1}) is not None
+        self._answers.pop(tenant, None)
+        self._answers[tenant] = (found, time.monotonic())
+        while len(self._answers) > self.max_tenants:
+            self._answers.popitem(last=False)
+        return found
+
+    def stats(self) -> dict:
+        return {"remembered": len(self._answers), "lookups": self.lookups, "unknown": self.unknown}
+
+
+class TenantMiddleware:
+    def __init__(self, app, mode: str = TENANCY, path_prefix: str = TENANT_PATH_PREFIX,
+                 known: Optional[KnownTenants] = None):
+        self.app = app
+        self.mode = mode
+        self.path_prefix = path_prefix
+        # None accepts every well-formed tenant id
+        self.known = known
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(GLOBAL_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        tenant = None
+        if self.mode == "host":
+            tenant = tenant_from_host(Headers(scope=scope).get("host", ""))
+        elif scope["path"].startswith(self.path_prefix + "/"):
+            segment = scope["path"][len(self.path_prefix) + 1:].split("/", 1)[0]
+            tenant = segment.lower()
+            # Routing strips the root_path off the path, as for a mounted app
+            scope = {**scope, "root_path": f"{scope.get('root_path', '')}{self.path_prefix}/{segment}"}
+        if not tenant or not TENANT_ID_PATTERN.match(tenant):
+            await JSONResponse({"detail": "Unknown tenant"}, status_code=404)(scope, receive, send)
+            return
+        if self.known is not None:
+            try:
+                found = await self.known.exists(tenant)
+            except PyMongoError:
+                response = JSONResponse({"detail": "Database unavailable"}, status_code=503, headers={"Retry-After": "1"})
+                await response(scope, receive, send)
+                return
+            if not found:
+                await JSONResponse({"detail": "Unknown tenant"}, status_code=404)(scope, receive, send)
+                return
+
+        token = _tenant.set(tenant)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _tenant.reset(token)
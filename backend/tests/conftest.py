@@ -0,0 +1,61 @@
+"""Fixtures: the API and its modules against an in-memory mongomock-motor database.
+
+    cd backend && python -m pytest -q
+
+Async tests run on asyncio through the anyio plugin (`@pytest.mark.anyio`).
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Read at import time by the modules under test, so set before any of them loads.
+# mongomock has no change streams, and background reloads would race the tests.
+os.environ.setdefault("MONGO_URL", "mongodb://mongomock")
+os.environ.setdefault("DB_NAME", "portfolio_test")
+os.environ.setdefault("CACHE_SYNC_MODE", "off")
+os.environ.setdefault("SEARCH_INDEX_REFRESH_SECONDS", "0")
+os.environ.setdefault("HEALTH_CHECK_INTERVAL", "60")
+
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+from database import mongo  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    """A fresh, empty in-memory database behind the shared client"""
+    mongo.close()
+    mongo.connect(client=AsyncMongoMockClient())
+    yield mongo.db
+    mongo.close()
+
+
+@pytest.fixture
+async def seeded(db):
+    from seed_data import seed_database
+
+    await seed_database(db)
+    return db
+
+
+@pytest.fixture
+async def client(seeded):
+    """HTTP client for the app, started through its lifespan on the seeded database"""
+    import httpx
+
+    import server
+
+    server.portfolio_cache.clear()
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            yield http
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import admission
+from admission import AdmissionController, Budget, Rejected, TokenBucket, classify, client_key
+
+
+def test_classify():
+    assert classify("GET", "/api/skills", b"") == "cached"
+    assert classify("GET", "/api/skills", b"limit=5") == "db_read"
+    assert classify("GET", "/api/search", b"q=x") == "db_read"
+    assert classify("POST", "/api/status", b"") == "ingest"
+    assert classify("DELETE", "/api/skills/1", b"") == "write"
+    assert classify("GET", "/api/health/ready", b"") is None
+    assert classify("OPTIONS", "/api/skills", b"") is None
+
+
+def test_rate_limits_are_off_by_default(monkeypatch):
+    for name in ("WRITES", "STATUS"):
+        monkeypatch.delenv(f"RATE_LIMIT_{name}_PER_SECOND", raising=False)
+    controller = AdmissionController.from_env()
+    assert controller.rate_limits == {}
+    assert set(controller.budgets) == {"cached", "db_read", "write", "ingest"}
+
+
+def test_enabling_rate_limits_without_forwarding_warns(monkeypatch, caplog):
+    monkeypatch.setenv("RATE_LIMIT_WRITES_PER_SECOND", "5")
+    monkeypatch.setattr(admission, "RATE_LIMIT_TRUST_FORWARDED", False)
+    assert set(AdmissionController.from_env().rate_limits) == {"write"}
+    assert "peer address" in caplog.text
+
+
+def test_client_key_trusts_forwarded_only_when_configured(monkeypatch):
+    scope = {"type": "http", "client": ("10.0.0.1", 1234), "headers": [(b"x-forwarded-for", b"203.0.113.7, 10.0.0.1")]}
+    assert client_key(scope) == "10.0.0.1"
+    monkeypatch.setattr(admission, "RATE_LIMIT_TRUST_FORWARDED", True)
+    assert client_key(scope) == "203.0.113.7"
+
+
+def test_token_bucket(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    bucket = TokenBucket(rate=1, burst=2)
+    bucket.take("a")
+    bucket.take("a")
+    with pytest.raises(Rejected) as rejected:
+        bucket.take("a")
+    assert rejected.value.status_code == 429
+    # Buckets are per client
+    bucket.take("b")
+    now[0] += 1
+    bucket.take("a")
+    assert bucket.stats()["limited"] == 1
+
+
+@pytest.mark.anyio
+async def test_budget_is_fifo_and_rejects_past_its_queue():
+    budget = Budget("write", limit=1, queue=2, max_wait=1.0)
+    await budget.acquire()
+    order = []
+
+    async def waiter(name):
+        await budget.acquire()
+        order.append(name)
+
+    waiters = [asyncio.ensure_future(waiter(name)) for name in ("first", "second")]
+    await asyncio.sleep(0)
+    with pytest.raises(Rejected) as rejected:
+        await budget.acquire()
+    assert rejected.value.status_code == 503
+    assert rejected.value.reason == "queue full"
+
+    budget.release(0.01)
+    await asyncio.sleep(0)
+    budget.release(0.01)
+    await asyncio.gather(*waiters)
+    assert order == ["first", "second"]
+    budget.release(0.01)
+    assert budget.stats()["active"] == 0
@@ -0,0 +1,68 @@
+import pytest
+from bson import ObjectId
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_batch_reports_each_operation(client, seeded):
+    goal = await seeded.goals.find_one({})
+    missing = str(ObjectId())
+    response = await client.post("/api/goals/batch", json=[
+        {"op": "create", "data": {"goal": {"pt": "Novo", "en": "New"}, "order": 10}},
+        {"op": "reorder", "id": str(goal["_id"]), "order": 7},
+        {"op": "update", "id": missing, "data": {"order": 1}},
+        {"op": "delete", "id": missing},
+        {"op": "delete", "id": "not-an-id"},
+        {"op": "reorder", "id": str(goal["_id"])},
+    ])
+    body = response.json()
+    assert response.status_code == 200
+    # One bulk write: unmatched ids are only known as a total
+    assert [result["ok"] for result in body["results"]] == [True, True, True, True, False, False]
+    assert (body["inserted"], body["matched"], body["deleted"], body["not_found"]) == (1, 1, 0, 2)
+    assert body["success"] is False
+    assert body["results"][0]["document"]["goal"] == {"pt": "Novo", "en": "New"}
+    assert (await seeded.goals.find_one({"_id": goal["_id"]}))["order"] == 7
+
+
+async def test_batches_are_one_round_trip(client, seeded, monkeypatch):
+    from routes import batch
+
+    calls = []
+
+    class Collection:
+        def __init__(self, collection):
+            self.collection = collection
+
+        def __getattr__(self, name):
+            calls.append(name)
+            return getattr(self.collection, name)
+
+    class Mongo:
+        db = {"projects": Collection(seeded.projects)}
+
+    monkeypatch.setattr(batch, "mongo", Mongo)
+    projects = await seeded.projects.find({}).to_list(length=None)
+    response = await client.post("/api/projects/batch", json=[
+        {"op": "reorder", "id": str(project["_id"]), "order": position} for position, project in enumerate(projects)
+    ])
+    assert response.json()["success"] is True
+    assert response.json()["matched"] == len(projects)
+    assert calls == ["bulk_write"]
+
+
+async def test_unmatched_updates_never_reach_the_facet_index(client, seeded):
+    response = await client.post("/api/projects/batch", json=[
+        {"op": "update", "id": str(ObjectId()), "data": {"technologies": ["Ghost"]}},
+    ])
+    assert response.json()["not_found"] == 1
+    facets = (await client.get("/api/search/facets?type=projects")).json()["projects"]
+    assert facets["total"] == await seeded.projects.count_documents({})
+    assert "Ghost" not in [technology["name"] for technology in facets["technologies"]]
+
+
+async def test_batch_is_visible_in_the_next_read(client):
+    before = (await client.get("/api/goals")).json()
+    await client.post("/api/goals/batch", json=[{"op": "delete", "id": before[0]["_id"]}])
+    after = (await client.get("/api/goals")).json()
+    assert [goal["_id"] for goal in after] == [goal["_id"] for goal in before[1:]]
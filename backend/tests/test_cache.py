@@ -0,0 +1,69 @@
+import cache as cache_module
+from cache import SnapshotCache, etag_matches, make_etag
+
+
+def test_hit_until_a_dependency_is_invalidated():
+    cache = SnapshotCache(ttl=60)
+    versions = cache.versions(["skills"])
+    cache.put("skills", versions, b"[]")
+    assert cache.get("skills", ["skills"]).body == b"[]"
+
+    cache.invalidate("goals")
+    assert cache.get("skills", ["skills"]) is not None
+    cache.invalidate("skills")
+    assert cache.get("skills", ["skills"]) is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_versions_read_before_a_write_store_a_stale_snapshot():
+    cache = SnapshotCache(ttl=60)
+    versions = cache.versions(["skills"])
+    # A write lands while the query runs
+    cache.invalidate("skills")
+    cache.put("skills", versions, b"old")
+    assert cache.get("skills", ["skills"]) is None
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = SnapshotCache(ttl=10)
+    cache.put("portfolio", cache.versions(["skills"]), b"{}")
+    now[0] += 9
+    assert cache.get("portfolio", ["skills"]) is not None
+    now[0] += 2
+    assert cache.get("portfolio", ["skills"]) is None
+
+
+def test_size_accounting():
+    cache = SnapshotCache(ttl=60)
+    versions = cache.versions([])
+    cache.put("a", versions, b"12345")
+    cache.put("a", versions, b"12")
+    cache.put("b", versions, b"123")
+    assert cache.stats()["bytes"] == 5
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
+
+
+def test_etags():
+    etag = make_etag(b"body")
+    assert etag == make_etag(b"body") != make_etag(b"other")
+    assert etag_matches(f'W/{etag}, "x"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"x"', etag)
+
+
+def test_stale_snapshots_never_predate_a_local_write():
+    cache = SnapshotCache(ttl=60, stale=30)
+    cache.put("skills", cache.versions(["skills"]), b"old")
+    # Another worker's write: the old snapshot may be served while refreshing
+    cache.invalidate("skills", stale_ok=True)
+    assert cache.get_stale("skills", ["skills"]).body == b"old"
+    # This worker's own write: it must be read back
+    cache.invalidate("skills")
+    assert cache.get_stale("skills", ["skills"]) is None
+
+    cache.put("skills", cache.versions(["skills"]), b"new")
+    cache.invalidate("skills", stale_ok=True)
+    assert cache.get_stale("skills", ["skills"]).body == b"new"
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from cache import SnapshotCache
+from cache_sync import CacheSync
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_poll_invalidates_changed_collections(db):
+    cache = SnapshotCache(ttl=60)
+    sync = CacheSync(cache, collections=["skills", "goals"], mode="poll")
+    sync.db = db
+    await db.skills.insert_one({"order": 1, "updated_at": datetime.utcnow()})
+    await sync.poll_once()
+    assert cache.versions(["skills", "goals"])[1:] == (0, 0)
+
+    await db.skills.update_one({}, {"$set": {"updated_at": datetime.utcnow() + timedelta(seconds=1)}})
+    await sync.poll_once()
+    assert cache.versions(["skills", "goals"])[1:] == (1, 0)
+
+
+async def test_poll_sees_deletes(db):
+    cache = SnapshotCache(ttl=60)
+    sync = CacheSync(cache, collections=["goals"], mode="poll")
+    sync.db = db
+    now = datetime.utcnow()
+    await db.goals.insert_many([{"updated_at": now - timedelta(seconds=1)}, {"updated_at": now}])
+    await sync.poll_once()
+    # The newest timestamp stays the same, only the count moves
+    await db.goals.delete_one({"updated_at": now - timedelta(seconds=1)})
+    await sync.poll_once()
+    assert cache.versions(["goals"])[1:] == (1,)
+
+
+def test_change_events_invalidate_their_collection():
+    cache = SnapshotCache(ttl=60)
+    sync = CacheSync(cache, collections=["skills", "projects"])
+    sync._apply({"operationType": "insert", "ns": {"db": "test", "coll": "projects"}})
+    assert cache.versions(["skills", "projects"])[1:] == (0, 1)
+
+    sync._apply({"operationType": "dropDatabase", "ns": {"db": "test"}})
+    assert cache.versions(["skills", "projects"])[1:] == (1, 2)
+    assert sync.events == 2
+
+
+async def test_unexpected_errors_are_retried_and_stop_never_raises(db, caplog):
+    # mongomock has no change streams: watch() fails with a TypeError, not a PyMongoError
+    sync = CacheSync(SnapshotCache(ttl=60), mode="auto", retry_delay=0.01)
+    sync.start(db)
+    await asyncio.sleep(0.05)
+    assert not sync._task.done()
+    assert sync.reconnects >= 1
+    await sync.stop()
+    assert "Change stream failed unexpectedly" in caplog.text
+
+
+def test_listeners_hear_every_invalidation():
+    heard = []
+    sync = CacheSync(SnapshotCache(ttl=60), collections=["skills", "projects"])
+    sync.listeners.append(lambda *names: heard.append(names))
+    sync.listeners.append(lambda *names: 1 / 0)
+    sync._apply({"operationType": "update", "ns": {"db": "test", "coll": "skills"}})
+    sync._apply({"operationType": "dropDatabase", "ns": {"db": "test"}})
+    assert heard == [("skills",), ("skills", "projects")]
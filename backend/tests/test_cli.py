@@ -0,0 +1,86 @@
+import pytest
+import typer
+
+from cli import FileFormat, export_collection, import_collection
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("file_format", list(FileFormat))
+async def test_export_import_round_trip(seeded, tmp_path, file_format):
+    path = tmp_path / f"skills.{file_format.value}"
+    exported = await export_collection(seeded, "skills", path, file_format, batch_size=2)
+    original = await seeded.skills.find({}).sort("_id").to_list(length=None)
+    assert exported == len(original)
+
+    await import_collection(seeded, "skills", path, file_format, 2, key=None, drop=True, dry_run=False)
+    assert await seeded.skills.find({}).sort("_id").to_list(length=None) == original
+
+
+async def test_upsert_by_key_and_dry_run(seeded, tmp_path):
+    path = tmp_path / "goals.ndjson"
+    await export_collection(seeded, "goals", path, FileFormat.ndjson, batch_size=100)
+    count = await seeded.goals.count_documents({})
+
+    assert await import_collection(seeded, "goals", path, FileFormat.ndjson, 100, "_id", False, True) == count
+    await seeded.goals.delete_one({})
+    await import_collection(seeded, "goals", path, FileFormat.ndjson, 100, "_id", False, False)
+    assert await seeded.goals.count_documents({}) == count
+
+
+async def test_tenant_scoped_export_and_import(db, tmp_path):
+    await db.goals.insert_many([
+        {"_id": 1, "tenant_id": "alice", "order": 1},
+        {"_id": 2, "tenant_id": "bob", "order": 1},
+    ])
+    path = tmp_path / "goals.ndjson"
+    assert await export_collection(db, "goals", path, FileFormat.ndjson, 100, tenant="alice") == 1
+
+    # Dropping alice's goals leaves bob's alone
+    await import_collection(db, "goals", path, FileFormat.ndjson, 100, None, True, False, tenant="alice")
+    assert await db.goals.count_documents({}) == 2
+
+    # Upserts by key only match the tenant's own documents
+    await db.goals.delete_one({"_id": 1})
+    await import_collection(db, "goals", path, FileFormat.ndjson, 100, "order", False, False, tenant="carol")
+    assert await db.goals.find_one({"tenant_id": "carol"}, {"_id": 0}) == {"tenant_id": "carol", "order": 1}
+    assert await db.goals.find_one({"_id": 2}) == {"_id": 2, "tenant_id": "bob", "order": 1}
+
+
+def test_drop_needs_a_tenant_with_tenancy_on(monkeypatch, tmp_path):
+    from typer.testing import CliRunner
+
+    import cli
+
+    monkeypatch.setattr(cli, "TENANCY", "host")
+    result = CliRunner().invoke(cli.app, ["import", str(tmp_path), "--drop"])
+    assert result.exit_code != 0
+    assert "--tenant" in result.output
+
+
+async def test_copy_one_tenant_into_another(db, tmp_path, monkeypatch):
+    import tenancy
+    from seed_data import COLLECTIONS, seed_database
+    from tenancy import tenant_context
+
+    monkeypatch.setattr(tenancy, "TENANCY", "host")
+    with tenant_context("alice"):
+        await seed_database(db)
+    await db.goals.insert_one({"tenant_id": "bob", "order": 9})
+    counts = {name: await db[name].count_documents({"tenant_id": "alice"}) for name in COLLECTIONS}
+    for name in COLLECTIONS:
+        path = tmp_path / f"{name}.ndjson"
+        await export_collection(db, name, path, FileFormat.ndjson, 100, tenant="alice")
+        await import_collection(db, name, path, FileFormat.ndjson, 100, None, True, False, tenant="bob")
+        assert await db[name].count_documents({"tenant_id": "bob"}) == counts[name] > 0
+        assert await db[name].count_documents({"tenant_id": "alice"}) == counts[name]
+
+    # Upserts by another key copy again without touching alice's documents
+    path = tmp_path / "goals.ndjson"
+    await import_collection(db, "goals", path, FileFormat.ndjson, 100, "order", False, False, tenant="bob")
+    assert await db.goals.count_documents({"tenant_id": "bob"}) == counts["goals"]
+
+    with pytest.raises(typer.BadParameter):
+        await import_collection(db, "goals", path, FileFormat.ndjson, 100, "_id", True, False, tenant="bob")
+    # Rejected before dropping anything
+    assert await db.goals.count_documents({"tenant_id": "bob"}) == counts["goals"]
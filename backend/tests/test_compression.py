@@ -0,0 +1,21 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_small_cached_responses_list_vary_once(client):
+    response = await client.get("/api/goals?lang=en", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert [token.strip() for token in response.headers["vary"].split(",")] == ["Accept-Encoding"]
+
+
+async def test_large_responses_are_compressed(client):
+    response = await client.get("/api/portfolio", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json()["success"] is True
+
+
+async def test_uncached_routes_get_vary_from_the_middleware(client):
+    response = await client.get("/api/status?limit=1000", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["vary"] == "Accept-Encoding"
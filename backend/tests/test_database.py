@@ -0,0 +1,67 @@
+import pytest
+from pymongo.errors import WaitQueueTimeoutError
+from pymongo.read_preferences import Primary, SecondaryPreferred
+
+import server
+from database import Mongo, client_options, database_error
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def pool_env(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "7")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "2")
+    monkeypatch.setenv("MONGO_MAX_IDLE_TIME_MS", "60000")
+    monkeypatch.setenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "250")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zlib")
+    monkeypatch.setenv("MONGO_READ_PREFERENCE", "secondaryPreferred")
+
+
+def test_client_options_from_the_environment(pool_env, monkeypatch):
+    assert client_options() == {
+        "maxPoolSize": 7, "minPoolSize": 2, "maxIdleTimeMS": 60000,
+        "waitQueueTimeoutMS": 250, "compressors": "zlib",
+    }
+    monkeypatch.delenv("MONGO_MIN_POOL_SIZE")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "")
+    assert "minPoolSize" not in client_options()
+    assert "compressors" not in client_options()
+
+
+def test_the_client_gets_the_pool_settings_and_reads_follow_the_preference(pool_env):
+    # The client connects lazily: nothing here reaches a server
+    mongo = Mongo()
+    mongo.connect()
+    try:
+        pool = mongo.client.delegate.options.pool_options
+        assert pool.max_pool_size == 7
+        assert pool.min_pool_size == 2
+        assert pool.wait_queue_timeout == 0.25
+        assert mongo.pool.max_pool_size == 7
+
+        # Writes and the reads that must see them stay on the primary
+        assert mongo.db.read_preference == Primary()
+        assert mongo.read_db.read_preference == SecondaryPreferred()
+    finally:
+        mongo.close()
+
+
+def test_pool_exhaustion_is_a_retryable_503():
+    error = database_error(WaitQueueTimeoutError("Timed out while checking out a connection"))
+    assert error.status_code == 503
+    assert error.headers == {"Retry-After": "1"}
+    assert database_error(RuntimeError("boom")).status_code == 500
+
+
+async def test_routes_answer_503_when_the_pool_is_exhausted(client, monkeypatch):
+    from routes import portfolio
+
+    async def exhausted(*args, **kwargs):
+        raise WaitQueueTimeoutError("Timed out while checking out a connection")
+
+    monkeypatch.setattr(portfolio, "fetch_ordered", exhausted)
+    server.portfolio_cache.clear()
+    response = await client.get("/api/goals")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import server
+from health import HealthChecker
+
+pytestmark = pytest.mark.anyio
+
+
+class DownDatabase:
+    async def command(self, name):
+        raise ConnectionError("connection refused")
+
+
+async def test_ready_only_after_startup_and_a_successful_ping(db):
+    health = HealthChecker(interval=60)
+    health.db = db
+    assert not health.ready()
+    assert await health.check_once()
+    assert not health.ready()
+    health.started = True
+    assert health.ready()
+    assert health.database()["status"] == "up"
+
+
+async def test_failed_pings_are_not_ready():
+    health = HealthChecker(interval=60)
+    health.db = DownDatabase()
+    health.started = True
+    assert not await health.check_once()
+    assert not health.ready()
+    assert health.database()["status"] == "down"
+    assert health.database()["error"] == "connection refused"
+    assert health.consecutive_failures == 1
+
+
+async def test_probes(client):
+    assert (await client.get("/api/health/live")).json() == {"status": "alive"}
+    ready = await client.get("/api/health/ready")
+    assert ready.status_code == 200
+    assert ready.json()["status"] == "ready"
+    assert ready.json()["cache"]["warm"] is True
+
+
+@pytest.fixture
+async def probe(seeded):
+    """GET /api/health/ready without going through the lifespan"""
+    server.portfolio_cache.clear()
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        yield lambda: http.get("/api/health/ready")
+
+
+@pytest.fixture
+async def starting():
+    """Starts the app's lifespan in a task, which returns once the worker is ready"""
+    stop = asyncio.Event()
+    tasks = []
+
+    async def serve():
+        async with server.app.router.lifespan_context(server.app):
+            await stop.wait()
+
+    async def start():
+        tasks.append(asyncio.create_task(serve()))
+        while not server.health.started:
+            await asyncio.sleep(0.01)
+
+    yield lambda: asyncio.create_task(start())
+    stop.set()
+    await asyncio.gather(*tasks)
+
+
+async def test_not_ready_until_the_warm_up_is_done(probe, starting, monkeypatch):
+    warm_up_done = asyncio.Event()
+
+    async def slow_prewarm():
+        await warm_up_done.wait()
+        return 0
+
+    monkeypatch.setattr(server, "prewarm", slow_prewarm)
+    ready = starting()
+    await asyncio.sleep(0.1)
+    assert not ready.done()
+    response = await probe()
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+
+    warm_up_done.set()
+    await asyncio.wait_for(ready, 1)
+    assert (await probe()).status_code == 200
+
+
+async def test_a_warm_up_past_the_timeout_starts_cold(probe, starting, monkeypatch):
+    async def stuck_prewarm():
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(server, "prewarm", stuck_prewarm)
+    monkeypatch.setattr(server, "STARTUP_WARMUP_TIMEOUT", 0.1)
+    started = time.perf_counter()
+    await asyncio.wait_for(starting(), 1)
+    assert time.perf_counter() - started < 1
+    response = await probe()
+    assert response.status_code == 200
+    assert response.json()["cache"]["warm"] is False
@@ -0,0 +1,49 @@
+import pytest
+from pymongo import ASCENDING
+
+import indexes
+from indexes import INDEXES, IndexSpec, _plan_stages, ensure_indexes, query_shapes
+from tenancy import TENANT_FIELD
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_ensure_indexes_reports_one_name_per_index(db):
+    ttl = IndexSpec(
+        "status_checks", (("timestamp", ASCENDING),), {"name": "status_checks_ttl", "expireAfterSeconds": 60},
+    )
+    created = await ensure_indexes(db, [*INDEXES, ttl])
+    names = [name for collection in created.values() for name in collection]
+    assert all(isinstance(name, str) for name in names)
+    assert "status_checks_ttl" in created["status_checks"]
+    assert "projects_text" in created["projects"]
+    # Idempotent
+    assert await ensure_indexes(db, [*INDEXES, ttl]) == created
+
+
+def test_plan_stages_walks_nested_plans():
+    explain = {"queryPlanner": {"winningPlan": {
+        "stage": "FETCH", "inputStage": {"stage": "IXSCAN"},
+    }, "rejectedPlans": [{"stage": "COLLSCAN"}]}}
+    assert _plan_stages(explain) == ["FETCH", "IXSCAN"]
+
+
+def test_every_query_shape_has_an_index_on_its_collection():
+    indexed = {spec.collection for spec in INDEXES}
+    assert {shape.collection for shape in query_shapes() if not shape.collscan_ok} <= indexed
+
+
+def test_personal_info_reads_are_listed(monkeypatch):
+    shapes = {shape.name: shape for shape in query_shapes()}
+    assert shapes["personal info"].filter == {}
+    assert shapes["personal info"].collscan_ok
+    assert "$addFields" in shapes["personal info lang"].pipeline[-1]
+    assert "known tenant lookup" not in shapes
+
+    monkeypatch.setattr(indexes, "TENANCY", "host")
+    shapes = {shape.name: shape for shape in query_shapes()}
+    for name in ("personal info", "personal info lang", "known tenant lookup"):
+        assert shapes[name].collection == "personal_info"
+        assert not shapes[name].collscan_ok
+    assert shapes["known tenant lookup"].filter == {TENANT_FIELD: "example"}
+    assert shapes["personal info lang"].pipeline[0] == {"$match": {TENANT_FIELD: "example"}}
@@ -0,0 +1,30 @@
+import pytest
+
+from metrics import Metrics, server_timing
+
+
+def test_render_histograms_and_gauges():
+    registry = Metrics()
+    registry.observe_request("GET", "/api/skills", 200, 0.004, 512)
+    text = registry.render({"portfolio_cache_hits": 3})
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/skills",status="200"} 1' in text
+    assert "portfolio_cache_hits 3" in text
+
+
+def test_server_timing_sums_database_commands():
+    header = server_timing([("db", 0.002), ("db", 0.001), ("serialize", 0.0005)], 0.01)
+    assert header == b'app;dur=10.00, db;dur=3.00;desc="2 commands", serialize;dur=0.50'
+
+
+@pytest.mark.anyio
+async def test_requests_are_recorded_by_route_template(client):
+    skill = (await client.get("/api/skills")).json()[0]
+    updated = await client.put(f"/api/skills/{skill['_id']}", json={"order": 7})
+    assert updated.status_code == 200
+    text = (await client.get("/metrics")).text
+    assert (
+        'http_request_duration_seconds_count{method="PUT",route="/api/skills/{skill_id}",status="200"} 1'
+        in text
+    )
+    assert skill["_id"] not in text
+    assert "portfolio_cache_entries" in text
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from pagination import decode_cursor, encode_cursor, keyset_filter, parse_fields, projection
+
+pytestmark = pytest.mark.anyio
+
+SORT_KEYS = ["order", "_id"]
+
+
+def test_cursor_round_trip_keeps_bson_types():
+    oid = ObjectId()
+    token = encode_cursor({"order": 3, "_id": oid, "title": "x"}, SORT_KEYS)
+    assert "=" not in token
+    assert decode_cursor(token, SORT_KEYS) == [3, oid]
+
+
+@pytest.mark.parametrize("token", ["not base64!", "W10", encode_cursor({"order": 1}, ["order"])])
+def test_invalid_cursors_are_400(token):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(token, SORT_KEYS)
+    assert error.value.status_code == 400
+
+
+def test_keyset_filter_is_strictly_after():
+    oid = ObjectId()
+    assert keyset_filter(SORT_KEYS, [2, oid]) == {"$or": [
+        {"order": {"$gt": 2}},
+        {"order": 2, "_id": {"$gt": oid}},
+    ]}
+
+
+def test_fields():
+    assert parse_fields(" title, order ,") == ["title", "order"]
+    assert projection(["title"], SORT_KEYS) == {"title": 1, "order": 1, "_id": 1}
+    with pytest.raises(HTTPException):
+        parse_fields("$where")
+
+
+async def test_pages_cover_the_list_once(client):
+    full = (await client.get("/api/goals")).json()
+    seen = []
+    url = "/api/goals?limit=3"
+    while url:
+        response = await client.get(url)
+        assert response.status_code == 200
+        seen += response.json()
+        cursor = response.headers.get("x-next-cursor")
+        url = f"/api/goals?limit=3&after={cursor}" if cursor else None
+    assert [goal["_id"] for goal in seen] == [goal["_id"] for goal in full]
+
+
+async def test_ndjson_stream_with_fields(client):
+    response = await client.get("/api/goals?format=ndjson&fields=goal")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 4
+    assert set(lines[0]) == {"_id", "goal", "order"}
+
+
+async def test_cached_list_reads_stay_on_the_event_loop(client, monkeypatch):
+    import fastapi.dependencies.utils
+    import fastapi.routing
+
+    calls = []
+
+    def counting(run):
+        async def run_in_threadpool(func, *args, **kwargs):
+            calls.append(func)
+            return await run(func, *args, **kwargs)
+        return run_in_threadpool
+
+    for module in (fastapi.dependencies.utils, fastapi.routing):
+        monkeypatch.setattr(module, "run_in_threadpool", counting(module.run_in_threadpool))
+    for path in ("/api/skills", "/api/goals", "/api/projects/featured", "/api/goals?limit=2"):
+        assert (await client.get(path)).status_code == 200
+    assert calls == []
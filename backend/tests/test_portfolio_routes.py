@@ -0,0 +1,191 @@
+import asyncio
+import time
+
+import pytest
+from bson import ObjectId
+
+import server
+from routes.portfolio import CACHE_CONTROL
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_reads_are_cached_until_a_write(client):
+    first = await client.get("/api/skills")
+    assert first.status_code == 200
+    hits = server.portfolio_cache.stats()["hits"]
+    second = await client.get("/api/skills")
+    assert second.content == first.content
+    assert server.portfolio_cache.stats()["hits"] == hits + 1
+
+    version = server.portfolio_cache.stats()["versions"].get("skills", 0)
+    created = await client.post("/api/skills", json={
+        "category": {"pt": "Nuvem", "en": "Cloud"}, "technologies": ["AWS"], "order": 99,
+    })
+    assert created.status_code == 200
+    assert server.portfolio_cache.stats()["versions"]["skills"] == version + 1
+
+
+async def test_writes_are_read_back_at_once(client):
+    skill = (await client.get("/api/skills")).json()[0]
+    etag = (await client.get("/api/skills")).headers["etag"]
+    updated = await client.put(f"/api/skills/{skill['_id']}", json={"technologies": ["Rust"]})
+    assert updated.status_code == 200
+
+    # Even with stale-while-revalidate on, the pre-write snapshot is not served
+    response = await client.get("/api/skills", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert [s for s in response.json() if s["_id"] == skill["_id"]][0]["technologies"] == ["Rust"]
+
+
+async def test_portfolio_aggregates_every_section(client):
+    response = await client.get("/api/portfolio")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is True
+    assert body["data"]["personal_info"]["name"] == "Pedro Gomes"
+    assert {"skills", "education", "projects", "goals", "current_learning"} <= body["data"].keys()
+
+
+async def test_portfolio_is_404_without_personal_info(client, seeded):
+    await seeded.personal_info.delete_many({})
+    server.portfolio_cache.clear()
+    assert (await client.get("/api/portfolio")).status_code == 404
+
+
+async def test_etag_revalidation(client):
+    response = await client.get("/api/goals")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == CACHE_CONTROL
+    cached = await client.get("/api/goals", headers={"If-None-Match": f'"other", {etag}'})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+
+async def test_language_projection(client):
+    both = (await client.get("/api/goals")).json()
+    english = (await client.get("/api/goals?lang=en")).json()
+    assert [goal["goal"] for goal in english] == [goal["goal"]["en"] for goal in both]
+
+    auto = await client.get("/api/goals?lang=auto", headers={"Accept-Language": "pt-BR,en;q=0.5"})
+    assert [goal["goal"] for goal in auto.json()] == [goal["goal"]["pt"] for goal in both]
+    assert "Accept-Language" in auto.headers["vary"]
+
+
+@pytest.fixture
+def slow_goals(client, monkeypatch):
+    """Make the goals section of /portfolio outlast a 50ms sub-query timeout
+    (until the returned delays are cleared)"""
+    from routes import portfolio
+
+    delays = {"goals": 1}
+    fetch_ordered = portfolio.fetch_ordered
+
+    async def fetch(collection, query, lang=None):
+        await asyncio.sleep(delays.get(collection.name, 0))
+        return await fetch_ordered(collection, query, lang)
+
+    monkeypatch.setattr(portfolio, "PORTFOLIO_QUERY_TIMEOUT", 0.05)
+    monkeypatch.setattr(portfolio, "fetch_ordered", fetch)
+    # Drop the snapshots built by the warm-up
+    server.portfolio_cache.clear()
+    return delays
+
+
+async def test_portfolio_fails_on_a_slow_section(client, slow_goals):
+    started = time.perf_counter()
+    response = await client.get("/api/portfolio")
+    assert response.status_code == 500
+    assert time.perf_counter() - started < 0.5
+
+
+async def test_degraded_portfolio_is_served_but_not_cached(client, slow_goals, monkeypatch):
+    from routes import portfolio
+
+    monkeypatch.setattr(portfolio, "PORTFOLIO_PARTIAL_FAILURE", "empty")
+    response = await client.get("/api/portfolio")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["errors"] == ["goals"]
+    assert body["data"]["goals"] == []
+    assert body["data"]["skills"]
+    assert "etag" not in response.headers
+    assert server.portfolio_cache.get(("portfolio", None), portfolio.PORTFOLIO_COLLECTIONS) is None
+
+    # Once the section answers again, the full aggregate is built and cached
+    slow_goals.clear()
+    response = await client.get("/api/portfolio")
+    assert "errors" not in response.json()
+    assert response.json()["data"]["goals"]
+    assert server.portfolio_cache.get(("portfolio", None), portfolio.PORTFOLIO_COLLECTIONS) is not None
+
+
+async def test_missing_personal_info_stops_waiting_for_the_sections(seeded, monkeypatch):
+    from fastapi import HTTPException
+
+    from routes import portfolio
+
+    async def slow(collection, query, lang=None):
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(portfolio, "fetch_ordered", slow)
+    await seeded.personal_info.delete_many({})
+    before = asyncio.all_tasks()
+    with pytest.raises(HTTPException) as error:
+        await portfolio._load_portfolio()
+    assert error.value.status_code == 404
+    await asyncio.sleep(0.05)
+    assert [task for task in asyncio.all_tasks() - before if not task.done()] == []
+
+
+WRITE_ROUTES = [
+    ("/api/education", "education"),
+    ("/api/projects", "projects"),
+    ("/api/goals", "goals"),
+    ("/api/current-learning", "current_learning"),
+]
+
+
+def version(collection):
+    return server.portfolio_cache.stats()["versions"].get(collection, 0)
+
+
+@pytest.mark.parametrize("path, collection", WRITE_ROUTES)
+async def test_update_returns_the_document_after_the_write(client, seeded, path, collection):
+    item = (await client.get(path)).json()[0]
+    before = version(collection)
+    response = await client.put(f"{path}/{item['_id']}", json={"order": 4242})
+    assert response.status_code == 200
+    assert response.json()["_id"] == item["_id"]
+    assert response.json()["order"] == 4242
+    assert version(collection) == before + 1
+    stored = await seeded[collection].find_one({"_id": ObjectId(item["_id"])})
+    assert stored["order"] == 4242
+
+
+@pytest.mark.parametrize("path, collection", WRITE_ROUTES)
+async def test_delete_invalidates_once_a_document_is_deleted(client, seeded, path, collection):
+    item = (await client.get(path)).json()[0]
+    before = version(collection)
+    response = await client.delete(f"{path}/{item['_id']}")
+    assert response.status_code == 200
+    assert version(collection) == before + 1
+    assert await seeded[collection].find_one({"_id": ObjectId(item["_id"])}) is None
+
+    # Deleting it again matches nothing: 404, and the snapshots are kept
+    assert (await client.delete(f"{path}/{item['_id']}")).status_code == 404
+    assert version(collection) == before + 1
+
+
+@pytest.mark.parametrize("path, collection", WRITE_ROUTES)
+@pytest.mark.parametrize("method", ["PUT", "DELETE"])
+async def test_bad_and_unknown_ids_leave_the_cache_alone(client, path, collection, method):
+    before = version(collection)
+    body = {"order": 1} if method == "PUT" else None
+    malformed = await client.request(method, f"{path}/not-an-id", json=body)
+    assert malformed.status_code == 400
+    missing = await client.request(method, f"{path}/{ObjectId()}", json=body)
+    assert missing.status_code == 404
+    assert version(collection) == before
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from cache import SnapshotCache
+from cache_sync import CacheSync
+from search_index import TechnologyIndex
+
+pytestmark = pytest.mark.anyio
+
+
+def names(facets):
+    return {entry["name"]: entry["count"] for entry in facets["technologies"]}
+
+
+async def test_facets_and_intersections(db):
+    await db.projects.insert_many([
+        {"_id": 1, "technologies": ["Python", "FastAPI"]},
+        {"_id": 2, "technologies": ["Python", "React"]},
+    ])
+    index = TechnologyIndex(collections={"projects": {}})
+    await index.load(db)
+    assert names(index.facets("projects")) == {"Python": 2, "FastAPI": 1, "React": 1}
+    assert index.facets("projects", ["Python", "React"])["total"] == 1
+    assert index.canonical(["python"]) == ["Python"]
+
+
+async def test_apply_follows_local_writes(db):
+    index = TechnologyIndex(collections={"skills": {"is_active": True}})
+    await index.load(db)
+    index.apply("skills", [(1, {"is_active": True, "technologies": ["Go"]})])
+    assert names(index.facets("skills")) == {"Go": 1}
+    index.apply("skills", [(1, {"is_active": False})])
+    assert index.facets("skills")["total"] == 0
+
+
+async def test_other_workers_writes_reload_through_cache_sync(db):
+    index = TechnologyIndex(collections={"projects": {}}, refresh_interval=0)
+    index.start(db)
+    await index.load(db)
+    sync = CacheSync(SnapshotCache(ttl=60), collections=["projects", "goals"])
+    sync.listeners.append(index.refresh)
+
+    # Written by another worker: only the change event reaches this one
+    await db.projects.insert_one({"_id": 1, "technologies": ["Ghost"]})
+    sync._apply({"operationType": "insert", "ns": {"db": "test", "coll": "projects"}})
+    sync._apply({"operationType": "insert", "ns": {"db": "test", "coll": "projects"}})
+    sync._apply({"operationType": "insert", "ns": {"db": "test", "coll": "goals"}})
+    while index._reloading:
+        await asyncio.sleep(0.01)
+    assert names(index.facets("projects")) == {"Ghost": 1}
+    # Both events arrived before the reload read the collection: one reload covers them
+    assert index.loads == 2
+    await index.stop()
+
+
+async def test_changes_during_a_reload_cause_one_more(db):
+    index = TechnologyIndex(collections={"projects": {}}, refresh_interval=0)
+    index.start(db)
+    loads = []
+
+    async def load(db, collections=None):
+        loads.append(collections)
+        await asyncio.sleep(0.02)
+
+    index.load = load
+    index.refresh("projects")
+    await asyncio.sleep(0.01)
+    index.refresh("projects")
+    index.refresh("projects")
+    while index._reloading:
+        await asyncio.sleep(0.01)
+    assert loads == [["projects"], ["projects"]]
+
+
+async def test_partial_updates_of_unindexed_documents_are_not_added(db):
+    index = TechnologyIndex(collections={"projects": {}}, refresh_interval=0)
+    index.start(db)
+    await index.load(db)
+    # A batch update of an id that may not exist: only a reload can tell
+    index.apply("projects", [(1, {"technologies": ["Ghost"]})], partial=True)
+    assert index.facets("projects")["total"] == 0
+    while index._reloading:
+        await asyncio.sleep(0.01)
+    assert index.facets("projects")["total"] == 0
@@ -0,0 +1,18 @@
+import copy
+import json
+from datetime import datetime
+
+from bson import ObjectId
+
+from routes import portfolio
+from routes.portfolio import object_id_str, serialize
+
+
+def test_fast_path_encodes_raw_documents_like_the_default_path(monkeypatch):
+    document = {"_id": ObjectId(), "name": {"pt": "Ação", "en": "Action"}, "updated_at": datetime(2024, 5, 17, 13, 1)}
+    default = serialize(object_id_str(copy.deepcopy(document)))
+    monkeypatch.setattr(portfolio, "FAST_JSON", True)
+    # No ObjectId walk: orjson converts them while encoding
+    fast = serialize(document)
+    assert json.loads(fast) == json.loads(default)
+    assert json.loads(fast)["_id"] == str(document["_id"])
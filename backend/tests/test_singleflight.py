@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_calls_share_one_load():
+    flights = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "snapshot"
+
+    results = await asyncio.gather(*(flights.do("key", load) for _ in range(5)))
+    assert results == ["snapshot"] * 5
+    assert len(calls) == 1
+    assert flights.stats()["coalesced"] == 4
+    assert flights.stats()["in_flight"] == 0
+
+
+async def test_failures_reach_every_caller():
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("down")
+
+    results = await asyncio.gather(*(flights.do("key", load) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flights.stats()["failures"] == 1
+
+
+async def test_a_cancelled_caller_does_not_cancel_the_load():
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.02)
+        return "snapshot"
+
+    waiter = asyncio.ensure_future(flights.do("key", load))
+    other = asyncio.ensure_future(flights.do("key", load))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    assert await other == "snapshot"
+
+
+async def test_spawn_runs_in_the_background_once():
+    flights = SingleFlight()
+    done = asyncio.Event()
+
+    async def load():
+        done.set()
+
+    flights.spawn("key", load)
+    flights.spawn("key", load)
+    await done.wait()
+    assert flights.stats()["background_refreshes"] == 1
+    assert flights.stats()["coalesced"] == 1
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from static_export import StaticExporter
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_build_writes_every_language_and_matches_the_api(client, seeded, tmp_path):
+    exporter = StaticExporter(tmp_path, delay=0)
+    manifest = await exporter.build(db=seeded)
+    assert set(manifest) == {"all", "pt", "en"}
+    for lang_key, entry in manifest.items():
+        assert (tmp_path / entry["file"]).read_bytes() == (tmp_path / f"portfolio.{lang_key}.json").read_bytes()
+        assert (tmp_path / f"{entry['file']}.gz").exists()
+    assert json.loads((tmp_path / "manifest.json").read_text()) == manifest
+
+    english = json.loads((tmp_path / "portfolio.en.json").read_bytes())
+    assert english == (await client.get("/api/portfolio?lang=en")).json()
+
+
+async def test_incremental_builds_only_change_what_was_written(seeded, tmp_path):
+    exporter = StaticExporter(tmp_path, delay=0)
+    first = await exporter.build(db=seeded)
+    assert await exporter.build(["goals"], db=seeded) == first
+
+    await seeded.goals.delete_many({})
+    second = await exporter.build(["goals"], db=seeded)
+    assert second["all"]["file"] != first["all"]["file"]
+    # The previous version stays for clients holding the old manifest
+    assert (tmp_path / first["all"]["file"]).exists()
@@ -0,0 +1,51 @@
+import pytest
+
+import server
+from routes import status
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_capped_collection_is_created_before_the_indexes(db, monkeypatch):
+    calls = []
+
+    async def create_collection(name, **options):
+        # mongomock has no capped collections: record the call instead
+        calls.append(("create_collection", name, options))
+
+    async def ensure_indexes(db):
+        calls.append(("ensure_indexes",))
+
+    async def nothing():
+        pass
+
+    monkeypatch.setattr(status, "STATUS_CAPPED_BYTES", 1 << 20)
+    monkeypatch.setattr(db, "create_collection", create_collection)
+    monkeypatch.setattr(server, "ensure_indexes", ensure_indexes)
+    monkeypatch.setattr(server, "_prewarm", nothing)
+    monkeypatch.setattr(server, "_load_tech_index", nothing)
+    await server.warm_up()
+    assert calls == [
+        ("create_collection", "status_checks", {"capped": True, "size": 1 << 20}),
+        ("ensure_indexes",),
+    ]
+
+
+async def test_status_checks_round_trip(client):
+    created = await client.post("/api/status", json={"client_name": "web"})
+    assert created.status_code == 200
+    listed = (await client.get("/api/status?client_name=web")).json()
+    assert [check["id"] for check in listed] == [created.json()["id"]]
+
+
+async def test_direct_mode_writes_rollups_in_batches(client, seeded):
+    for name in ("web", "web", "ios"):
+        assert (await client.post("/api/status", json={"client_name": name})).status_code == 200
+    # Nothing but the checks themselves is written per request
+    assert await seeded.status_rollups.count_documents({}) == 0
+    assert status.rollup_buffer.stats()["pending"] == 3
+
+    await status.rollup_buffer.flush()
+    buckets = (await client.get("/api/status/rollup?granularity=day")).json()
+    assert {bucket["client_name"]: bucket["count"] for bucket in buckets} == {"web": 2, "ios": 1}
+    assert await seeded.status_rollups.count_documents({}) == 6
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from status_ingest import IngestClosed, StatusIngestBuffer
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_batches_are_acknowledged_once_written(db):
+    buffer = StatusIngestBuffer(durability="ack", batch_size=10, flush_interval=0.01)
+    buffer.start(db.status_checks)
+    await asyncio.gather(*(buffer.submit({"client_name": f"web-{i}"}) for i in range(25)))
+    assert await db.status_checks.count_documents({}) == 25
+    assert buffer.stats()["flushes"] == 3
+    await buffer.drain()
+    with pytest.raises(IngestClosed):
+        await buffer.submit({"client_name": "late"})
+
+
+async def test_a_submit_racing_drain_is_answered(db):
+    buffer = StatusIngestBuffer(durability="ack", flush_interval=0.01)
+    buffer.start(db.status_checks)
+    drained = asyncio.Event()
+    put = buffer._queue.put
+
+    async def late_put(item):
+        # Past the closed check, but only queued once drain() is over
+        await drained.wait()
+        await put(item)
+
+    buffer._queue.put = late_put
+    submit = asyncio.create_task(buffer.submit({"client_name": "web"}))
+    await asyncio.sleep(0)
+    buffer._queue.put = put
+    await buffer.drain()
+    drained.set()
+    with pytest.raises(IngestClosed):
+        await asyncio.wait_for(submit, 1)
+    assert await db.status_checks.count_documents({}) == 0
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import pytest
+
+from status_rollup import bucket_start, record_status_checks, rollup_query
+
+
+def test_bucket_start():
+    timestamp = datetime(2024, 5, 17, 13, 42, 7, 123)
+    assert bucket_start(timestamp, "minute") == datetime(2024, 5, 17, 13, 42)
+    assert bucket_start(timestamp, "hour") == datetime(2024, 5, 17, 13)
+    assert bucket_start(timestamp, "day") == datetime(2024, 5, 17)
+    with pytest.raises(ValueError):
+        bucket_start(timestamp, "week")
+
+
+def test_range_includes_the_bucket_holding_since():
+    query = rollup_query("hour", "web", since=datetime(2024, 5, 17, 13, 30), until=datetime(2024, 5, 17, 15))
+    assert query == {
+        "granularity": "hour",
+        "client_name": "web",
+        "bucket": {"$gte": datetime(2024, 5, 17, 13), "$lt": datetime(2024, 5, 17, 15)},
+    }
+
+
+@pytest.mark.anyio
+async def test_batches_are_summed_into_their_buckets(db):
+    first, last = datetime(2024, 5, 17, 13, 1), datetime(2024, 5, 17, 13, 59)
+    await record_status_checks(db, [{"client_name": "web", "timestamp": first}])
+    await record_status_checks(db, [{"client_name": "web", "timestamp": last}])
+    bucket = await db.status_rollups.find_one({"granularity": "hour"}, {"_id": 0})
+    assert bucket == {
+        "granularity": "hour", "client_name": "web", "bucket": datetime(2024, 5, 17, 13),
+        "count": 2, "first": first, "last": last,
+    }
+    assert await db.status_rollups.count_documents({"granularity": "minute"}) == 2
@@ -0,0 +1,102 @@
+import pytest
+
+import cache as cache_module
+from cache import TenantCaches
+from cache_sync import CacheSync
+from tenancy import tenant_context
+
+
+@pytest.fixture
+def tenancy_on(monkeypatch):
+    monkeypatch.setattr(cache_module, "TENANCY", "host")
+
+
+def cache_for(caches, *tenants):
+    for tenant in tenants:
+        with tenant_context(tenant):
+            caches.put("skills", caches.versions(["skills"]), tenant.encode())
+
+
+def versions(caches, tenant):
+    with tenant_context(tenant):
+        return caches.versions(["skills"])[1:]
+
+
+def test_change_events_invalidate_only_their_tenant(tenancy_on):
+    caches = TenantCaches(ttl=60)
+    cache_for(caches, "alice", "bob")
+    sync = CacheSync(caches, collections=["skills"])
+
+    sync._apply({"operationType": "insert", "ns": {"coll": "skills"}, "fullDocument": {"tenant_id": "alice"}})
+    assert (versions(caches, "alice"), versions(caches, "bob")) == ((1,), (0,))
+    # A tenant without snapshots gets no cache allocated for the event
+    sync._apply({"operationType": "update", "ns": {"coll": "skills"}, "fullDocument": {"tenant_id": "carol"}})
+    assert caches.stats()["tenants"] == 2
+
+    # Deletes don't say whose document it was
+    sync._apply({"operationType": "delete", "ns": {"coll": "skills"}})
+    assert (versions(caches, "alice"), versions(caches, "bob")) == ((2,), (1,))
+
+
+def test_least_recently_used_tenants_are_evicted(tenancy_on):
+    caches = TenantCaches(ttl=60, max_tenants=2)
+    cache_for(caches, "alice", "bob")
+    with tenant_context("alice"):
+        assert caches.get("skills", ["skills"]).body == b"alice"
+    cache_for(caches, "carol")
+    assert caches.stats()["evictions"] == 1
+    assert list(caches._caches) == ["alice", "carol"]
+
+
+def test_etags_differ_between_tenants_for_the_same_body(tenancy_on):
+    caches = TenantCaches(ttl=60)
+    etags = []
+    for tenant in ("alice", "bob"):
+        with tenant_context(tenant):
+            etags.append(caches.put("skills", caches.versions(["skills"]), b"[]").etag)
+    assert etags[0] != etags[1]
+
+
+@pytest.fixture
+async def tenant_client(db, tenancy_on, monkeypatch):
+    """The API with TENANCY=host, tenant "alice" seeded and no other"""
+    import httpx
+
+    import server
+    import tenancy
+    from seed_data import seed_database
+    from tenancy import KnownTenants, TenantMiddleware
+
+    monkeypatch.setattr(tenancy, "TENANCY", "host")
+    with tenant_context("alice"):
+        await seed_database(db)
+    known = KnownTenants()
+    known.db = db
+    server.portfolio_cache.clear()
+    transport = httpx.ASGITransport(app=TenantMiddleware(server.app, mode="host", known=known))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        yield http, known
+
+
+@pytest.mark.anyio
+async def test_requests_are_scoped_to_their_tenant(tenant_client, db):
+    http, _ = tenant_client
+    await db.skills.insert_one({"tenant_id": "bob", "is_active": True, "order": 0, "technologies": ["Bob"]})
+    skills = (await http.get("/api/skills", headers={"host": "alice"})).json()
+    assert skills
+    assert all("tenant_id" not in skill and skill["technologies"] != ["Bob"] for skill in skills)
+
+
+@pytest.mark.anyio
+async def test_unknown_tenants_are_404_without_a_cache(tenant_client):
+    import server
+
+    http, known = tenant_client
+    for _ in range(3):
+        response = await http.get("/api/portfolio", headers={"host": "mallory"})
+        assert response.status_code == 404
+    # Remembered after the first check, and never given a snapshot cache
+    assert known.lookups == 1
+    assert server.portfolio_cache.stats()["tenants"] == 0
+    assert (await http.get("/api/portfolio", headers={"host": "alice"})).status_code == 200
+    assert (await http.get("/api/health/live", headers={"host": "mallory"})).status_code == 200